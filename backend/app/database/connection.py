@@ -1,28 +1,57 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
-from ..services.auth_service import decode_token
-from ..settings import get_client, MONGO_URL
+from ..services.auth_cache import auth_cache
+from ..settings import ADMIN_USERNAMES, get_client, settings, MONGO_URL
 
 oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
 async def get_current_user(token: str = Depends(oauth2)):
     try:
-        payload = decode_token(token)
+        payload = auth_cache.decode(token)
+        # Refresh tokens carry the same claims but must only reach /auth/refresh
+        if payload.get("type") != "access":
+            raise ValueError("not an access token")
         uid = payload.get("sub")
+        ObjectId(uid)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
     users = get_users_collection()
-    user = await users.find_one({"_id": ObjectId(uid)}, {"password": 0})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user["id"] = str(user.pop("_id"))
+    if settings.AUTH_TRUST_JWT_CLAIMS:
+        # Stateless: identity comes from the verified claims, only the (cached)
+        # revocation state is looked up
+        version = await auth_cache.get_token_version(users, uid)
+        if version is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = {"id": uid, "username": payload.get("username")}
+    else:
+        user = await auth_cache.get_user(users, uid)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        version = user.get("token_version", 0)
+        user = dict(user)
+    if payload.get("tv", 0) != version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+        )
     return user
 
 
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    if current_user.get("username") not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
+
+
+def get_database():
+    return get_client()["trackerdb"]
+
+
 def get_users_collection():
     return get_client()["trackerdb"]["users"]
 
@@ -37,3 +66,27 @@ def get_user_books_collection():
 
 def get_reading_logs_collection():
     return get_client()["trackerdb"]["user_reading_logs"]
+
+
+def get_search_cache_collection():
+    return get_client()["trackerdb"]["search_cache"]
+
+
+def get_rate_limits_collection():
+    return get_client()["trackerdb"]["rate_limits"]
+
+
+def get_user_versions_collection():
+    return get_client()["trackerdb"]["user_versions"]
+
+
+def get_response_cache_collection():
+    return get_client()["trackerdb"]["response_cache"]
+
+
+def get_refresh_tokens_collection():
+    return get_client()["trackerdb"]["refresh_tokens"]
+
+
+def get_reading_stats_collection():
+    return get_client()["trackerdb"]["reading_stats"]
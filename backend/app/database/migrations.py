@@ -0,0 +1,505 @@
+"""Versioned schema migrations for trackerdb.
+
+Each migration declares the indexes it needs and/or a data step. Applied
+versions are recorded in `schema_migrations` together with a checksum of the
+declaration, so every worker can run `upgrade` at startup: one worker at a
+time holds a lock document in the same collection while pending migrations
+are applied in order (the others wait, then find them applied), and a
+migration edited after it was applied, or an index that exists with a
+different definition, stops the upgrade before anything is changed. Any
+failure stops the app from starting.
+
+    python -m app.database.migrations upgrade|status|explain
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from ..logger import get_logger
+from ..services.library_service import check_book_summaries
+from ..services.local_search import backfill_search_terms
+from ..services.stats_service import rebuild_stats
+from .connection import get_database
+
+logger = get_logger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+# Lock document held while a worker upgrades; a crashed holder's lock expires
+LOCK_ID = "lock"
+LOCK_SECONDS = 1800
+LOCK_POLL_SECONDS = 2
+# Index options that make two definitions on the same keys incompatible
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+class MigrationConflict(Exception):
+    """The database disagrees with a declared migration; fix it by hand."""
+
+
+class Index:
+    def __init__(self, collection: str, keys, **options):
+        self.collection = collection
+        self.keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        self.options = options
+        # MongoDB's default name, so indexes created before migrations are adopted
+        self.name = options.get("name") or "_".join(f"{k}_{d}" for k, d in self.keys)
+
+    def describe(self) -> dict:
+        return {"collection": self.collection, "keys": self.keys, **self.options}
+
+
+class Migration:
+    def __init__(
+        self, version: int, description: str, indexes=(), run=None, prepare=None
+    ):
+        self.version = version
+        self.description = description
+        self.indexes = list(indexes)
+        self.run = run
+        # Data step that must run before the indexes are built
+        self.prepare = prepare
+
+    def checksum(self) -> str:
+        declaration = {
+            "indexes": [index.describe() for index in self.indexes],
+            "run": self.run.__name__ if self.run else None,
+        }
+        if self.prepare:
+            declaration["prepare"] = self.prepare.__name__
+        raw = json.dumps(declaration, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()[:16]
+
+
+async def move_misfiled_accounts(db) -> dict:
+    """Accounts registered through /users/register were stored in user_books."""
+    moved = 0
+    cursor = db["user_books"].find(
+        {"username": {"$exists": True}, "book_id": {"$exists": False}}
+    )
+    async for account in cursor:
+        # Keep the _id (issued tokens refer to it); an existing username wins
+        await db["users"].update_one(
+            {"username": account["username"]}, {"$setOnInsert": account}, upsert=True
+        )
+        await db["user_books"].delete_one({"_id": account["_id"]})
+        moved += 1
+    return {"moved": moved}
+
+
+def _duplicate_groups(collection, key, **accumulators):
+    """Groups of documents sharing `key`, oldest first; only groups of two or more."""
+    return collection.aggregate(
+        [
+            {"$sort": {"_id": 1}},
+            {
+                "$group": {
+                    "_id": key,
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1},
+                    **accumulators,
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+        ],
+        allowDiskUse=True,
+    )
+
+
+async def remove_duplicate_books(db) -> dict:
+    """Keep the oldest catalog document per google_id so it can be unique.
+
+    Library entries and logs refer to books by google_id, so nothing needs
+    repointing.
+    """
+    removed = 0
+    async for group in _duplicate_groups(db["books"], "$google_id"):
+        result = await db["books"].delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    return {"removed": removed}
+
+
+async def merge_duplicate_logs(db) -> dict:
+    """Merge logs of the same user, book and day so that key can be unique.
+
+    Merged like repeated adds: pages add up, current_page keeps the highest
+    and notes are joined. The affected users' reading stats are rebuilt.
+    """
+    merged, users = 0, set()
+    groups = _duplicate_groups(
+        db["user_reading_logs"],
+        {"user_id": "$user_id", "book_id": "$book_id", "reading_date": "$reading_date"},
+        pages_read={"$sum": "$pages_read"},
+        current_page={"$max": "$current_page"},
+        notes={"$push": "$notes"},
+    )
+    async for group in groups:
+        keep, *extra = group["ids"]
+        await db["user_reading_logs"].update_one(
+            {"_id": keep},
+            {
+                "$set": {
+                    "pages_read": group["pages_read"],
+                    "current_page": group["current_page"],
+                    "notes": "\n".join(n for n in group["notes"] if n),
+                }
+            },
+        )
+        await db["user_reading_logs"].delete_many({"_id": {"$in": extra}})
+        merged += len(extra)
+        users.add(group["_id"]["user_id"])
+    for user_id in users:
+        await rebuild_stats(db["reading_stats"], db["user_reading_logs"], user_id)
+    return {"merged": merged, "stats_rebuilt": len(users)}
+
+
+async def remove_baseline_duplicates(db) -> dict:
+    """Rows the baseline's check-then-insert races could duplicate."""
+    return {
+        "books": await remove_duplicate_books(db),
+        "logs": await merge_duplicate_logs(db),
+    }
+
+
+async def remove_duplicate_library_entries(db) -> dict:
+    """Keep one user_books entry per (user_id, book_id) so it can be unique.
+
+    The survivor is the entry with the most progress, then the oldest one.
+    """
+    removed = 0
+    cursor = db["user_books"].aggregate(
+        [
+            {"$match": {"book_id": {"$exists": True}}},
+            {"$sort": {"current_page": -1, "_id": 1}},
+            {
+                "$group": {
+                    "_id": {"user_id": "$user_id", "book_id": "$book_id"},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+        ],
+        allowDiskUse=True,
+    )
+    async for group in cursor:
+        result = await db["user_books"].delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+    return {"removed": removed}
+
+
+async def add_search_terms(db) -> dict:
+    return {"updated": await backfill_search_terms(db["books"])}
+
+
+async def repair_book_summaries(db) -> dict:
+    return await check_book_summaries(db["books"], db["user_books"], repair=True)
+
+
+async def build_reading_stats(db) -> dict:
+    return await rebuild_stats(db["reading_stats"], db["user_reading_logs"])
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "Baseline indexes",
+        prepare=remove_baseline_duplicates,
+        indexes=[
+            # One catalog document per Google Books volume (search upserts rely on it)
+            Index("books", "google_id", unique=True),
+            # Prefix lookups for local catalog search
+            Index("books", "search_terms"),
+            # Keyset pagination of a user's library by most recent reading
+            Index("user_books", [("user_id", 1), ("last_read_date", -1), ("_id", -1)]),
+            # Propagation of catalog changes into embedded book summaries
+            Index("user_books", "book_id"),
+            # Expire cached search pages once `expires_at` has passed
+            Index("search_cache", "expires_at", expireAfterSeconds=0),
+            # Shared per-user response cache: expiry and per-user invalidation
+            Index("response_cache", "expires_at", expireAfterSeconds=0),
+            Index("response_cache", [("user_id", 1), ("scope", 1), ("book_id", 1)]),
+            # Refresh token store: expiry, family revocation, sign-out everywhere
+            Index("refresh_tokens", "expires_at", expireAfterSeconds=0),
+            Index("refresh_tokens", "family_id"),
+            Index("refresh_tokens", "user_id"),
+            # One log per user, book and day (add_log_reading upserts on it)
+            Index(
+                "user_reading_logs",
+                [("user_id", 1), ("book_id", 1), ("reading_date", 1)],
+                unique=True,
+            ),
+            # A book's log history, newest first, paginated on (reading_date, _id)
+            Index(
+                "user_reading_logs",
+                [("user_id", 1), ("book_id", 1), ("reading_date", -1), ("_id", -1)],
+            ),
+            # Reading statistics read a user's day (or book) rollups in date order
+            Index("reading_stats", [("user_id", 1), ("kind", 1), ("date", 1)]),
+        ],
+    ),
+    Migration(2, "Move accounts stored in user_books", run=move_misfiled_accounts),
+    Migration(
+        3,
+        "Unique usernames and library entries",
+        prepare=remove_duplicate_library_entries,
+        indexes=[
+            # Login and registration look users up by name
+            Index("users", "username", unique=True),
+            # Every per-book route looks up (user_id, book_id)
+            Index("user_books", [("user_id", 1), ("book_id", 1)], unique=True),
+        ],
+    ),
+    Migration(4, "Backfill search_terms for local search", run=add_search_terms),
+    Migration(5, "Repair embedded book summaries", run=repair_book_summaries),
+    Migration(6, "Build reading statistics rollups", run=build_reading_stats),
+]
+
+
+async def applied_migrations(db) -> dict[int, dict]:
+    cursor = db[MIGRATIONS_COLLECTION].find({"_id": {"$ne": LOCK_ID}})
+    return {doc["_id"]: doc async for doc in cursor}
+
+
+async def index_conflicts(db, migrations=MIGRATIONS) -> list[str]:
+    """Declared indexes that exist in the database with another definition."""
+    conflicts = []
+    existing: dict[str, dict] = {}
+    for migration in migrations:
+        for index in migration.indexes:
+            if index.collection not in existing:
+                existing[index.collection] = await db[
+                    index.collection
+                ].index_information()
+            for name, info in existing[index.collection].items():
+                keys = [
+                    (k, int(d) if isinstance(d, float) else d) for k, d in info["key"]
+                ]
+                same_keys = keys == index.keys
+                if not same_keys and name != index.name:
+                    continue
+                if not same_keys:
+                    conflicts.append(
+                        f"{index.collection}.{name} is on {info['key']}, expected {index.keys}"
+                    )
+                    continue
+                for option in COMPARED_OPTIONS:
+                    actual, expected = info.get(option), index.options.get(option)
+                    if option == "unique":
+                        actual, expected = bool(actual), bool(expected)
+                    if actual != expected:
+                        conflicts.append(
+                            f"{index.collection}.{name} has {option}={actual!r}, "
+                            f"migration {migration.version} expects {expected!r}"
+                        )
+    return conflicts
+
+
+async def acquire_lock(db, owner: str) -> None:
+    """Wait until `owner` holds the migration lock."""
+    waiting = False
+    while True:
+        now = datetime.now(timezone.utc)
+        try:
+            # Inserts a free lock or takes over an expired one; a live one is a
+            # duplicate _id
+            await db[MIGRATIONS_COLLECTION].update_one(
+                {"_id": LOCK_ID, "expires_at": {"$lt": now}},
+                {
+                    "$set": {
+                        "owner": owner,
+                        "expires_at": now + timedelta(seconds=LOCK_SECONDS),
+                    }
+                },
+                upsert=True,
+            )
+            return
+        except DuplicateKeyError:
+            if not waiting:
+                logger.info("Waiting for another worker to finish migrations")
+                waiting = True
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+
+
+async def release_lock(db, owner: str) -> None:
+    await db[MIGRATIONS_COLLECTION].delete_one({"_id": LOCK_ID, "owner": owner})
+
+
+async def upgrade(db=None, migrations=MIGRATIONS) -> list[dict]:
+    """Apply pending migrations in order under the lock; returns what was applied.
+
+    Raises MigrationConflict before changing anything when an applied
+    migration was edited or an index definition disagrees with the database.
+    """
+    db = get_database() if db is None else db
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    await acquire_lock(db, owner)
+    try:
+        return await _apply_pending(db, migrations)
+    finally:
+        await release_lock(db, owner)
+
+
+async def _apply_pending(db, migrations) -> list[dict]:
+    applied = await applied_migrations(db)
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded and recorded["checksum"] != migration.checksum():
+            raise MigrationConflict(
+                f"Migration {migration.version} ({migration.description}) changed "
+                "after it was applied; add a new migration instead"
+            )
+    conflicts = await index_conflicts(db, migrations)
+    if conflicts:
+        raise MigrationConflict("Conflicting indexes: " + "; ".join(conflicts))
+
+    done = []
+    for migration in migrations:
+        if migration.version in applied:
+            continue
+        prepared = await migration.prepare(db) if migration.prepare else None
+        for index in migration.indexes:
+            await db[index.collection].create_index(index.keys, **index.options)
+        result = await migration.run(db) if migration.run else None
+        record = {
+            "_id": migration.version,
+            "description": migration.description,
+            "checksum": migration.checksum(),
+            "applied_at": datetime.now(timezone.utc),
+            "result": result,
+        }
+        if prepared is not None:
+            record["prepared"] = prepared
+        await db[MIGRATIONS_COLLECTION].insert_one(record)
+        logger.info(f"Applied migration {migration.version}: {migration.description}")
+        done.append(record)
+    return done
+
+
+async def ensure_schema() -> None:
+    """Startup hook: the app does not start on a schema it cannot trust."""
+    try:
+        await upgrade()
+    except Exception as e:
+        logger.error(f"Failed to apply migrations: {e}", exc_info=True)
+        raise
+
+
+async def status(db=None, migrations=MIGRATIONS) -> dict:
+    db = get_database() if db is None else db
+    applied = await applied_migrations(db)
+    return {
+        "migrations": [
+            {
+                "version": m.version,
+                "description": m.description,
+                "applied_at": applied.get(m.version, {}).get("applied_at"),
+                "changed": m.version in applied
+                and applied[m.version]["checksum"] != m.checksum(),
+            }
+            for m in migrations
+        ],
+        "index_conflicts": await index_conflicts(db, migrations),
+    }
+
+
+# The application's frequent queries: (description, collection, filter, sort)
+HOT_QUERIES = [
+    ("login by username", "users", {"username": "reader"}, None),
+    ("catalog book by google_id", "books", {"google_id": "volume"}, None),
+    ("local search prefix", "books", {"search_terms": {"$regex": "^dun"}}, None),
+    (
+        "library entry",
+        "user_books",
+        {"user_id": ObjectId(), "book_id": "volume"},
+        None,
+    ),
+    (
+        "library page",
+        "user_books",
+        {"user_id": ObjectId()},
+        [("last_read_date", -1), ("_id", -1)],
+    ),
+    (
+        "reading log of a day",
+        "user_reading_logs",
+        {
+            "user_id": ObjectId(),
+            "book_id": "volume",
+            "reading_date": datetime(2025, 1, 1),
+        },
+        None,
+    ),
+    (
+        "log history page",
+        "user_reading_logs",
+        {"user_id": ObjectId(), "book_id": "volume"},
+        [("reading_date", -1), ("_id", -1)],
+    ),
+    (
+        "reading stats days",
+        "reading_stats",
+        {"user_id": ObjectId(), "kind": "day"},
+        [("date", 1)],
+    ),
+    ("refresh token family", "refresh_tokens", {"family_id": "family"}, None),
+]
+
+
+def _plan_stages(plan: dict, stages: list, indexes: list) -> None:
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "indexName" in plan:
+        indexes.append(plan["indexName"])
+    for value in plan.values():
+        children = value if isinstance(value, list) else [value]
+        for child in children:
+            if isinstance(child, dict):
+                _plan_stages(child, stages, indexes)
+
+
+async def explain_hot_queries(db=None) -> list[dict]:
+    """Winning plan of every hot query: which index it uses, if any."""
+    db = get_database() if db is None else db
+    report = []
+    for description, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = (await cursor.explain())["queryPlanner"]["winningPlan"]
+        stages, indexes = [], []
+        _plan_stages(plan, stages, indexes)
+        report.append(
+            {
+                "query": description,
+                "collection": collection,
+                "stages": stages,
+                "indexes": indexes,
+                "collection_scan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+            }
+        )
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    commands = {"upgrade": upgrade, "status": status, "explain": explain_hot_queries}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        sys.exit("usage: python -m app.database.migrations upgrade|status|explain")
+    try:
+        result = asyncio.run(commands[sys.argv[1]]())
+    except MigrationConflict as e:
+        sys.exit(f"Migration conflict: {e}")
+    print(json.dumps(result, indent=2, default=str))
+    if sys.argv[1] == "explain" and any(
+        q["collection_scan"] or q["in_memory_sort"] for q in result
+    ):
+        sys.exit(1)
@@ -18,6 +18,14 @@ class BookAdd(BaseModel):
     pageCount: Optional[int] = Field(0, description="Total pages")
 
 
+# Catalog fields embedded in each user_books document (kept in sync on change)
+class BookSummary(BaseModel):
+    title: str = Field(..., description="Book title")
+    authors: List[str] = Field(default_factory=list, description="Book authors")
+    thumbnail: Optional[str] = Field(None, description="Book cover URL")
+    page_count: int = Field(0, description="Total pages")
+
+
 # Model for book in user's library
 class UserBook(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")  # Changed from PyObjectId
@@ -33,6 +41,9 @@ class UserBook(BaseModel):
     last_read_date: Optional[datetime] = Field(
         None, description="Last reading date (set when first log is created)"
     )
+    book: Optional[BookSummary] = Field(
+        None, description="Denormalized catalog summary for list views"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
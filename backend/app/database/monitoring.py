@@ -0,0 +1,97 @@
+import threading
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RequestDbStats:
+    """Mongo commands issued on behalf of one HTTP request."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.commands = 0
+        self.failed = 0
+        self.seconds = 0.0
+        # Motor runs commands on executor threads (with a copy of the request context)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.commands += 1
+            self.failed += failed
+            self.seconds += seconds
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.commands} commands"'
+
+
+_request_stats: ContextVar[RequestDbStats | None] = ContextVar(
+    "mongo_request_stats", default=None
+)
+
+
+def start_request(label: str):
+    """Attribute commands issued from this context to a new RequestDbStats.
+
+    Returns (stats, token); pass the token to `end_request`.
+    """
+    stats = RequestDbStats(label)
+    return stats, _request_stats.set(stats)
+
+
+def end_request(token) -> None:
+    _request_stats.reset(token)
+
+
+def current_stats() -> RequestDbStats | None:
+    return _request_stats.get()
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """Counts and times every command against the current request's stats.
+
+    Commands slower than `slow_ms` (0 disables) are logged with their
+    collection and the request that issued them.
+    """
+
+    def __init__(self, slow_ms: float = 0):
+        self.slow_ms = slow_ms
+        self._targets: dict[tuple, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self.slow_ms:
+            target = event.command.get(event.command_name)
+            self._targets[(event.connection_id, event.request_id)] = (
+                target if isinstance(target, str) else ""
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool) -> None:
+        seconds = event.duration_micros / 1_000_000
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.add(seconds, failed)
+        if not self.slow_ms:
+            return
+        collection = self._targets.pop((event.connection_id, event.request_id), "")
+        if seconds * 1000 >= self.slow_ms:
+            fields = {
+                "db_command": event.command_name,
+                "db_collection": f"{event.database_name}.{collection}",
+                "db_ms": round(seconds * 1000, 1),
+                "db_failed": failed,
+                "request": stats.label if stats else None,
+            }
+            logger.warning(
+                "Slow Mongo command " + " ".join(f"{k}={v}" for k, v in fields.items()),
+                extra=fields,
+            )
@@ -1,3 +1,6 @@
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
@@ -5,11 +8,30 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .routers import auth_routes, user_routes, books_routes
 from .logger import configure_logging, get_logger
+from .services.http_client import start_http_client, close_http_client
+from .services.prefetch import prefetcher
+from .services.hashing import HashingBusy, hashing_pool
+from .database.migrations import ensure_schema
+from .database.monitoring import end_request, start_request
+from .settings import settings
 
 configure_logging()
 logger = get_logger(__name__)
 
-app = FastAPI(title="Reading Tracker API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    await ensure_schema()
+    try:
+        yield
+    finally:
+        prefetcher.cancel_all()
+        hashing_pool.shutdown()
+        await close_http_client()
+
+
+app = FastAPI(title="Reading Tracker API", lifespan=lifespan)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -20,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
 
@@ -34,6 +57,33 @@ async def ensure_cors_origin(request, call_next):
     return response
 
 
+# Database round-trips per request: Server-Timing header and one log line
+@app.middleware("http")
+async def db_command_metrics(request: Request, call_next):
+    if not settings.MONGO_COMMAND_METRICS_ENABLED:
+        return await call_next(request)
+    stats, token = start_request(f"{request.method} {request.url.path}")
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        end_request(token)
+    # Streamed bodies (exports) query after this point and are not included
+    total_ms = (time.perf_counter() - started) * 1000
+    response.headers.append("Server-Timing", stats.server_timing())
+    response.headers.append("Server-Timing", f"app;dur={total_ms:.1f}")
+    fields = {
+        "request": stats.label,
+        "status": response.status_code,
+        "db_commands": stats.commands,
+        "db_failed": stats.failed,
+        "db_ms": round(stats.seconds * 1000, 1),
+        "total_ms": round(total_ms, 1),
+    }
+    logger.info(" ".join(f"{k}={v}" for k, v in fields.items()), extra=fields)
+    return response
+
+
 @app.get("/")
 def root():
     return {"msg": "Tracker API"}
@@ -44,6 +94,15 @@ app.include_router(user_routes.router)
 app.include_router(books_routes.router)
 
 
+@app.exception_handler(HashingBusy)
+async def hashing_busy_handler(request: Request, exc: HashingBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in attempts in progress, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global exception caught: {exc}", exc_info=True)
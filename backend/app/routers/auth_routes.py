@@ -5,40 +5,68 @@ from bson import ObjectId
 
 from ..services.auth_service import (
     create_access_token,
-    create_refresh_token,
-    verify_password,
-    get_password_hash,
     decode_token,
 )
+from ..services.hashing import HashingPool, get_hashing_pool
 
-from ..database.connection import get_users_collection, get_current_user
+from ..services import refresh_tokens
+from ..services.auth_cache import auth_cache
+from ..services.refresh_tokens import RefreshTokenError, RefreshTokenReused
+from ..database.connection import (
+    get_users_collection,
+    get_refresh_tokens_collection,
+    get_current_user,
+)
+from ..logger import get_logger
 from ..settings import settings
 
+logger = get_logger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def token_claims(user: dict) -> dict:
+    # `tv` lets get_current_user reject tokens issued before the last logout-all
+    return {
+        "sub": str(user["_id"]),
+        "username": user["username"],
+        "tv": user.get("token_version", 0),
+    }
+
+
+def set_refresh_cookie(response: JSONResponse, token: str) -> None:
+    # set refresh token in HttpOnly cookie
+    response.set_cookie(
+        "refresh_token",
+        token,
+        httponly=True,
+        secure=settings.COOKIE_SECURE,
+        samesite="lax",
+        max_age=60 * 60 * 24 * settings.REFRESH_TOKEN_EXPIRE_DAYS,
+        path="/",
+    )
+
+
 @router.post("/login")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     users_col=Depends(get_users_collection),
+    tokens_col=Depends(get_refresh_tokens_collection),
+    hashing: HashingPool = Depends(get_hashing_pool),
 ):
     user = await users_col.find_one({"username": form_data.username})
-    if not user or not verify_password(form_data.password, user.get("password", "")):
+    if not user or not await hashing.verify(
+        form_data.password, user.get("password", "")
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access = create_access_token(
-        {"sub": str(user["_id"]), "username": user["username"]}
-    )
-    refresh = create_refresh_token(
-        {"sub": str(user["_id"]), "username": user["username"]}
-    )
-    await users_col.update_one(
-        {"_id": user["_id"]}, {"$set": {"refresh_token": get_password_hash(refresh)}}
-    )
-    # set refresh token in HttpOnly cookie
+    claims = token_claims(user)
+    access = create_access_token(claims)
+    # Every login starts a new session (token family)
+    refresh = await refresh_tokens.issue(tokens_col, claims)
     response = JSONResponse(
         content={
             "access_token": access,
@@ -46,20 +74,17 @@ async def login(
             "user": {"id": str(user["_id"]), "username": user["username"]},
         }
     )
-    response.set_cookie(
-        "refresh_token",
-        refresh,
-        httponly=True,
-        secure=settings.COOKIE_SECURE,
-        samesite="lax",
-        max_age=60 * 60 * 24 * settings.REFRESH_TOKEN_EXPIRE_DAYS,
-        path="/",
-    )
+    set_refresh_cookie(response, refresh)
     return response
 
 
 @router.post("/refresh")
-async def refresh(request: Request, users_col=Depends(get_users_collection)):
+async def refresh(
+    request: Request,
+    users_col=Depends(get_users_collection),
+    tokens_col=Depends(get_refresh_tokens_collection),
+    hashing: HashingPool = Depends(get_hashing_pool),
+):
     token = request.cookies.get("refresh_token")
     if not token:
         raise HTTPException(status_code=400, detail="refresh_token required")
@@ -72,49 +97,83 @@ async def refresh(request: Request, users_col=Depends(get_users_collection)):
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
-    user = await users_col.find_one({"_id": ObjectId(user_id)})
-    if not user or "refresh_token" not in user:
-        raise HTTPException(status_code=401, detail="Refresh token not found")
-    if not verify_password(token, user["refresh_token"]):
-        raise HTTPException(status_code=401, detail="Refresh token mismatch")
-    new_access = create_access_token(
-        {"sub": str(user["_id"]), "username": user["username"]}
-    )
-    new_refresh = create_refresh_token(
-        {"sub": str(user["_id"]), "username": user["username"]}
-    )
-    await users_col.update_one(
-        {"_id": user["_id"]},
-        {"$set": {"refresh_token": get_password_hash(new_refresh)}},
-    )
-    # set new refresh token in cookie
+
+    if "fam" in payload:
+        claims = {
+            "sub": user_id,
+            "username": payload.get("username"),
+            "tv": payload.get("tv", 0),
+        }
+        try:
+            new_refresh = await refresh_tokens.rotate(tokens_col, token, claims)
+        except RefreshTokenReused:
+            logger.warning(f"Refresh token reuse for user {user_id}, session revoked")
+            raise HTTPException(status_code=401, detail="Refresh token reused")
+        except RefreshTokenError:
+            raise HTTPException(status_code=401, detail="Refresh token not found")
+    else:
+        # Token issued before the token store: check it against the bcrypt hash
+        # on the user document once, then move the session into the store
+        user = await users_col.find_one({"_id": ObjectId(user_id)})
+        if not user or "refresh_token" not in user:
+            raise HTTPException(status_code=401, detail="Refresh token not found")
+        if not await hashing.verify(token, user["refresh_token"]):
+            raise HTTPException(status_code=401, detail="Refresh token mismatch")
+        await users_col.update_one(
+            {"_id": user["_id"]}, {"$unset": {"refresh_token": ""}}
+        )
+        claims = token_claims(user)
+        new_refresh = await refresh_tokens.issue(tokens_col, claims)
+
+    new_access = create_access_token(claims)
     response = JSONResponse(
         content={
             "access_token": new_access,
             "token_type": "bearer",
-            "user": {"id": str(user["_id"]), "username": user["username"]},
+            "user": {"id": claims["sub"], "username": claims["username"]},
         }
     )
-    response.set_cookie(
-        "refresh_token",
-        new_refresh,
-        httponly=True,
-        secure=settings.COOKIE_SECURE,
-        samesite="lax",
-        max_age=60 * 60 * 24 * settings.REFRESH_TOKEN_EXPIRE_DAYS,
-        path="/",
-    )
+    set_refresh_cookie(response, new_refresh)
     return response
 
 
 @router.post("/logout")
 async def logout(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    tokens_col=Depends(get_refresh_tokens_collection),
+):
+    # Ends this session only; other devices stay signed in
+    token = request.cookies.get("refresh_token")
+    if token:
+        await refresh_tokens.revoke_token_family(tokens_col, token)
+    response = JSONResponse(content={"msg": "logged out"})
+    response.delete_cookie("refresh_token", path="/")
+    return response
+
+
+@router.post("/logout-all")
+async def logout_all(
     current_user: dict = Depends(get_current_user),
     users_col=Depends(get_users_collection),
+    tokens_col=Depends(get_refresh_tokens_collection),
 ):
+    # Revoke every session and every access token issued so far, then drop
+    # this worker's cached state
+    await refresh_tokens.revoke_user(tokens_col, current_user["id"])
     await users_col.update_one(
-        {"_id": ObjectId(current_user["id"])}, {"$unset": {"refresh_token": ""}}
+        {"_id": ObjectId(current_user["id"])},
+        {"$unset": {"refresh_token": ""}, "$inc": {"token_version": 1}},
     )
-    response = JSONResponse(content={"msg": "logged out"})
+    auth_cache.forget(current_user["id"])
+    response = JSONResponse(content={"msg": "logged out everywhere"})
     response.delete_cookie("refresh_token", path="/")
     return response
+
+
+@router.get("/hashing/stats")
+async def hashing_stats(
+    hashing: HashingPool = Depends(get_hashing_pool),
+    current_user: dict = Depends(get_current_user),
+):
+    return hashing.stats()
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, Body
+from fastapi import APIRouter, HTTPException, Query, Depends, Body, Request, Response
 
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, date, timezone
 import math
 import logging
@@ -12,17 +15,71 @@ logger = get_logger(__name__)
 
 from app.settings import settings
 from ..database.connection import (
+    get_admin_user,
     get_current_user,
     get_books_collection,
     get_user_books_collection,
     get_reading_logs_collection,
+    get_user_versions_collection,
+    get_reading_stats_collection,
 )
 from ..database.models.book_models import Book, ReadingLogCreate
+from ..services.http_client import get_http_client
+from ..services.library_service import (
+    LIBRARY_STATUSES,
+    book_summary,
+    library_summary_pipeline,
+    propagate_book_summary,
+)
+from ..services.pagination import decode_cursor, encode_cursor
+from ..services.reading_log_service import (
+    CHART_FIELDS,
+    ProgressConflict,
+    log_history_query,
+    record_reading,
+)
+from ..services.stats_service import add_sessions, move_session, user_stats
+from ..services.calendar_service import user_calendar
+from ..services.import_service import (
+    IMPORT_FORMATS,
+    ImportFormatError,
+    ImportReport,
+    import_reading_logs,
+)
+from ..services.local_search import (
+    search_local,
+    has_enough_local_results,
+    search_terms_for,
+)
+from ..services.search_cache import SearchCache, get_search_cache, make_search_key
+from ..services.prefetch import Prefetcher, get_prefetcher, prefetcher
+from ..services.rate_scheduler import RateScheduler, get_google_books_scheduler
+from ..services.search_service import (
+    load_search_page,
+    schedule_next_page_prefetch,
+    get_search_flight,
+)
+from ..services.singleflight import SingleFlight
+from ..services.versioning import (
+    bump_user_version,
+    bump_user_versions,
+    check_not_modified,
+    get_user_version,
+)
+from ..services.response_cache import (
+    UserResponseCache,
+    get_response_cache,
+    json_body_response,
+    render_json,
+)
+from ..services.upstream import (
+    ResilientUpstream,
+    UpstreamError,
+    get_google_books_upstream,
+)
 
 router = APIRouter(prefix="/books", tags=["books"])
 
-GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
-
 
 # Search for books using google api
 @router.get("/search")
@@ -30,105 +87,101 @@ async def search_books(
     query: str = Query(..., description="Search query for books"),
     page: int = Query(1, ge=1, description="Page number for results"),
     page_size: int = Query(10, ge=1, le=40, description="Results per page (max 40)"),
+    no_cache: bool = Query(
+        False, description="Skip the cache lookup and refresh the cached page"
+    ),
+    source: str = Query(
+        "auto",
+        pattern="^(auto|local|remote)$",
+        description="auto: local catalog first, Google Books when recall is insufficient "
+        "(decided on page 1; pass the returned `source` when fetching later pages); "
+        "local: catalog only; remote: Google Books only (ask for more results)",
+    ),
     books_col=Depends(get_books_collection),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    cache: SearchCache = Depends(get_search_cache),
     current_user: dict = Depends(get_current_user),
 ):
     """
-    Search for books using Google Books API.
+    Search for books in the local catalog and/or the Google Books API.
     Example: /books/search?q=harry+potter
     """
     logger.info(f"searchQuery: {query}")
+    if settings.SEARCH_LOCAL_ENABLED and source != "remote":
+        try:
+            local = await search_local(books_col, query, page, page_size)
+        except Exception as e:
+            if source == "local":
+                raise HTTPException(
+                    status_code=500, detail=f"Error searching local catalog: {str(e)}"
+                )
+            logging.error(f"Local search failed: {str(e)}", exc_info=True)
+            local = None
+        # Later pages follow the source page 1 resolved to, so auto never mixes them
+        if local is not None and (
+            source == "local" or (page == 1 and has_enough_local_results(local))
+        ):
+            return _search_response(
+                local,
+                query,
+                page,
+                page_size,
+                "local",
+                False,
+                truncated=local["truncated"],
+            )
+
     if not settings.GOOGLE_BOOKS_API_KEY:
         raise HTTPException(
             status_code=500, detail="Google Books API key not configured"
         )
 
-    start_index = (page - 1) * page_size
-    params = {
-        "q": query,
-        "key": settings.GOOGLE_BOOKS_API_KEY,
-        "maxResults": page_size,
-        "startIndex": start_index,
-    }
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(GOOGLE_BOOKS_API_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error fetching from Google Books API: {str(e)}",
-            )
+    cache_key = make_search_key(query, page, page_size)
+    with prefetcher.track_request():
+        result = None if no_cache else await cache.get(cache_key)
+        cached = result is not None
+        stale = False
 
-    # Extract and clean book information
-    books = []
-    for item in data.get("items", []):
-        volume_info = item.get("volumeInfo", {})
-
-        # Get the best available image
-        image_links = volume_info.get("imageLinks", {})
-        thumbnail = (
-            image_links.get("thumbnail", "").replace("http:", "https:")
-            if image_links
-            else None
-        )
-
-        # Extract ISBN from industry identifiers
-        isbn = ""
-        industry_identifiers = volume_info.get("industryIdentifiers", [])
-        for identifier in industry_identifiers:
-            if identifier.get("type") == "ISBN_13":
-                isbn = identifier.get("identifier", "")
-                break
-            elif identifier.get("type") == "ISBN_10" and not isbn:
-                isbn = identifier.get("identifier", "")
-
-        book_data = {
-            "google_id": item.get("id"),
-            "title": volume_info.get("title", "Unknown Title"),
-            "authors": volume_info.get("authors", ["Unknown Author"]),
-            "published_date": volume_info.get("publishedDate", ""),
-            "publisher": volume_info.get("publisher", ""),
-            "description": (
-                volume_info.get("description", "No description available")[:200] + "..."
-                if volume_info.get("description")
-                and len(volume_info.get("description")) > 200
-                else volume_info.get("description", "No description available")
-            ),
-            "thumbnail": thumbnail,
-            "page_count": volume_info.get("pageCount", 0),
-            "categories": volume_info.get("categories", []),
-            "info_link": volume_info.get("infoLink", ""),
-            "isbn": isbn,
-        }
-
-        # Save book to database if not exists
-        existing_book = await books_col.find_one({"google_id": book_data["google_id"]})
-        if not existing_book:
-            # Create a copy for database insertion (MongoDB might modify it)
-            db_book_data = book_data.copy()
-            await books_col.insert_one(db_book_data)
-
-        # Create clean response data without MongoDB ObjectId
-        response_book_data = {
-            "id": book_data["google_id"],
-            "google_id": book_data["google_id"],
-            "title": book_data["title"],
-            "authors": book_data["authors"],
-            "published_date": book_data["published_date"],
-            "publisher": book_data["publisher"],
-            "description": book_data["description"],
-            "thumbnail": book_data["thumbnail"],
-            "page_count": book_data["page_count"],
-            "categories": book_data["categories"],
-            "info_link": book_data["info_link"],
-            "isbn": book_data["isbn"],
-        }
-        books.append(response_book_data)
-
-    total_items = data.get("totalItems", 0) or 0
+        if cached:
+            prefetcher.record_hit(cache_key)
+        else:
+            try:
+                result = await load_search_page(
+                    client, books_col, cache, cache_key, query, page, page_size
+                )
+            except (httpx.HTTPError, UpstreamError) as e:
+                # Degrade to an expired cached page rather than failing
+                result = await cache.get_stale(cache_key)
+                if result is None:
+                    raise HTTPException(
+                        status_code=503 if isinstance(e, UpstreamError) else 500,
+                        detail=f"Error fetching from Google Books API: {str(e)}",
+                    )
+                logger.warning(f"Serving stale search results for {cache_key}: {e}")
+                cached = stale = True
+
+    if not stale and page * page_size < result["totalItems"]:
+        schedule_next_page_prefetch(client, books_col, cache, query, page, page_size)
+
+    return _search_response(
+        result, query, page, page_size, "remote", cached, stale=stale
+    )
+
+
+def _search_response(
+    result: dict,
+    query: str,
+    page: int,
+    page_size: int,
+    source: str,
+    cached: bool,
+    stale: bool = False,
+    truncated: bool = False,
+) -> dict:
+    # Create clean response data without MongoDB ObjectId
+    books = [{"id": book["google_id"], **book} for book in result["books"]]
+
+    total_items = result["totalItems"]
     total_pages = math.ceil(total_items / page_size) if total_items else 0
     has_more = page < total_pages
 
@@ -141,15 +194,58 @@ async def search_books(
         "totalPages": total_pages,
         "hasMore": has_more,
         "nextPage": page + 1 if has_more else None,
+        "source": source,
+        "cached": cached,
+        "stale": stale,
+        "truncated": truncated,
+    }
+
+
+# Search cache, coalescing, prefetch, upstream health and quota statistics
+@router.get("/search/stats")
+async def search_stats(
+    cache: SearchCache = Depends(get_search_cache),
+    flight: SingleFlight = Depends(get_search_flight),
+    prefetch: Prefetcher = Depends(get_prefetcher),
+    upstream: ResilientUpstream = Depends(get_google_books_upstream),
+    scheduler: RateScheduler = Depends(get_google_books_scheduler),
+    current_user: dict = Depends(get_current_user),
+):
+    return {
+        "cache": cache.stats(),
+        "coalescing": flight.stats(),
+        "prefetch": prefetch.stats(),
+        "upstream": upstream.stats(),
+        "rate_limit": scheduler.stats(),
     }
 
 
+# Purge the shared search cache (all entries, or one query); admins only
+@router.post("/search/cache/purge")
+async def purge_search_cache(
+    payload: dict | None = Body(None),
+    cache: SearchCache = Depends(get_search_cache),
+    admin: dict = Depends(get_admin_user),
+):
+    query = (payload or {}).get("query")
+    try:
+        removed = await cache.purge(query)
+    except Exception as e:
+        logging.error(f"Error purging search cache: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Error purging search cache: {str(e)}"
+        )
+    return {"message": "Search cache purged", "removed": removed}
+
+
 # Add book to user's library
 @router.post("/user/library/add")
 async def add_book_to_user(
     book_data: dict = Body(...),
     books_col=Depends(get_books_collection),
     user_books_col=Depends(get_user_books_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     """Add a book to user's library"""
@@ -171,7 +267,14 @@ async def add_book_to_user(
                 "info_link": book_data.get("info_link", ""),
                 "isbn": book_data.get("isbn", ""),
             }
-            await books_col.insert_one(book_doc)
+            book_doc["search_terms"] = search_terms_for(book_doc)
+            # A concurrent add of the same volume may insert it first; keep theirs
+            book = await books_col.find_one_and_update(
+                {"google_id": book_data["id"]},
+                {"$setOnInsert": book_doc},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
 
         # Check if user already has this book
         existing = await user_books_col.find_one(
@@ -189,13 +292,23 @@ async def add_book_to_user(
             "status": "reading",
             "start_date": None,  # Will be set when first log is added
             "last_read_date": None,
+            # Denormalized catalog fields so library reads need no join
+            "book": book_summary(book),
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
         }
 
         logger.info(f"inserting book doc: {book_doc}")
 
-        result = await user_books_col.insert_one(book_doc)
+        try:
+            result = await user_books_col.insert_one(book_doc)
+        except DuplicateKeyError:
+            # Lost a race with a concurrent add of the same book
+            raise HTTPException(
+                status_code=409, detail="Book already in user's library"
+            )
+        await bump_user_version(versions_col, current_user["id"])
+        await cache.invalidate(current_user["id"], "library")
         return {"message": "Book added to library", "book_id": str(result.inserted_id)}
     except HTTPException:
         raise
@@ -209,6 +322,8 @@ async def add_book_to_user(
 async def remove_book_from_user(
     payload: dict = Body(...),
     user_books_col=Depends(get_user_books_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     try:
@@ -235,55 +350,96 @@ async def remove_book_from_user(
                 "book_id": book_id,
             }
         )
+        await bump_user_version(versions_col, current_user["id"])
+        await cache.invalidate(current_user["id"], "library")
         logger.info("Book Removed from Library")
         return {"message": "Book removed from library"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error removing book: {str(e)}")
 
 
+# Per-user response cache metrics
+@router.get("/user/cache/stats")
+async def user_cache_stats(
+    cache: UserResponseCache = Depends(get_response_cache),
+    current_user: dict = Depends(get_current_user),
+):
+    return cache.stats()
+
+
 # Get user's book library
 @router.get("/user/library")
 async def get_user_library_summary(
-    books_col=Depends(get_books_collection),
+    request: Request,
+    response: Response,
+    limit: int | None = Query(
+        None, ge=1, le=200, description="Page size (omit for the whole library)"
+    ),
+    cursor: str | None = Query(None, description="nextCursor of the previous page"),
+    status: str | None = Query(
+        None, pattern=f"^({'|'.join(LIBRARY_STATUSES)})$", description="Reading status"
+    ),
+    title_prefix: str | None = Query(None, description="Case-insensitive title prefix"),
+    min_progress: float | None = Query(None, ge=0, le=100),
+    max_progress: float | None = Query(None, ge=0, le=100),
     user_books_col=Depends(get_user_books_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
-    """Get user's book library summary (optimized for list view)"""
+    """Get user's book library summary (optimized for list view)
+
+    Ordered by last_read_date (most recent first). Pass `limit` to paginate and
+    the returned `nextCursor` to fetch the following page.
+    """
+    after = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after = (position["d"], ObjectId(position["i"]))
+        except (ValueError, KeyError, InvalidId):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
     try:
-        # Get user's books with basic info only
-        user_books = await user_books_col.find(
-            {"user_id": ObjectId(current_user["id"])}
-        ).to_list(None)
+        params = {
+            "limit": limit,
+            "cursor": cursor,
+            "status": status,
+            "title_prefix": title_prefix,
+            "min_progress": min_progress,
+            "max_progress": max_progress,
+        }
+        version = await get_user_version(versions_col, current_user["id"])
+        not_modified = check_not_modified(
+            request, response, version, current_user["id"], "library", **params
+        )
+        if not_modified:
+            return not_modified
+        cached = await cache.get(current_user["id"], "library", version, params)
+        if cached is not None:
+            return json_body_response(cached, response)
+
+        # Single indexed query over user_books (book summary is embedded)
+        pipeline = library_summary_pipeline(
+            ObjectId(current_user["id"]),
+            status=status,
+            title_prefix=title_prefix,
+            min_progress=min_progress,
+            max_progress=max_progress,
+            after=after,
+            limit=limit + 1 if limit else None,
+        )
+        books = await user_books_col.aggregate(pipeline).to_list(None)
 
-        # Get book details for each user book (only essential fields)
-        books = []
-        for user_book in user_books:
-            book = await books_col.find_one(
-                {"google_id": user_book["book_id"]},
-                {"title": 1, "authors": 1, "thumbnail": 1, "page_count": 1},
-            )
-            if book:
-                # Calculate progress percentage
-                total_pages = book.get("page_count", 0) or 0
-                current_page = user_book.get("current_page", 0) or 0
-                progress_percentage = (
-                    (current_page / total_pages * 100) if total_pages > 0 else 0
-                )
+        next_cursor = None
+        if limit and len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor({"d": last["last_read_date"], "i": last["_id"]})
 
-                # Return only essential data for list view
-                combined = {
-                    "_id": str(user_book["_id"]),
-                    "book_id": user_book["book_id"],
-                    "title": book.get("title", "Unknown Title"),
-                    "thumbnail": book.get("thumbnail"),
-                    "total_pages": total_pages,
-                    "current_page": current_page,
-                    "progress_percentage": round(progress_percentage, 1),
-                    "last_read_date": user_book.get("last_read_date"),
-                }
-                books.append(combined)
-
-        return {"books": books}
+        body = render_json({"books": books, "nextCursor": next_cursor})
+        await cache.set(current_user["id"], "library", version, params, body)
+        return json_body_response(body, response)
     except Exception as e:
         logging.error(f"Error fetching library summary: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -294,13 +450,23 @@ async def get_user_library_summary(
 # Get specific book details from user's library
 @router.get("/user/library/book")
 async def get_user_library_book(
+    request: Request,
+    response: Response,
     book_id: str = Query(..., description="Book ID to fetch details for"),
     books_col=Depends(get_books_collection),
     user_books_col=Depends(get_user_books_collection),
+    versions_col=Depends(get_user_versions_collection),
     current_user: dict = Depends(get_current_user),
 ):
     """Get specific book details from user's library"""
     try:
+        version = await get_user_version(versions_col, current_user["id"])
+        not_modified = check_not_modified(
+            request, response, version, current_user["id"], "book", book_id=book_id
+        )
+        if not_modified:
+            return not_modified
+
         # Get user's book
         user_book = await user_books_col.find_one(
             {"user_id": ObjectId(current_user["id"]), "book_id": book_id}
@@ -353,6 +519,9 @@ async def get_user_library_book(
 async def modify_library_book(
     book_data: dict = Body(...),
     books_col=Depends(get_books_collection),
+    user_books_col=Depends(get_user_books_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     logger.info(f"book_data: {book_data}")
@@ -375,6 +544,17 @@ async def modify_library_book(
             {"google_id": book_data["book_google_id"]},
             {"$set": {"page_count": page_count}},
         )
+        # Keep the summaries embedded in user_books in sync
+        await propagate_book_summary(
+            user_books_col, book_data["book_google_id"], {"page_count": page_count}
+        )
+        # The page count shows up in every holder's library and book detail
+        holders = await user_books_col.distinct(
+            "user_id", {"book_id": book_data["book_google_id"]}
+        )
+        await bump_user_versions(versions_col, holders)
+        for holder in holders:
+            await cache.invalidate(holder, "library")
 
         return {
             "message": "Book page count updated successfully",
@@ -393,6 +573,8 @@ async def modify_user_library_mark_complete(
     payload: dict = Body(...),
     user_books_col=Depends(get_user_books_collection),
     books_col=Depends(get_books_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     """Mark a user's book as completed. Payload: { "book_id": "<google_id>" }
@@ -430,6 +612,8 @@ async def modify_user_library_mark_complete(
             {"user_id": ObjectId(current_user["id"]), "book_id": book_id},
             {"$set": update_fields},
         )
+        await bump_user_version(versions_col, current_user["id"])
+        await cache.invalidate(current_user["id"], "library")
 
         # Optionally, return the updated fields
         return {
@@ -452,6 +636,9 @@ async def add_log_reading(
     log_data: ReadingLogCreate,
     user_books_col=Depends(get_user_books_collection),
     reading_logs_col=Depends(get_reading_logs_collection),
+    stats_col=Depends(get_reading_stats_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     """Log reading progress for a book"""
@@ -469,88 +656,45 @@ async def add_log_reading(
 
         user_id = ObjectId(current_user["id"])
         book_id = log_data.book_id
+        reading_datetime = datetime.combine(reading_date, datetime.min.time())
 
-        # Check if user has this book in their library
-        user_book = await user_books_col.find_one(
-            {"user_id": user_id, "book_id": book_id}
-        )
-        if not user_book:
-            raise HTTPException(
-                status_code=404, detail="Book not found in user's library"
+        try:
+            log = await record_reading(
+                user_books_col,
+                reading_logs_col,
+                user_id,
+                book_id,
+                reading_datetime,
+                pages_read=log_data.pages_read,
+                current_page=log_data.current_page,
+                notes=log_data.notes,
             )
-
-        # Validate current_page is not less than existing current_page
-        if log_data.current_page < user_book.get("current_page", 0):
+        except ProgressConflict:
+            # Nothing was written; find out which precondition failed
+            user_book = await user_books_col.find_one(
+                {"user_id": user_id, "book_id": book_id}, {"current_page": 1}
+            )
+            if not user_book:
+                raise HTTPException(
+                    status_code=404, detail="Book not found in user's library"
+                )
             raise HTTPException(
                 status_code=400,
                 detail=f"Current page ({log_data.current_page}) cannot be less than existing progress ({user_book.get('current_page', 0)})",
             )
-
-        reading_datetime = datetime.combine(reading_date, datetime.min.time())
-
-        # Check if log already exists for this date
-        existing_log = await reading_logs_col.find_one(
-            {
-                "user_id": user_id,
-                "book_id": book_id,
-                "reading_date": reading_datetime,
-            }
-        )
-
-        if existing_log:
-            # Update existing log: increment pages_read and update current_page
-            await reading_logs_col.update_one(
-                {"_id": existing_log["_id"]},
-                {
-                    "$inc": {"pages_read": log_data.pages_read},
-                    "$set": {
-                        "current_page": log_data.current_page,
-                        "notes": log_data.notes or existing_log.get("notes", ""),
-                        "updated_at": datetime.now(timezone.utc),
-                    },
-                },
-            )
-            logging.info(
-                f"Updated existing reading log for book {book_id} on {reading_date}"
-            )
-        else:
-            # Create new log entry
-            log_doc = {
-                "user_id": user_id,
-                "book_id": book_id,
-                "reading_date": reading_datetime,
-                "pages_read": log_data.pages_read,
-                "current_page": log_data.current_page,
-                "notes": log_data.notes or "",
-                "created_at": datetime.now(timezone.utc),
-            }
-            await reading_logs_col.insert_one(log_doc)
-            logging.info(
-                f"Created new reading log for book {book_id} on {reading_date}"
-            )
-
-        # Update user's book progress
-        update_data = {
-            "current_page": log_data.current_page,
-            "last_read_date": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
-        }
-
-        # If this is the first log ever for this book, set start_date
-        total_logs = await reading_logs_col.count_documents(
-            {
-                "user_id": user_id,
-                "book_id": book_id,
-            }
-        )
-
-        if total_logs == 0:
-            update_data["start_date"] = reading_datetime
-
-        await user_books_col.update_one(
-            {"user_id": user_id, "book_id": book_id},
-            {"$set": update_data},
+        logging.info(f"Logged reading for book {book_id} on {reading_date}")
+
+        # A freshly inserted log has created_at == updated_at (same upsert)
+        new_session = log["created_at"] == log["updated_at"]
+        await add_sessions(
+            stats_col,
+            user_id,
+            [(book_id, reading_datetime, log_data.pages_read, new_session)],
         )
+        await bump_user_version(versions_col, user_id)
+        await cache.invalidate(user_id, "library")
+        await cache.invalidate(user_id, "logs", book_id=book_id)
+        await cache.invalidate(user_id, "stats")
 
         return {"message": "Reading logged successfully"}
 
@@ -561,12 +705,78 @@ async def add_log_reading(
         raise HTTPException(status_code=500, detail=f"Error logging reading: {str(e)}")
 
 
+# Import reading sessions in bulk (CSV with a header row, or NDJSON)
+@router.post("/user/log/import")
+async def import_log_readings(
+    request: Request,
+    fmt: str | None = Query(
+        None,
+        alias="format",
+        pattern=f"^({'|'.join(IMPORT_FORMATS)})$",
+        description="Body format (default: from Content-Type, else ndjson)",
+    ),
+    user_books_col=Depends(get_user_books_collection),
+    reading_logs_col=Depends(get_reading_logs_collection),
+    stats_col=Depends(get_reading_stats_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
+    current_user: dict = Depends(get_current_user),
+):
+    """Import reading sessions; each row has the fields of POST /user/log/add.
+
+    The body is parsed while it streams in and rows are merged into existing
+    logs exactly like individual adds. Invalid rows are reported by row
+    number and skipped; the rest are imported. If the body turns out to be
+    unreadable part way, rows before that point stay imported and the 400
+    response carries the partial report.
+    """
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    user_id = ObjectId(current_user["id"])
+    report = ImportReport(settings.IMPORT_MAX_ERRORS)
+    try:
+        await import_reading_logs(
+            request.stream(),
+            fmt,
+            user_books_col,
+            reading_logs_col,
+            user_id,
+            reading_stats_col=stats_col,
+            report=report,
+        )
+    except ImportFormatError as e:
+        raise HTTPException(
+            status_code=400, detail={"error": str(e), **report.as_dict()}
+        )
+    except Exception as e:
+        logging.error(f"Error importing reading logs: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Error importing reading logs: {str(e)}"
+        )
+    finally:
+        # Flushed batches are kept even when the import fails afterwards
+        if report.imported:
+            await bump_user_version(versions_col, user_id)
+            await cache.invalidate(user_id, "library")
+            await cache.invalidate(user_id, "stats")
+            for book_id in report.books:
+                await cache.invalidate(user_id, "logs", book_id=book_id)
+
+    logging.info(
+        f"Imported {report.imported}/{report.rows} reading log rows for {user_id}"
+    )
+    return report.as_dict()
+
+
 # Modify reading log
 @router.post("/user/log/modify")
 async def modify_log_reading(
     log_data: dict,
     reading_logs_col=Depends(get_reading_logs_collection),
     user_books_col=Depends(get_user_books_collection),
+    stats_col=Depends(get_reading_stats_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     """Modify an existing reading log"""
@@ -627,9 +837,28 @@ async def modify_log_reading(
                 },
             )
 
+        await move_session(
+            stats_col,
+            reading_logs_col,
+            user_id,
+            book_id,
+            old=(existing_log["reading_date"], existing_log["pages_read"]),
+            new=(
+                datetime.combine(new_date, datetime.min.time()),
+                int(log_data["pages_read"]),
+            ),
+        )
+        await bump_user_version(versions_col, user_id)
+        await cache.invalidate(user_id, "library")
+        await cache.invalidate(user_id, "logs", book_id=book_id)
+        await cache.invalidate(user_id, "stats")
         logging.info(f"Modified reading log for book {book_id}")
         return {"message": "Reading log modified successfully"}
 
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=409, detail="A reading log already exists for that date"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -645,6 +874,9 @@ async def remove_log_reading(
     log_data: dict = Body(...),
     reading_logs_col=Depends(get_reading_logs_collection),
     user_books_col=Depends(get_user_books_collection),
+    stats_col=Depends(get_reading_stats_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
     logger.info(f"log_data: {log_data}")
@@ -653,7 +885,9 @@ async def remove_log_reading(
         log_id = ObjectId(log_data["log_id"])
 
         # Get the log before deleting it to know how many pages were read
-        log_to_delete = await reading_logs_col.find_one({"_id": log_id})
+        # Scoped to the caller: another user's log is "not found"
+        owned = {"_id": log_id, "user_id": user_id}
+        log_to_delete = await reading_logs_col.find_one(owned)
         if not log_to_delete:
             raise HTTPException(status_code=404, detail="Reading log not found")
 
@@ -662,7 +896,7 @@ async def remove_log_reading(
         log_date = log_to_delete["reading_date"]
 
         # Delete the log
-        await reading_logs_col.delete_one({"_id": log_id})
+        await reading_logs_col.delete_one(owned)
 
         # Update user's book progress
         # Get the most recent log for this book after deletion
@@ -685,6 +919,18 @@ async def remove_log_reading(
         await user_books_col.update_one(
             {"user_id": user_id, "book_id": book_id}, {"$set": update_data}
         )
+        await move_session(
+            stats_col,
+            reading_logs_col,
+            user_id,
+            book_id,
+            old=(log_date, pages_read_in_log),
+            new=None,
+        )
+        await bump_user_version(versions_col, user_id)
+        await cache.invalidate(user_id, "library")
+        await cache.invalidate(user_id, "logs", book_id=book_id)
+        await cache.invalidate(user_id, "stats")
 
         logging.info(
             f"Removed reading log for book {book_id} and updated book progress"
@@ -702,32 +948,170 @@ async def remove_log_reading(
 
 @router.get("/user/logs")
 async def get_library_log(
+    request: Request,
+    response: Response,
     book_id: str = Query(..., description="Book id to fetch logs for"),
+    date_from: date | None = Query(
+        None, alias="from", description="First reading date (inclusive)"
+    ),
+    date_to: date | None = Query(
+        None, alias="to", description="Last reading date (inclusive)"
+    ),
+    limit: int | None = Query(
+        None, ge=1, le=500, description="Page size (omit for every matching log)"
+    ),
+    cursor: str | None = Query(None, description="nextCursor of the previous page"),
+    fields: str | None = Query(
+        None, pattern="^chart$", description="`chart`: only reading_date and pages_read"
+    ),
     reading_logs_col=Depends(get_reading_logs_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
     current_user: dict = Depends(get_current_user),
 ):
-    """Get reading logs for a specific book"""
+    """Get reading logs for a specific book
+
+    Newest first. Pass `limit` to paginate and the returned `nextCursor` to
+    fetch the following page.
+    """
+    after = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after = (position["d"], ObjectId(position["i"]))
+        except (ValueError, KeyError, InvalidId):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
     try:
-        logs = (
-            await reading_logs_col.find(
-                {
-                    "user_id": ObjectId(current_user["id"]),
-                    "book_id": book_id,
-                }
-            )
-            .sort("reading_date", -1)
-            .to_list(None)
+        params = {
+            "book_id": book_id,
+            "from": date_from,
+            "to": date_to,
+            "limit": limit,
+            "cursor": cursor,
+            "fields": fields,
+        }
+        version = await get_user_version(versions_col, current_user["id"])
+        not_modified = check_not_modified(
+            request, response, version, current_user["id"], "logs", **params
+        )
+        if not_modified:
+            return not_modified
+        cached = await cache.get(current_user["id"], "logs", version, params)
+        if cached is not None:
+            return json_body_response(cached, response)
+
+        query = log_history_query(
+            ObjectId(current_user["id"]), book_id, date_from, date_to, after
         )
+        projection = CHART_FIELDS if fields == "chart" else None
+        logs = reading_logs_col.find(query, projection).sort(
+            [("reading_date", -1), ("_id", -1)]
+        )
+        if limit:
+            logs = logs.limit(limit + 1)
+        logs = await logs.to_list(None)
+
+        next_cursor = None
+        if limit and len(logs) > limit:
+            logs = logs[:limit]
+            last = logs[-1]
+            next_cursor = encode_cursor({"d": last["reading_date"], "i": last["_id"]})
+
+        if fields == "chart":
+            logs = [
+                {"reading_date": log["reading_date"], "pages_read": log["pages_read"]}
+                for log in logs
+            ]
+        else:
+            # Convert ObjectId to string
+            for log in logs:
+                log["_id"] = str(log["_id"])
+                log["user_id"] = str(log["user_id"])
+                log["book_id"] = str(log["book_id"])
+
+        body = render_json({"logs": logs, "nextCursor": next_cursor})
+        await cache.set(current_user["id"], "logs", version, params, body)
+        return json_body_response(body, response)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
 
-        if not logs:
-            return {"logs": []}
 
-        # Convert ObjectId to string
-        for log in logs:
-            log["_id"] = str(log["_id"])
-            log["user_id"] = str(log["user_id"])
-            log["book_id"] = str(log["book_id"])
+# Reading statistics from the daily / per-book rollups
+@router.get("/user/stats")
+async def get_reading_stats(
+    request: Request,
+    response: Response,
+    stats_col=Depends(get_reading_stats_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
+    current_user: dict = Depends(get_current_user),
+):
+    """Streaks, pages per day / week / month, session size and per-book pace"""
+    try:
+        # Streaks and "last N days" depend on the date, not only on the data
+        today = date.today()
+        params = {"today": today.isoformat()}
+        version = await get_user_version(versions_col, current_user["id"])
+        not_modified = check_not_modified(
+            request, response, version, current_user["id"], "stats", **params
+        )
+        if not_modified:
+            return not_modified
+        cached = await cache.get(current_user["id"], "stats", version, params)
+        if cached is not None:
+            return json_body_response(cached, response)
 
-        return {"logs": logs}
+        stats = await user_stats(stats_col, ObjectId(current_user["id"]), today)
+
+        body = render_json(stats)
+        await cache.set(current_user["id"], "stats", version, params, body)
+        return json_body_response(body, response)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
+        logging.error(f"Error fetching reading stats: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching reading stats: {str(e)}"
+        )
+
+
+# Year heatmap of pages read, rolling averages and projected finish dates
+@router.get("/user/stats/calendar")
+async def get_reading_calendar(
+    request: Request,
+    response: Response,
+    user_books_col=Depends(get_user_books_collection),
+    reading_logs_col=Depends(get_reading_logs_collection),
+    versions_col=Depends(get_user_versions_collection),
+    cache: UserResponseCache = Depends(get_response_cache),
+    current_user: dict = Depends(get_current_user),
+):
+    """Pages per day for the last 365 days and a finish forecast per unfinished book"""
+    try:
+        today = date.today()
+        params = {"view": "calendar", "today": today.isoformat()}
+        version = await get_user_version(versions_col, current_user["id"])
+        not_modified = check_not_modified(
+            request, response, version, current_user["id"], "stats", **params
+        )
+        if not_modified:
+            return not_modified
+        cached = await cache.get(current_user["id"], "stats", version, params)
+        if cached is not None:
+            return json_body_response(cached, response)
+
+        calendar = await user_calendar(
+            user_books_col,
+            reading_logs_col,
+            ObjectId(current_user["id"]),
+            today,
+            settings.CALENDAR_PACE_WINDOW_DAYS,
+        )
+
+        body = render_json(calendar)
+        await cache.set(current_user["id"], "stats", version, params, body)
+        return json_body_response(body, response)
+    except Exception as e:
+        logging.error(f"Error fetching reading calendar: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching reading calendar: {str(e)}"
+        )
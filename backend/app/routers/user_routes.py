@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from ..database.models.user_models import UserCreate, UserOut
-from ..services.auth_service import get_password_hash
+from ..services.hashing import HashingPool, get_hashing_pool
 
-from ..database.connection import get_user_books_collection, get_current_user
+from ..database.connection import (
+    get_books_collection,
+    get_current_user,
+    get_reading_logs_collection,
+    get_user_books_collection,
+    get_users_collection,
+)
+from ..services.export_service import (
+    EXPORT_FORMATS,
+    csv_lines,
+    export_records,
+    guarded,
+    ndjson_lines,
+)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("", response_model=list[UserOut])
 async def list_users(
-    users_col=Depends(get_user_books_collection), current_user=Depends(get_current_user)
+    users_col=Depends(get_users_collection), current_user=Depends(get_current_user)
 ):
     cursor = users_col.find({}, {"password": 0})
     users = await cursor.to_list(length=1000)
@@ -20,7 +35,11 @@ async def list_users(
 
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, users_col=Depends(get_user_books_collection)):
+async def create_user(
+    user: UserCreate,
+    users_col=Depends(get_users_collection),
+    hashing: HashingPool = Depends(get_hashing_pool),
+):
     # prevent duplicate usernames
     existing = await users_col.find_one({"username": user.username})
     if existing:
@@ -29,7 +48,7 @@ async def create_user(user: UserCreate, users_col=Depends(get_user_books_collect
         )
 
     pwd = user.password.get_secret_value()
-    user_doc = {"username": user.username, "password": get_password_hash(pwd)}
+    user_doc = {"username": user.username, "password": await hashing.hash(pwd)}
     try:
         result = await users_col.insert_one(user_doc)
     except Exception:
@@ -40,3 +59,34 @@ async def create_user(user: UserCreate, users_col=Depends(get_user_books_collect
         )
 
     return {"id": str(result.inserted_id), "username": user.username}
+
+
+# Download the whole account (library with book metadata, then reading logs)
+@router.get("/me/export")
+async def export_account(
+    fmt: str = Query(
+        "ndjson", alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"
+    ),
+    user_books_col=Depends(get_user_books_collection),
+    books_col=Depends(get_books_collection),
+    reading_logs_col=Depends(get_reading_logs_collection),
+    current_user=Depends(get_current_user),
+):
+    """Stream every record as NDJSON or CSV; both carry a `type` of book or log.
+
+    Log rows use the columns of POST /books/user/log/import, so an export can
+    be imported again.
+    """
+    user_id = ObjectId(current_user["id"])
+    records = export_records(user_books_col, books_col, reading_logs_col, user_id)
+    if fmt == "csv":
+        lines, media_type = csv_lines(records), "text/csv"
+    else:
+        lines, media_type = ndjson_lines(records), "application/x-ndjson"
+    return StreamingResponse(
+        guarded(lines, user_id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="reading-tracker-export.{fmt}"'
+        },
+    )
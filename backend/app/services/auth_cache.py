@@ -0,0 +1,107 @@
+import time
+
+from bson import ObjectId
+
+from ..settings import settings
+from .auth_service import decode_token
+from .ttl_cache import TTLCache
+
+
+class AuthCache:
+    """Per-process caches that keep authentication off the database hot path.
+
+    * `decode` memoizes signature verification of recently seen tokens until
+      they expire.
+    * `get_user` keeps user records (without secrets) for `user_ttl` seconds.
+    * `get_token_version` keeps only the revocation state (`token_version`)
+      for `version_ttl` seconds; it is what the stateless mode checks.
+
+    Revocation (logout) bumps the user's `token_version`. The worker handling
+    it calls `forget`; other workers pick it up once their entry expires, so
+    the TTLs bound how long a revoked token can still be used.
+    """
+
+    def __init__(
+        self,
+        user_ttl: float,
+        version_ttl: float,
+        max_users: int,
+        max_tokens: int,
+    ):
+        self.users = TTLCache(max_users, user_ttl)
+        self.versions = TTLCache(max_users, version_ttl)
+        self.tokens = TTLCache(max_tokens, ttl_seconds=0)
+        self.user_hits = 0
+        self.user_misses = 0
+        self.token_hits = 0
+        self.token_misses = 0
+
+    def decode(self, token: str) -> dict:
+        """decode_token with memoization. Raises JWTError like decode_token."""
+        payload = self.tokens.get(token)
+        now = time.time()
+        if payload is not None and payload.get("exp", 0) > now:
+            self.token_hits += 1
+            return payload
+        self.token_misses += 1
+        payload = decode_token(token)
+        if "exp" in payload:
+            self.tokens.set(token, payload, ttl_seconds=payload["exp"] - now)
+        return payload
+
+    async def get_user(self, users_col, user_id: str) -> dict | None:
+        user = self.users.get(user_id)
+        if user is not None:
+            self.user_hits += 1
+            return user
+        self.user_misses += 1
+        user = await users_col.find_one(
+            {"_id": ObjectId(user_id)}, {"password": 0, "refresh_token": 0}
+        )
+        if user:
+            user["id"] = str(user.pop("_id"))
+            self.users.set(user_id, user)
+            self.versions.set(user_id, user.get("token_version", 0))
+        return user
+
+    async def get_token_version(self, users_col, user_id: str) -> int | None:
+        """The user's current token version, or None if the user does not exist."""
+        version = self.versions.get(user_id)
+        if version is not None:
+            self.user_hits += 1
+            return version
+        self.user_misses += 1
+        user = await users_col.find_one(
+            {"_id": ObjectId(user_id)}, {"token_version": 1}
+        )
+        if not user:
+            return None
+        version = user.get("token_version", 0)
+        self.versions.set(user_id, version)
+        return version
+
+    def forget(self, user_id: str) -> None:
+        self.users.pop(user_id)
+        self.versions.pop(user_id)
+
+    def stats(self) -> dict:
+        user_lookups = self.user_hits + self.user_misses
+        token_lookups = self.token_hits + self.token_misses
+        return {
+            "user_hit_ratio": (
+                round(self.user_hits / user_lookups, 4) if user_lookups else 0.0
+            ),
+            "token_hit_ratio": (
+                round(self.token_hits / token_lookups, 4) if token_lookups else 0.0
+            ),
+            "users_cached": len(self.users),
+            "tokens_cached": len(self.tokens),
+        }
+
+
+auth_cache = AuthCache(
+    user_ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    version_ttl=settings.AUTH_REVOCATION_CACHE_TTL_SECONDS,
+    max_users=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    max_tokens=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,111 @@
+import math
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+CALENDAR_DAYS = 365
+ROLLING_WINDOWS = (7, 30)
+
+
+def rolling_mean(daily: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` days; days before the calendar count as zero."""
+    return np.convolve(daily, np.ones(window) / window)[: len(daily)]
+
+
+def reading_calendar(
+    logs: list[dict], library: list[dict], today: date, pace_window: int
+) -> dict:
+    """Year heatmap, rolling averages and projected finish dates.
+
+    `logs` are the sessions of the last CALENDAR_DAYS days (book_id,
+    reading_date, pages_read); `library` the user's books with their
+    current_page and embedded page_count. Sessions are bucketed by day index
+    into one pages array per book, so the work is a few vector operations
+    whatever the number of logs.
+    """
+    start = today - timedelta(days=CALENDAR_DAYS - 1)
+    origin = datetime.combine(start, datetime.min.time())
+    n = len(logs)
+    day_index = np.fromiter(
+        ((log["reading_date"] - origin).days for log in logs), np.int64, count=n
+    )
+    pages = np.fromiter((log["pages_read"] for log in logs), np.float64, count=n)
+    book_ids, book_index = np.unique(
+        np.array([log["book_id"] for log in logs], dtype=object), return_inverse=True
+    )
+    in_range = (day_index >= 0) & (day_index < CALENDAR_DAYS)
+    day_index, pages, book_index = (
+        day_index[in_range],
+        pages[in_range],
+        book_index[in_range],
+    )
+
+    # (book, day) matrix of pages; the daily totals are its column sums
+    per_book = np.bincount(
+        book_index * CALENDAR_DAYS + day_index,
+        weights=pages,
+        minlength=len(book_ids) * CALENDAR_DAYS,
+    ).reshape(len(book_ids), CALENDAR_DAYS)
+    daily = per_book.sum(axis=0)
+
+    # Pages per calendar day over the pace window, per book
+    window = min(pace_window, CALENDAR_DAYS)
+    recent = per_book[:, -window:].sum(axis=1) / window
+    pace = dict(zip(book_ids.tolist(), recent.tolist()))
+
+    return {
+        "start": start.isoformat(),
+        "end": today.isoformat(),
+        "pages": daily.astype(np.int64).tolist(),
+        "total_pages": int(daily.sum()),
+        **{
+            f"rolling_{w}": np.round(rolling_mean(daily, w), 1).tolist()
+            for w in ROLLING_WINDOWS
+        },
+        "books": [
+            _forecast(book, pace.get(book["book_id"], 0.0), today) for book in library
+        ],
+    }
+
+
+def _forecast(user_book: dict, pages_per_day: float, today: date) -> dict:
+    page_count = (user_book.get("book") or {}).get("page_count") or 0
+    current_page = user_book.get("current_page") or 0
+    remaining = max(page_count - current_page, 0)
+    finish = None
+    if remaining and pages_per_day > 0:
+        finish = (
+            today + timedelta(days=math.ceil(remaining / pages_per_day))
+        ).isoformat()
+    return {
+        "book_id": user_book["book_id"],
+        "title": (user_book.get("book") or {}).get("title"),
+        "current_page": current_page,
+        "page_count": page_count,
+        "pages_per_day": round(pages_per_day, 1),
+        "projected_finish": finish,
+    }
+
+
+async def user_calendar(
+    user_books_col, reading_logs_col, user_id, today: date, pace_window: int
+) -> dict:
+    """Load the last year of sessions (narrow projection) and build the calendar."""
+    since = datetime.combine(
+        today - timedelta(days=CALENDAR_DAYS - 1), datetime.min.time()
+    )
+    logs = await reading_logs_col.find(
+        {"user_id": user_id, "reading_date": {"$gte": since}},
+        {"_id": 0, "book_id": 1, "reading_date": 1, "pages_read": 1},
+    ).to_list(None)
+    library = await user_books_col.find(
+        {"user_id": user_id, "status": {"$ne": "completed"}},
+        {
+            "_id": 0,
+            "book_id": 1,
+            "current_page": 1,
+            "book.title": 1,
+            "book.page_count": 1,
+        },
+    ).to_list(None)
+    return reading_calendar(logs, library, today, pace_window)
@@ -0,0 +1,62 @@
+import asyncio
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..logger import get_logger
+from .local_search import search_terms_for
+
+logger = get_logger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# Strong references to in-flight background writes so they are not GC'd mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def upsert_books(books_col, books: list[dict]) -> int:
+    """Insert catalog books that are not stored yet, in one unordered bulk_write.
+
+    Existing documents are left untouched (`$setOnInsert`). Relies on the
+    unique index on `books.google_id`. Returns the number of inserted books.
+    """
+    operations = []
+    seen = set()
+    for book in books:
+        google_id = book.get("google_id")
+        if not google_id or google_id in seen:
+            continue
+        seen.add(google_id)
+        fields = {k: v for k, v in book.items() if k not in ("_id", "google_id")}
+        fields["search_terms"] = search_terms_for(book)
+        operations.append(
+            UpdateOne({"google_id": google_id}, {"$setOnInsert": fields}, upsert=True)
+        )
+    if not operations:
+        return 0
+
+    try:
+        result = await books_col.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Concurrent upserts of the same book race on the unique index; the
+        # loser's write is redundant, anything else is a real failure.
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        return e.details.get("nUpserted", 0)
+    return result.upserted_count
+
+
+def schedule_upsert_books(books_col, books: list[dict]) -> asyncio.Task:
+    """Run `upsert_books` in the background; failures are logged, never raised."""
+
+    async def run():
+        try:
+            await upsert_books(books_col, books)
+        except Exception as e:
+            logger.error(f"Background catalog upsert failed: {e}", exc_info=True)
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
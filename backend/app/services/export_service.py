@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from bson import ObjectId
+
+from ..logger import get_logger
+from ..settings import settings
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+BOOK_FIELDS = (
+    "title",
+    "authors",
+    "published_date",
+    "publisher",
+    "description",
+    "thumbnail",
+    "page_count",
+    "categories",
+    "info_link",
+    "isbn",
+)
+
+# One CSV table for both record types; the log columns match the import
+CSV_COLUMNS = (
+    "type",
+    "book_id",
+    "pages_read",
+    "current_page",
+    "reading_date",
+    "notes",
+    "status",
+    "start_date",
+    "last_read_date",
+    "added_at",
+    *BOOK_FIELDS,
+)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def export_records(
+    user_books_col, books_col, reading_logs_col, user_id, batch_size: int | None = None
+) -> AsyncIterator[dict]:
+    """Yield the user's library entries (with catalog metadata), then their logs.
+
+    Everything is read through cursors in batches of `batch_size`; catalog
+    metadata is fetched with one `$in` query per batch of library entries, so
+    memory use does not grow with the size of the account.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    library = user_books_col.find({"user_id": user_id}).batch_size(batch_size)
+    batch: list[dict] = []
+
+    async def flush():
+        ids = [entry["book_id"] for entry in batch]
+        catalog = {}
+        async for book in books_col.find(
+            {"google_id": {"$in": ids}},
+            {"_id": 0, "google_id": 1, **dict.fromkeys(BOOK_FIELDS, 1)},
+        ):
+            catalog[book.pop("google_id")] = book
+        for entry in batch:
+            book = catalog.get(entry["book_id"]) or entry.get("book") or {}
+            yield {
+                "type": "book",
+                "book_id": entry["book_id"],
+                "status": entry.get("status"),
+                "current_page": entry.get("current_page", 0),
+                "start_date": entry.get("start_date"),
+                "last_read_date": entry.get("last_read_date"),
+                "added_at": entry.get("created_at"),
+                **{field: book.get(field) for field in BOOK_FIELDS},
+            }
+        batch.clear()
+
+    async for entry in library:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            async for record in flush():
+                yield record
+    if batch:
+        async for record in flush():
+            yield record
+
+    logs = (
+        reading_logs_col.find(
+            {"user_id": user_id},
+            {
+                "_id": 0,
+                "book_id": 1,
+                "reading_date": 1,
+                "pages_read": 1,
+                "current_page": 1,
+                "notes": 1,
+            },
+        )
+        .sort([("book_id", 1), ("reading_date", 1)])
+        .batch_size(batch_size)
+    )
+    async for log in logs:
+        yield {"type": "log", **log}
+
+
+async def ndjson_lines(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for record in records:
+        yield json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(map(str, value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def csv_lines(records: AsyncIterator[dict]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    async for record in records:
+        writer.writerow({k: _csv_cell(v) for k, v in record.items()})
+        # Hand out what one row produced instead of accumulating the file
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def guarded(lines: AsyncIterator[str], user_id) -> AsyncIterator[str]:
+    """The status line is already sent once streaming starts: log failures instead."""
+    try:
+        async for line in lines:
+            yield line
+    except Exception as e:
+        logger.error(f"Export for user {user_id} failed mid-stream: {e}", exc_info=True)
+        raise
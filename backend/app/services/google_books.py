@@ -0,0 +1,68 @@
+import httpx
+
+from ..settings import settings
+
+
+async def fetch_volumes(
+    client: httpx.AsyncClient, query: str, page: int, page_size: int
+) -> dict:
+    """Fetch one page of the Google Books `volumes` search. Raises httpx.HTTPError."""
+    params = {
+        "q": query,
+        "key": settings.GOOGLE_BOOKS_API_KEY,
+        "maxResults": page_size,
+        "startIndex": (page - 1) * page_size,
+    }
+    response = await client.get(settings.GOOGLE_BOOKS_API_URL, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def parse_volume(item: dict) -> dict:
+    """Convert a Google Books volume into a catalog book document."""
+    volume_info = item.get("volumeInfo", {})
+
+    # Get the best available image
+    image_links = volume_info.get("imageLinks", {})
+    thumbnail = (
+        image_links.get("thumbnail", "").replace("http:", "https:")
+        if image_links
+        else None
+    )
+
+    # Extract ISBN from industry identifiers
+    isbn = ""
+    industry_identifiers = volume_info.get("industryIdentifiers", [])
+    for identifier in industry_identifiers:
+        if identifier.get("type") == "ISBN_13":
+            isbn = identifier.get("identifier", "")
+            break
+        elif identifier.get("type") == "ISBN_10" and not isbn:
+            isbn = identifier.get("identifier", "")
+
+    return {
+        "google_id": item.get("id"),
+        "title": volume_info.get("title", "Unknown Title"),
+        "authors": volume_info.get("authors", ["Unknown Author"]),
+        "published_date": volume_info.get("publishedDate", ""),
+        "publisher": volume_info.get("publisher", ""),
+        "description": (
+            volume_info.get("description", "No description available")[:200] + "..."
+            if volume_info.get("description")
+            and len(volume_info.get("description")) > 200
+            else volume_info.get("description", "No description available")
+        ),
+        "thumbnail": thumbnail,
+        "page_count": volume_info.get("pageCount", 0),
+        "categories": volume_info.get("categories", []),
+        "info_link": volume_info.get("infoLink", ""),
+        "isbn": isbn,
+    }
+
+
+def parse_search_page(data: dict) -> dict:
+    """Reduce a raw `volumes` response to what the search endpoint needs (and caches)."""
+    return {
+        "totalItems": data.get("totalItems", 0) or 0,
+        "books": [parse_volume(item) for item in data.get("items", [])],
+    }
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..settings import settings
+from .auth_service import get_password_hash, verify_password
+
+
+class HashingBusy(Exception):
+    """Too many hashing jobs are already queued; the caller should retry later."""
+
+
+class HashingPool:
+    """Runs bcrypt off the event loop on a small dedicated thread pool.
+
+    bcrypt releases the GIL, so threads give real parallelism while the loop
+    keeps serving other requests. At most `max_workers` hashes run at once;
+    when `max_queue` jobs are already waiting new ones are refused with
+    HashingBusy instead of piling up behind a login storm.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        # Counters are updated from the worker threads too
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="hashing"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HashingBusy("Password hashing queue is full")
+            self.queued += 1
+        submitted = time.perf_counter()
+        # Set (under the lock) once this job's queue slot has been given back
+        dequeued = False
+
+        def job():
+            nonlocal dequeued
+            started = time.perf_counter()
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.queued -= 1
+                self.running += 1
+                self.wait_seconds += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.run_seconds += time.perf_counter() - started
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, job)
+        finally:
+            # A job cancelled before it started (caller gone, or shutdown with
+            # cancel_futures) never ran `job`; release its slot here
+            with self._lock:
+                if not dequeued:
+                    dequeued = True
+                    self.queued -= 1
+
+    async def hash(self, secret: str) -> str:
+        return await self.run(get_password_hash, secret)
+
+    async def verify(self, secret: str, hashed: str) -> bool:
+        return await self.run(verify_password, secret, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        done = self.completed
+        return {
+            "workers": self.max_workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": done,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / done * 1000, 1) if done else 0.0,
+            "avg_run_ms": round(self.run_seconds / done * 1000, 1) if done else 0.0,
+        }
+
+
+hashing_pool = HashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+def get_hashing_pool() -> HashingPool:
+    return hashing_pool
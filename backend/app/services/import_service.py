@@ -0,0 +1,262 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..database.models.book_models import ReadingLogCreate
+from ..logger import get_logger
+from ..settings import settings
+from .reading_log_service import log_upsert, progress_update
+from .stats_service import add_sessions
+
+logger = get_logger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class ImportFormatError(Exception):
+    """The body cannot be parsed at all (as opposed to individual bad rows)."""
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one line."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = b""
+    async for chunk in chunks:
+        # Split on raw bytes (b"\n" never occurs inside a UTF-8 sequence) so
+        # the limit is measured in bytes
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise ImportFormatError(f"Line longer than {max_line_bytes} bytes")
+            yield decoder.decode(line + b"\n")[:-1].rstrip("\r")
+        if len(pending) > max_line_bytes:
+            raise ImportFormatError(f"Line longer than {max_line_bytes} bytes")
+    last = decoder.decode(pending, final=True)
+    if last:
+        yield last.rstrip("\r")
+
+
+async def iter_records(
+    lines: AsyncIterator[str], fmt: str, max_record_bytes: int | None = None
+) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """Yield (row number, record, parse error) for every non-blank row.
+
+    A CSV record spanning several lines (quoted newlines) is limited to
+    `max_record_bytes` (default IMPORT_MAX_LINE_BYTES) so an unbalanced quote
+    cannot swallow the rest of the body.
+    """
+    max_record_bytes = max_record_bytes or settings.IMPORT_MAX_LINE_BYTES
+    if fmt == "ndjson":
+        row = 0
+        async for line in lines:
+            row += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row, None, f"Invalid JSON: {e.msg}"
+                continue
+            if isinstance(record, dict):
+                yield row, record, None
+            else:
+                yield row, None, "Expected a JSON object"
+        return
+
+    header = None
+    row, record_text = 0, ""
+    async for line in lines:
+        # A quoted field may contain newlines: keep reading until quotes balance
+        record_text = f"{record_text}\n{line}" if record_text else line
+        if record_text.count('"') % 2:
+            if len(record_text.encode()) > max_record_bytes:
+                raise ImportFormatError(
+                    f"Row {row + 1} is longer than {max_record_bytes} bytes "
+                    "(unterminated quoted field?)"
+                )
+            continue
+        text, record_text = record_text, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells mean "not given" so optional fields keep their defaults
+        yield row, {k: v for k, v in zip(header, values) if v != ""}, None
+    if header is None:
+        raise ImportFormatError("CSV header row is missing")
+    if record_text:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+def parse_row(record: dict) -> tuple[ReadingLogCreate, datetime]:
+    """Validate like POST /books/user/log/add. Raises ValueError with a message."""
+    try:
+        log = ReadingLogCreate(**record)
+    except ValidationError as e:
+        raise ValueError(
+            "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            )
+        )
+    if not log.reading_date:
+        raise ValueError("reading_date: Field required")
+    try:
+        day = datetime.fromisoformat(log.reading_date).date()
+    except ValueError:
+        raise ValueError("reading_date: use ISO format (YYYY-MM-DD)")
+    return log, datetime.combine(day, datetime.min.time())
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        # book_id -> [first reading date, last reading date, highest page]
+        self.books: dict[str, list] = {}
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def track(self, log: ReadingLogCreate, reading_date: datetime) -> None:
+        book = self.books.get(log.book_id)
+        if book is None:
+            self.books[log.book_id] = [reading_date, reading_date, log.current_page]
+        else:
+            book[0] = min(book[0], reading_date)
+            book[1] = max(book[1], reading_date)
+            book[2] = max(book[2], log.current_page)
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "books_updated": len(self.books),
+        }
+
+
+async def import_reading_logs(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    user_books_col,
+    reading_logs_col,
+    user_id,
+    batch_size: int | None = None,
+    reading_stats_col=None,
+    report: ImportReport | None = None,
+) -> ImportReport:
+    """Stream reading sessions into the user's logs.
+
+    Rows are validated one by one and written in unordered bulk upserts of
+    `batch_size` (same merge rules as a single add: pages add up per day,
+    current_page keeps the highest). Progress in user_books is then updated
+    once per affected book. Rows for books outside the library are rejected;
+    rows whose `type` is not "log" (library rows of an export) are skipped.
+    With `reading_stats_col`, each batch also updates the reading rollups.
+
+    Pass your own `report` to see what was written when the import fails
+    part way: batches already flushed stay, and their books' progress is
+    still updated before the error propagates.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    if report is None:
+        report = ImportReport(settings.IMPORT_MAX_ERRORS)
+    library = set(await user_books_col.distinct("book_id", {"user_id": user_id}))
+    batch: list[tuple[int, ReadingLogCreate, datetime]] = []
+
+    async def flush():
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "book_id": log.book_id, "reading_date": day},
+                log_upsert(log.pages_read, log.current_page, log.notes),
+                upsert=True,
+            )
+            for _, log, day in batch
+        ]
+        failed_indexes = set()
+        try:
+            result = await reading_logs_col.bulk_write(operations, ordered=False)
+            inserted = set(result.upserted_ids)
+        except BulkWriteError as e:
+            inserted = {u["index"] for u in e.details.get("upserted", [])}
+            for err in e.details.get("writeErrors", []):
+                failed_indexes.add(err["index"])
+                report.error(batch[err["index"]][0], err.get("errmsg", "Write failed"))
+        sessions = []
+        for index, (_, log, day) in enumerate(batch):
+            if index not in failed_indexes:
+                report.imported += 1
+                report.track(log, day)
+                sessions.append((log.book_id, day, log.pages_read, index in inserted))
+        if reading_stats_col is not None:
+            await add_sessions(reading_stats_col, user_id, sessions)
+        batch.clear()
+
+    try:
+        lines = iter_lines(chunks, settings.IMPORT_MAX_LINE_BYTES)
+        async for row, record, parse_error in iter_records(lines, fmt):
+            if record is not None and record.get("type", "log") != "log":
+                continue
+            report.rows += 1
+            if parse_error:
+                report.error(row, parse_error)
+                continue
+            try:
+                log, day = parse_row(record)
+            except ValueError as e:
+                report.error(row, str(e))
+                continue
+            if log.book_id not in library:
+                report.error(row, "Book not found in user's library")
+                continue
+            batch.append((row, log, day))
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+    except Exception:
+        # Rows already flushed stay; record their progress without masking
+        # the error that stopped the import
+        try:
+            await update_progress(user_books_col, user_id, report)
+        except Exception as e:
+            logger.error(f"Progress update after failed import: {e}", exc_info=True)
+        raise
+    await update_progress(user_books_col, user_id, report)
+    return report
+
+
+async def update_progress(user_books_col, user_id, report: ImportReport) -> None:
+    """One progress update per book the import wrote logs for."""
+    if report.books:
+        await user_books_col.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "book_id": book_id},
+                    progress_update(first, page, last_read=last),
+                )
+                for book_id, (first, last, page) in report.books.items()
+            ],
+            ordered=False,
+        )
@@ -0,0 +1,192 @@
+import asyncio
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from .pagination import keyset_after
+
+LIBRARY_STATUSES = ("reading", "completed", "abandoned", "paused")
+
+# Catalog fields copied into each user_books document as `book`
+SUMMARY_FIELDS = ("title", "authors", "thumbnail", "page_count")
+
+
+def book_summary(book: dict) -> dict:
+    """Compact copy of a catalog book embedded in user_books for list views."""
+    return {
+        "title": book.get("title", "Unknown Title"),
+        "authors": book.get("authors", []),
+        "thumbnail": book.get("thumbnail"),
+        "page_count": book.get("page_count", 0) or 0,
+    }
+
+
+def library_summary_pipeline(
+    user_id: ObjectId,
+    status: str | None = None,
+    title_prefix: str | None = None,
+    min_progress: float | None = None,
+    max_progress: float | None = None,
+    after: tuple[datetime | None, ObjectId] | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """List a user's library from user_books alone.
+
+    Title, thumbnail and page count come from the `book` summary embedded in
+    each user_books document, so no join with the catalog is needed; the
+    progress percentage is computed server-side. Entries stored before
+    summaries existed (until `repair` has run) fall back to a catalog lookup;
+    the title prefix filter does not see them.
+
+    Results are ordered by (last_read_date desc, _id desc), which the
+    (user_id, last_read_date, _id) index serves; `after` continues from a
+    previous page's last position (keyset pagination).
+    """
+    match = {"user_id": user_id}
+    if status:
+        match["status"] = status
+    if title_prefix:
+        match["book.title"] = {
+            "$regex": f"^{re.escape(title_prefix)}",
+            "$options": "i",
+        }
+    if after is not None:
+        match.update(keyset_after("last_read_date", *after))
+
+    post_match = {}
+    progress = {}
+    if min_progress is not None:
+        progress["$gte"] = min_progress
+    if max_progress is not None:
+        progress["$lte"] = max_progress
+    if progress:
+        post_match["progress_percentage"] = progress
+
+    total_pages = {"$ifNull": ["$book.page_count", 0]}
+    current_page = {"$ifNull": ["$current_page", 0]}
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"last_read_date": -1, "_id": -1}},
+        # Only entries without a summary join the catalog; the others look up
+        # False, which no google_id equals
+        {
+            "$set": {
+                "_summary_missing_for": {
+                    "$cond": [{"$ifNull": ["$book", False]}, False, "$book_id"]
+                }
+            }
+        },
+        {
+            "$lookup": {
+                "from": "books",
+                "localField": "_summary_missing_for",
+                "foreignField": "google_id",
+                "as": "_catalog",
+            }
+        },
+        {"$set": {"book": {"$ifNull": ["$book", {"$arrayElemAt": ["$_catalog", 0]}]}}},
+        {
+            "$project": {
+                "_id": {"$toString": "$_id"},
+                "book_id": 1,
+                "title": {"$ifNull": ["$book.title", "Unknown Title"]},
+                "thumbnail": {"$ifNull": ["$book.thumbnail", None]},
+                "total_pages": total_pages,
+                "current_page": current_page,
+                "progress_percentage": {
+                    "$cond": [
+                        {"$gt": [total_pages, 0]},
+                        {
+                            "$round": [
+                                {
+                                    "$multiply": [
+                                        {"$divide": [current_page, total_pages]},
+                                        100,
+                                    ]
+                                },
+                                1,
+                            ]
+                        },
+                        0,
+                    ]
+                },
+                "last_read_date": {"$ifNull": ["$last_read_date", None]},
+            }
+        },
+    ]
+    if post_match:
+        pipeline.append({"$match": post_match})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    return pipeline
+
+
+async def propagate_book_summary(user_books_col, google_id: str, fields: dict) -> int:
+    """Copy changed catalog fields into every embedded summary of that book."""
+    result = await user_books_col.update_many(
+        {"book_id": google_id},
+        {"$set": {f"book.{k}": v for k, v in fields.items() if k in SUMMARY_FIELDS}},
+    )
+    return result.modified_count
+
+
+async def check_book_summaries(
+    books_col, user_books_col, repair: bool = False, batch_size: int = 500
+) -> dict:
+    """Compare every embedded summary with the catalog; optionally rewrite stale ones.
+
+    Entries whose book is missing from the catalog are reported, never changed.
+    """
+    report = {"checked": 0, "inconsistent": 0, "orphaned": 0, "repaired": 0}
+    catalog: dict[str, dict | None] = {}
+    batch = []
+
+    async def flush():
+        if batch:
+            result = await user_books_col.bulk_write(batch, ordered=False)
+            report["repaired"] += result.modified_count
+            batch.clear()
+
+    cursor = user_books_col.find({}, {"book_id": 1, "book": 1})
+    async for user_book in cursor:
+        report["checked"] += 1
+        google_id = user_book["book_id"]
+        if google_id not in catalog:
+            book = await books_col.find_one(
+                {"google_id": google_id}, {f: 1 for f in SUMMARY_FIELDS}
+            )
+            catalog[google_id] = book_summary(book) if book else None
+        expected = catalog[google_id]
+        if expected is None:
+            report["orphaned"] += 1
+            continue
+        if user_book.get("book") != expected:
+            report["inconsistent"] += 1
+            if repair:
+                batch.append(
+                    UpdateOne({"_id": user_book["_id"]}, {"$set": {"book": expected}})
+                )
+                if len(batch) >= batch_size:
+                    await flush()
+    await flush()
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    from ..database.connection import get_books_collection, get_user_books_collection
+
+    if len(sys.argv) != 2 or sys.argv[1] not in ("check", "repair"):
+        sys.exit("usage: python -m app.services.library_service check|repair")
+    print(
+        asyncio.run(
+            check_book_summaries(
+                get_books_collection(),
+                get_user_books_collection(),
+                repair=sys.argv[1] == "repair",
+            )
+        )
+    )
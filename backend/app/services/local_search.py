@@ -0,0 +1,138 @@
+import asyncio
+import re
+
+from pymongo import UpdateOne
+
+from ..settings import settings
+
+_DIGIT_HYPHEN = re.compile(r"(?<=\d)-(?=\d)")
+_TOKEN = re.compile(r"\w+")
+
+# Catalog fields returned by a local search (same shape as a parsed Google Books page)
+_BOOK_PROJECTION = {
+    "_id": 0,
+    "google_id": 1,
+    "title": 1,
+    "authors": 1,
+    "published_date": 1,
+    "publisher": 1,
+    "description": 1,
+    "thumbnail": 1,
+    "page_count": 1,
+    "categories": 1,
+    "info_link": 1,
+    "isbn": 1,
+    "search_terms": 1,
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; hyphenated ISBNs are kept as one token."""
+    return _TOKEN.findall(_DIGIT_HYPHEN.sub("", text.lower()))
+
+
+def search_terms_for(book: dict) -> list[str]:
+    """Terms indexed for local search: title words, author words and the ISBN."""
+    terms = tokenize(book.get("title") or "")
+    for author in book.get("authors") or []:
+        terms.extend(tokenize(author))
+    terms.extend(tokenize(book.get("isbn") or ""))
+    return list(dict.fromkeys(terms))
+
+
+def _score(book: dict, tokens: list[str], normalized_query: str) -> float:
+    title = (book.get("title") or "").lower()
+    title_terms = set(tokenize(title))
+    other_terms = set(book.get("search_terms") or []) - title_terms
+    score = 0.0
+    for token in tokens:
+        if token in title_terms:
+            score += 3
+        elif any(t.startswith(token) for t in title_terms):
+            score += 2
+        elif token in other_terms:
+            score += 1.5
+        else:
+            score += 1
+    if title.startswith(normalized_query):
+        score += 5
+    return score
+
+
+async def search_local(books_col, query: str, page: int, page_size: int) -> dict:
+    """Search the accumulated books catalog.
+
+    Every query token must prefix-match one of the book's `search_terms`
+    (anchored regexes on the multikey index). At most
+    SEARCH_LOCAL_MAX_CANDIDATES candidates are ranked in process: books
+    containing every token as a whole term are fetched first, prefix-only
+    matches fill the rest. When the cap is reached the result is a truncated
+    best effort (`truncated` is set and `totalItems` is the cap).
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return {"totalItems": 0, "books": [], "truncated": False}
+
+    limit = settings.SEARCH_LOCAL_MAX_CANDIDATES
+    # Whole-term matches rank highest, so they must not be cut by the cap
+    candidates = await books_col.find(
+        {"search_terms": {"$all": tokens}}, _BOOK_PROJECTION
+    ).to_list(limit)
+    if len(candidates) < limit:
+        prefix_filter = {
+            "$and": [{"search_terms": {"$regex": f"^{re.escape(t)}"}} for t in tokens]
+            + [{"google_id": {"$nin": [b["google_id"] for b in candidates]}}]
+        }
+        candidates += await books_col.find(prefix_filter, _BOOK_PROJECTION).to_list(
+            limit - len(candidates)
+        )
+
+    normalized_query = " ".join(tokens)
+    candidates.sort(
+        key=lambda b: (-_score(b, tokens, normalized_query), b.get("title") or "")
+    )
+
+    start = (page - 1) * page_size
+    books = candidates[start : start + page_size]
+    for book in books:
+        book.pop("search_terms", None)
+    return {
+        "totalItems": len(candidates),
+        "books": books,
+        "truncated": len(candidates) >= limit,
+    }
+
+
+def has_enough_local_results(result: dict) -> bool:
+    """Whether a local result can answer an `auto` search without Google Books."""
+    return bool(result["books"]) and (
+        result["totalItems"] >= settings.SEARCH_LOCAL_MIN_RESULTS
+    )
+
+
+async def backfill_search_terms(books_col, batch_size: int = 500) -> int:
+    """Add `search_terms` to catalog books stored before local search existed."""
+    updated = 0
+    batch = []
+    cursor = books_col.find(
+        {"search_terms": {"$exists": False}}, {"title": 1, "authors": 1, "isbn": 1}
+    )
+    async for book in cursor:
+        batch.append(
+            UpdateOne(
+                {"_id": book["_id"]}, {"$set": {"search_terms": search_terms_for(book)}}
+            )
+        )
+        if len(batch) >= batch_size:
+            updated += (await books_col.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await books_col.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    from ..database.connection import get_books_collection
+
+    count = asyncio.run(backfill_search_terms(get_books_collection()))
+    print(f"search_terms added to {count} books")
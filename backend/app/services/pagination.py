@@ -0,0 +1,39 @@
+import base64
+import binascii
+
+from bson import json_util
+
+
+def encode_cursor(position: dict) -> str:
+    """Opaque continuation token for a keyset position (datetimes/ObjectIds allowed)."""
+    raw = json_util.dumps(position).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Inverse of `encode_cursor`. Raises ValueError for malformed tokens."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json_util.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def keyset_after(field: str, value, last_id) -> dict:
+    """Filter for documents after (`value`, `last_id`) in a (`field` desc, `_id` desc) order.
+
+    Null/missing values sort last in descending order, so they follow every
+    dated document.
+    """
+    if value is None:
+        return {field: None, "_id": {"$lt": last_id}}
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "_id": {"$lt": last_id}},
+            {field: None},
+        ]
+    }
@@ -0,0 +1,120 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Awaitable, Callable
+
+from ..logger import get_logger
+from ..settings import settings
+from .ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+
+class Prefetcher:
+    """Speculatively loads the next search page into the search cache.
+
+    At most `max_concurrency` prefetches run at once; extra requests are
+    dropped rather than queued. When more than `max_active_requests` searches
+    are being served, new prefetches are skipped and running ones cancelled so
+    speculative work never competes with real traffic. Hits are counted when a
+    search is answered from a page this process prefetched.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_active_requests: int,
+        ttl_seconds: int,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.max_active_requests = max_active_requests
+        self.active_requests = 0
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Keys filled by a prefetch and not requested yet
+        self._unused = TTLCache(max_entries=10_000, ttl_seconds=ttl_seconds)
+        self.scheduled = 0
+        self.completed = 0
+        self.filled = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.skipped = 0
+        self.hits = 0
+
+    @contextmanager
+    def track_request(self):
+        """Wrap the handling of a search request to feed the load signal."""
+        self.active_requests += 1
+        if self.overloaded():
+            self.cancel_all()
+        try:
+            yield
+        finally:
+            self.active_requests -= 1
+
+    def overloaded(self) -> bool:
+        return self.active_requests > self.max_active_requests
+
+    def schedule(self, key: str, load: Callable[[], Awaitable[bool]]) -> None:
+        """Run `load()` in the background; it returns True when it filled the cache."""
+        if (
+            not self.enabled
+            or key in self._tasks
+            or len(self._tasks) >= self.max_concurrency
+            or self.overloaded()
+        ):
+            self.skipped += 1
+            return
+
+        async def run():
+            try:
+                if await load():
+                    self._unused.set(key, True)
+                    self.filled += 1
+                self.completed += 1
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Search prefetch failed for {key}: {e}")
+
+        self.scheduled += 1
+        task = asyncio.create_task(run())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._tasks.pop(key, None))
+
+    def record_hit(self, key: str) -> None:
+        """Call when a search is served from cache, to measure prefetch usefulness."""
+        if self._unused.pop(key) is not None:
+            self.hits += 1
+
+    def cancel_all(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "filled": self.filled,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+            "in_flight": len(self._tasks),
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.filled, 4) if self.filled else 0.0,
+        }
+
+
+prefetcher = Prefetcher(
+    max_concurrency=settings.SEARCH_PREFETCH_MAX_CONCURRENCY,
+    max_active_requests=settings.SEARCH_PREFETCH_MAX_ACTIVE_SEARCHES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    enabled=settings.SEARCH_PREFETCH_ENABLED,
+)
+
+
+def get_prefetcher() -> Prefetcher:
+    return prefetcher
@@ -0,0 +1,220 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+from pymongo import ReturnDocument
+
+from ..database.connection import get_rate_limits_collection
+from ..logger import get_logger
+from ..settings import settings
+from .upstream import UpstreamError
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimitTimeout(UpstreamError):
+    """No upstream quota became available before the caller's deadline."""
+
+
+class RateSchedulerError(UpstreamError):
+    """The dispatcher failed, so no quota could be granted."""
+
+
+class LocalTokenBucket:
+    """Token bucket private to this process."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    async def try_take(self) -> tuple[bool, float]:
+        """Take one token. Returns (granted, seconds until a token is likely available)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class MongoTokenBucket:
+    """Token bucket shared by every worker, stored in one `rate_limits` document.
+
+    Refill and take happen atomically in a single pipeline update evaluated
+    with the server clock (`$$NOW`), so workers never need synchronised clocks.
+    If Mongo is unreachable the process falls back to its local bucket.
+    """
+
+    def __init__(self, name: str, rate_per_second: float, burst: int):
+        self.name = name
+        self.rate = rate_per_second
+        self.burst = burst
+        self.fallback = LocalTokenBucket(rate_per_second, burst)
+
+    def _pipeline(self) -> list[dict]:
+        elapsed_seconds = {
+            "$divide": [
+                {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]},
+                1000,
+            ]
+        }
+        refilled = {
+            "$min": [
+                self.burst,
+                {
+                    "$add": [
+                        {"$ifNull": ["$tokens", self.burst]},
+                        {"$multiply": [self.rate, elapsed_seconds]},
+                    ]
+                },
+            ]
+        }
+        return [
+            {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+            {"$set": {"granted": {"$gte": ["$tokens", 1]}}},
+            {
+                "$set": {
+                    "tokens": {
+                        "$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]
+                    }
+                }
+            },
+        ]
+
+    async def try_take(self) -> tuple[bool, float]:
+        try:
+            doc = await get_rate_limits_collection().find_one_and_update(
+                {"_id": self.name},
+                self._pipeline(),
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            logger.warning(f"Shared rate limit unavailable, using local bucket: {e}")
+            return await self.fallback.try_take()
+        if doc["granted"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / self.rate
+
+
+class RateScheduler:
+    """Queues outbound calls until the token bucket grants them.
+
+    Waiters are served strictly by priority, then arrival order; each waits at
+    most until its deadline and then gets RateLimitTimeout instead of a quota
+    error from the upstream API.
+    """
+
+    def __init__(self, bucket, deadlines: dict[Priority, float], enabled: bool = True):
+        self.bucket = bucket
+        self.deadlines = deadlines
+        self.enabled = enabled
+        self._queue: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        self.granted = {p.name.lower(): 0 for p in Priority}
+        self.timeouts = {p.name.lower(): 0 for p in Priority}
+        self.wait_seconds = 0.0
+
+    async def acquire(
+        self, priority: Priority = Priority.INTERACTIVE, timeout: float | None = None
+    ) -> None:
+        if not self.enabled:
+            return
+        timeout = self.deadlines[priority] if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._ensure_dispatcher(loop)
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[priority.name.lower()] += 1
+            raise RateLimitTimeout(f"No Google Books quota available within {timeout}s")
+        self.granted[priority.name.lower()] += 1
+        self.wait_seconds += time.monotonic() - started
+
+    def _ensure_dispatcher(self, loop: asyncio.AbstractEventLoop) -> None:
+        if (
+            self._dispatcher is None
+            or self._dispatcher.done()
+            or self._dispatcher.get_loop() is not loop
+        ):
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        try:
+            while self._queue:
+                future = self._queue[0][2]
+                if future.done():
+                    # Timed out or cancelled while queued
+                    heapq.heappop(self._queue)
+                    continue
+                granted, wait = await self.bucket.try_take()
+                if granted:
+                    future = heapq.heappop(self._queue)[2]
+                    if not future.done():
+                        future.set_result(None)
+                else:
+                    await asyncio.sleep(wait)
+        except Exception as e:
+            logger.error(f"Rate scheduler dispatcher failed: {e}", exc_info=True)
+            # Fail the waiters rather than leave them stranded until their
+            # deadline; granting them would be an unmetered burst
+            while self._queue:
+                future = heapq.heappop(self._queue)[2]
+                if not future.done():
+                    future.set_exception(
+                        RateSchedulerError(f"Rate scheduler failed: {e}")
+                    )
+
+    def stats(self) -> dict:
+        granted = sum(self.granted.values())
+        return {
+            "enabled": self.enabled,
+            "shared": isinstance(self.bucket, MongoTokenBucket),
+            "queued": sum(1 for _, _, f in self._queue if not f.done()),
+            "granted": self.granted,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": (
+                round(self.wait_seconds / granted * 1000, 1) if granted else 0.0
+            ),
+        }
+
+
+def _build_google_books_scheduler() -> RateScheduler:
+    rate = settings.GOOGLE_BOOKS_RATE_PER_SECOND
+    burst = settings.GOOGLE_BOOKS_RATE_BURST
+    if settings.GOOGLE_BOOKS_RATE_SHARED:
+        bucket = MongoTokenBucket("google_books", rate, burst)
+    else:
+        bucket = LocalTokenBucket(rate, burst)
+    return RateScheduler(
+        bucket,
+        deadlines={
+            Priority.INTERACTIVE: settings.GOOGLE_BOOKS_RATE_INTERACTIVE_DEADLINE_SECONDS,
+            Priority.BACKGROUND: settings.GOOGLE_BOOKS_RATE_BACKGROUND_DEADLINE_SECONDS,
+        },
+        enabled=rate > 0,
+    )
+
+
+google_books_scheduler = _build_google_books_scheduler()
+
+
+def get_google_books_scheduler() -> RateScheduler:
+    return google_books_scheduler
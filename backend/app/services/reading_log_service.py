@@ -0,0 +1,129 @@
+from datetime import date, datetime, timezone
+
+from pymongo import ReturnDocument
+
+from ..settings import get_client, settings
+from .pagination import keyset_after
+
+# Projection of GET /books/user/logs?fields=chart
+CHART_FIELDS = {"reading_date": 1, "pages_read": 1}
+
+
+class ProgressConflict(Exception):
+    """The book is not in the library, or the new page is behind saved progress."""
+
+
+def progress_update(
+    reading_date: datetime, current_page: int, last_read: datetime | None = None
+) -> list[dict]:
+    """Pipeline update for user_books after a reading session.
+
+    `current_page` only moves forward ($max) and `start_date` is the earliest
+    session date ($min ignores the null set when the book was added).
+    `last_read_date` is now, or the later of the stored value and `last_read`
+    when replaying past sessions.
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "$set": {
+                "current_page": {"$max": ["$current_page", current_page]},
+                "start_date": {"$min": ["$start_date", reading_date]},
+                "last_read_date": (
+                    now
+                    if last_read is None
+                    else {"$max": ["$last_read_date", last_read]}
+                ),
+                "updated_at": now,
+            }
+        }
+    ]
+
+
+def log_upsert(pages_read: int, current_page: int, notes: str | None) -> dict:
+    """Update for the (user, book, date) log: creates it or adds to it."""
+    now = datetime.now(timezone.utc)
+    update = {
+        "$inc": {"pages_read": pages_read},
+        "$max": {"current_page": current_page},
+        "$set": {"updated_at": now},
+        "$setOnInsert": {"created_at": now},
+    }
+    # Keep earlier notes unless new ones were given
+    if notes:
+        update["$set"]["notes"] = notes
+    else:
+        update["$setOnInsert"]["notes"] = ""
+    return update
+
+
+async def record_reading(
+    user_books_col,
+    reading_logs_col,
+    user_id,
+    book_id: str,
+    reading_date: datetime,
+    pages_read: int,
+    current_page: int,
+    notes: str | None = None,
+) -> dict:
+    """Apply a reading session in two round-trips; returns the day's log.
+
+    Raises ProgressConflict (without writing anything) when the book is not
+    in the user's library or `current_page` is behind the saved progress.
+    The log upsert relies on the unique (user_id, book_id, reading_date)
+    index; the server retries an upsert that races another insert.
+    """
+
+    async def apply(session=None):
+        user_book = await user_books_col.find_one_and_update(
+            {
+                "user_id": user_id,
+                "book_id": book_id,
+                "current_page": {"$lte": current_page},
+            },
+            progress_update(reading_date, current_page),
+            projection={"_id": 1},
+            session=session,
+        )
+        if user_book is None:
+            raise ProgressConflict()
+        return await reading_logs_col.find_one_and_update(
+            {"user_id": user_id, "book_id": book_id, "reading_date": reading_date},
+            log_upsert(pages_read, current_page, notes),
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+
+    if not settings.READING_LOG_TRANSACTIONS:
+        return await apply()
+    async with await get_client().start_session() as session:
+        async with session.start_transaction():
+            return await apply(session)
+
+
+def log_history_query(
+    user_id,
+    book_id: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    after: tuple | None = None,
+) -> dict:
+    """Filter for a book's logs, newest first, within an inclusive date range.
+
+    `after` is the (reading_date, _id) of the last log of the previous page;
+    with the (user_id, book_id, reading_date, _id) index the page is a
+    bounded index scan.
+    """
+    query = {"user_id": user_id, "book_id": book_id}
+    date_range = {}
+    if date_from:
+        date_range["$gte"] = datetime.combine(date_from, datetime.min.time())
+    if date_to:
+        date_range["$lte"] = datetime.combine(date_to, datetime.min.time())
+    if date_range:
+        query["reading_date"] = date_range
+    if after:
+        query = {"$and": [query, keyset_after("reading_date", *after)]}
+    return query
@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from ..settings import settings
+from .auth_service import create_refresh_token
+
+
+class RefreshTokenError(Exception):
+    """The refresh token is unknown, expired or revoked."""
+
+
+class RefreshTokenReused(RefreshTokenError):
+    """An already rotated token was presented again; its family has been revoked."""
+
+
+def token_digest(token: str) -> str:
+    """HMAC of the token, used as its `_id` (the token itself is never stored)."""
+    return hmac.new(
+        settings.JWT_SECRET.encode("utf-8"), token.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+async def issue(tokens_col, claims: dict, family_id: str | None = None) -> str:
+    """Create and store a refresh token, in a new family (session) unless given one."""
+    family_id = family_id or uuid.uuid4().hex
+    lifetime = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    token = create_refresh_token(
+        {**claims, "jti": uuid.uuid4().hex, "fam": family_id}, lifetime
+    )
+    now = datetime.now(timezone.utc)
+    await tokens_col.insert_one(
+        {
+            "_id": token_digest(token),
+            "user_id": ObjectId(claims["sub"]),
+            "family_id": family_id,
+            "created_at": now,
+            "expires_at": now + lifetime,
+            "used_at": None,
+            "revoked": False,
+        }
+    )
+    return token
+
+
+async def rotate(tokens_col, token: str, claims: dict) -> str:
+    """Consume `token` and return its successor in the same family.
+
+    The happy path is one indexed find_one_and_update on `_id`. Presenting a
+    token that was already rotated means it leaked (or was replayed): the
+    whole family is revoked and RefreshTokenReused raised. Within
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS of the rotation it is taken for a
+    concurrent refresh instead and gets a successor of its own (successors
+    are not stored, so the first one cannot be handed out again).
+    """
+    digest = token_digest(token)
+    now = datetime.now(timezone.utc)
+    consumed = await tokens_col.find_one_and_update(
+        {
+            "_id": digest,
+            "used_at": None,
+            "revoked": False,
+            "expires_at": {"$gt": now},
+        },
+        {"$set": {"used_at": now}},
+    )
+    if consumed is None:
+        stored = await tokens_col.find_one({"_id": digest})
+        if stored and stored["used_at"] is not None and not stored["revoked"]:
+            used_at = stored["used_at"].replace(tzinfo=timezone.utc)
+            grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+            expires_at = stored["expires_at"].replace(tzinfo=timezone.utc)
+            if now - used_at <= grace and expires_at > now:
+                return await issue(tokens_col, claims, stored["family_id"])
+            await revoke_family(tokens_col, stored["family_id"])
+            raise RefreshTokenReused("Refresh token reuse detected")
+        raise RefreshTokenError("Refresh token not found or revoked")
+    return await issue(tokens_col, claims, consumed["family_id"])
+
+
+async def revoke_family(tokens_col, family_id: str) -> int:
+    result = await tokens_col.update_many(
+        {"family_id": family_id}, {"$set": {"revoked": True}}
+    )
+    return result.modified_count
+
+
+async def revoke_token_family(tokens_col, token: str) -> int:
+    """Revoke the session `token` belongs to (logout). Unknown tokens are ignored."""
+    stored = await tokens_col.find_one({"_id": token_digest(token)}, {"family_id": 1})
+    if not stored:
+        return 0
+    return await revoke_family(tokens_col, stored["family_id"])
+
+
+async def revoke_user(tokens_col, user_id: str) -> int:
+    result = await tokens_col.update_many(
+        {"user_id": ObjectId(user_id), "revoked": False}, {"$set": {"revoked": True}}
+    )
+    return result.modified_count
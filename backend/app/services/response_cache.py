@@ -0,0 +1,199 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..database.connection import get_response_cache_collection
+from ..logger import get_logger
+from ..settings import settings
+
+logger = get_logger(__name__)
+
+
+def render_json(payload) -> bytes:
+    """Serialize a payload exactly as FastAPI would for a plain dict return."""
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def json_body_response(body: bytes, response: Response) -> Response:
+    """Wrap cached JSON bytes, keeping headers (ETag) already set on `response`."""
+    return Response(
+        content=body, media_type="application/json", headers=dict(response.headers)
+    )
+
+
+class UserResponseCache:
+    """Read-through cache of serialized per-user responses (library, logs).
+
+    Keys contain the user's data version (see `versioning`), so an entry can
+    never be served after a write has bumped it, whichever worker wrote.
+    Mutating routes additionally call `invalidate` so superseded entries are
+    released straight away instead of ageing out.
+
+    Tier one is a per-process LRU bounded by the total size of the cached
+    bodies; tier two is the optional shared `response_cache` collection
+    (expired by a TTL index on `expires_at`). Mongo errors count as misses.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: int,
+        mongo_enabled: bool = False,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.mongo_enabled = mongo_enabled
+        # key -> (expires_at on the monotonic clock, user_id, scope, book_id, body)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._by_user: dict[str, set[str]] = {}
+        self.bytes = 0
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(user_id: str, scope: str, version: int, params: dict) -> str:
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{user_id}|{scope}|{version}|{query}"
+
+    async def get(
+        self, user_id: str, scope: str, version: int, params: dict
+    ) -> bytes | None:
+        if not self.enabled:
+            return None
+        key = self.make_key(user_id, scope, version, params)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[4]
+            self._drop(key)
+
+        if self.mongo_enabled:
+            try:
+                doc = await get_response_cache_collection().find_one(
+                    {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+                )
+            except Exception as e:
+                logger.warning(f"response cache read failed: {e}")
+                doc = None
+            if doc:
+                self.mongo_hits += 1
+                self._remember(key, user_id, scope, params.get("book_id"), doc["body"])
+                return doc["body"]
+
+        self.misses += 1
+        return None
+
+    async def set(
+        self, user_id: str, scope: str, version: int, params: dict, body: bytes
+    ) -> None:
+        if not self.enabled:
+            return
+        key = self.make_key(user_id, scope, version, params)
+        book_id = params.get("book_id")
+        self._remember(key, user_id, scope, book_id, body)
+
+        if self.mongo_enabled:
+            try:
+                await get_response_cache_collection().replace_one(
+                    {"_id": key},
+                    {
+                        "user_id": user_id,
+                        "scope": scope,
+                        "book_id": book_id,
+                        "body": body,
+                        "expires_at": datetime.now(timezone.utc)
+                        + timedelta(seconds=self.ttl_seconds),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"response cache write failed: {e}")
+
+    def _remember(
+        self, key: str, user_id: str, scope: str, book_id: str | None, body: bytes
+    ) -> None:
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        expires_at = time.monotonic() + self.ttl_seconds
+        self._entries[key] = (expires_at, user_id, scope, book_id, body)
+        self._by_user.setdefault(user_id, set()).add(key)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, user_id, _, _, body = self._entries.pop(key)
+        self.bytes -= len(body)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    async def invalidate(
+        self, user_id: str, scope: str | None = None, book_id: str | None = None
+    ) -> None:
+        """Drop a user's cached responses, optionally only one scope / one book's."""
+        user_id = str(user_id)
+        for key in list(self._by_user.get(user_id, ())):
+            _, _, entry_scope, entry_book, _ = self._entries[key]
+            if scope is not None and entry_scope != scope:
+                continue
+            if book_id is not None and entry_book != book_id:
+                continue
+            self._drop(key)
+        self.invalidations += 1
+
+        if self.mongo_enabled:
+            query = {"user_id": user_id}
+            if scope is not None:
+                query["scope"] = scope
+            if book_id is not None:
+                query["book_id"] = book_id
+            try:
+                await get_response_cache_collection().delete_many(query)
+            except Exception as e:
+                logger.warning(f"response cache invalidation failed: {e}")
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.mongo_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            "memory_bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = UserResponseCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    mongo_enabled=settings.RESPONSE_CACHE_MONGO_ENABLED,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
+
+
+def get_response_cache() -> UserResponseCache:
+    return response_cache
@@ -0,0 +1,200 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from ..database.connection import get_search_cache_collection
+from ..logger import get_logger
+from ..settings import settings
+from .ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def make_search_key(query: str, page: int, page_size: int) -> str:
+    return f"{normalize_query(query)}|{page}|{page_size}"
+
+
+class SearchCache:
+    """Two-tier cache for Google Books search pages.
+
+    Tier one is a per-process LRU with TTL; tier two is the shared
+    `search_cache` Mongo collection (expired by a TTL index on `expires_at`)
+    so every worker benefits from a result fetched by any other. Errors in the
+    Mongo tier are logged and treated as misses.
+
+    Entries are fresh for `ttl_seconds` and then kept for another
+    `stale_seconds`, during which `get_stale` can still return them when the
+    upstream API is unavailable.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        stale_seconds: int = 0,
+        mongo_enabled: bool = True,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.mongo_enabled = mongo_enabled
+        # Values are (fresh_until, value) with fresh_until on the monotonic clock
+        self.memory = TTLCache(max_entries, ttl_seconds + stale_seconds)
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    async def get(self, key: str) -> dict | None:
+        """Return a fresh cached page, or None."""
+        if not self.enabled:
+            return None
+
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.memory_hits += 1
+            return entry[1]
+
+        if self.mongo_enabled:
+            doc = await self._find(key, "fresh_until")
+            if doc:
+                self.mongo_hits += 1
+                self._remember(key, doc)
+                return doc["value"]
+
+        self.misses += 1
+        return None
+
+    async def get_stale(self, key: str) -> dict | None:
+        """Return a cached page even if it is past its TTL (within the stale window)."""
+        if not self.enabled:
+            return None
+
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.stale_hits += 1
+            return entry[1]
+
+        if self.mongo_enabled:
+            doc = await self._find(key, "expires_at")
+            if doc:
+                self.stale_hits += 1
+                return doc["value"]
+        return None
+
+    async def _find(self, key: str, deadline_field: str) -> dict | None:
+        try:
+            return await get_search_cache_collection().find_one(
+                {"_id": key, deadline_field: {"$gt": datetime.now(timezone.utc)}}
+            )
+        except Exception as e:
+            logger.warning(f"search cache read failed: {e}")
+            return None
+
+    def _remember(self, key: str, doc: dict) -> None:
+        fresh_for = (
+            doc["fresh_until"].replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+        ).total_seconds()
+        self.memory.set(
+            key,
+            (time.monotonic() + fresh_for, doc["value"]),
+            ttl_seconds=fresh_for + self.stale_seconds,
+        )
+
+    async def peek(self, key: str) -> bool:
+        """Whether `key` is cached, without promoting it or counting a lookup."""
+        if not self.enabled:
+            return False
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return True
+        if self.mongo_enabled:
+            try:
+                return (
+                    await get_search_cache_collection().count_documents(
+                        {
+                            "_id": key,
+                            "fresh_until": {"$gt": datetime.now(timezone.utc)},
+                        },
+                        limit=1,
+                    )
+                    > 0
+                )
+            except Exception as e:
+                logger.warning(f"search cache read failed: {e}")
+        return False
+
+    async def set(self, key: str, value: dict) -> None:
+        if not self.enabled:
+            return
+
+        self.memory.set(key, (time.monotonic() + self.ttl_seconds, value))
+        if self.mongo_enabled:
+            query = key.rsplit("|", 2)[0]
+            fresh_until = datetime.now(timezone.utc) + timedelta(
+                seconds=self.ttl_seconds
+            )
+            try:
+                await get_search_cache_collection().replace_one(
+                    {"_id": key},
+                    {
+                        "query": query,
+                        "value": value,
+                        "fresh_until": fresh_until,
+                        "expires_at": fresh_until
+                        + timedelta(seconds=self.stale_seconds),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"search cache write failed: {e}")
+
+    async def purge(self, query: str | None = None) -> int:
+        """Drop every cached page, or only the pages of one query. Returns entries removed."""
+        if query is None:
+            removed = len(self.memory)
+            self.memory.clear()
+            mongo_filter = {}
+        else:
+            normalized = normalize_query(query)
+            keys = [k for k in self.memory.keys() if k.rsplit("|", 2)[0] == normalized]
+            for k in keys:
+                self.memory.pop(k)
+            removed = len(keys)
+            mongo_filter = {"query": normalized}
+
+        if self.mongo_enabled:
+            result = await get_search_cache_collection().delete_many(mongo_filter)
+            removed = max(removed, result.deleted_count)
+        return removed
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.mongo_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+        }
+
+
+search_cache = SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    stale_seconds=settings.SEARCH_CACHE_STALE_SECONDS,
+    mongo_enabled=settings.SEARCH_CACHE_MONGO_ENABLED,
+    enabled=settings.SEARCH_CACHE_ENABLED,
+)
+
+
+def get_search_cache() -> SearchCache:
+    return search_cache
@@ -0,0 +1,88 @@
+import httpx
+
+from ..settings import settings
+from .catalog_service import schedule_upsert_books, upsert_books
+from .google_books import fetch_volumes, parse_search_page
+from .prefetch import prefetcher
+from .rate_scheduler import Priority, google_books_scheduler
+from .search_cache import SearchCache, make_search_key
+from .singleflight import SingleFlight
+from .upstream import google_books_upstream
+
+# Identical concurrent upstream searches share one in-flight fetch
+search_flight = SingleFlight()
+
+
+async def load_search_page(
+    client: httpx.AsyncClient,
+    books_col,
+    cache: SearchCache,
+    cache_key: str,
+    query: str,
+    page: int,
+    page_size: int,
+    priority: Priority = Priority.INTERACTIVE,
+) -> dict:
+    """Fetch a search page from Google Books, persist its books and cache it.
+
+    Concurrent calls with the same `cache_key` are coalesced into one upstream
+    request. The request waits for quota from the outbound rate scheduler and
+    then goes through the circuit breaker / hedging wrapper. Raises
+    httpx.HTTPError or UpstreamError when the upstream call fails.
+    """
+
+    async def load() -> dict:
+        await google_books_scheduler.acquire(priority)
+        data = await google_books_upstream.call(
+            lambda: fetch_volumes(client, query, page, page_size),
+            # A hedged attempt is another upstream request and needs its own token
+            acquire=lambda timeout: google_books_scheduler.acquire(priority, timeout),
+        )
+        result = parse_search_page(data)
+
+        # Save books to database if not exists
+        if settings.SEARCH_CATALOG_WRITE_BACKGROUND:
+            schedule_upsert_books(books_col, result["books"])
+        else:
+            await upsert_books(books_col, result["books"])
+
+        await cache.set(cache_key, result)
+        return result
+
+    return await search_flight.do(cache_key, load)
+
+
+def schedule_next_page_prefetch(
+    client: httpx.AsyncClient,
+    books_col,
+    cache: SearchCache,
+    query: str,
+    page: int,
+    page_size: int,
+) -> None:
+    """Speculatively load page `page + 1` into the search cache in the background."""
+    if google_books_upstream.breaker.is_open():
+        return
+    next_page = page + 1
+    key = make_search_key(query, next_page, page_size)
+
+    async def load() -> bool:
+        if await cache.peek(key):
+            return False
+        await load_search_page(
+            client,
+            books_col,
+            cache,
+            key,
+            query,
+            next_page,
+            page_size,
+            priority=Priority.BACKGROUND,
+        )
+        return True
+
+    prefetcher.schedule(key, load)
+
+
+def get_search_flight() -> SingleFlight:
+    return search_flight
@@ -0,0 +1,269 @@
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from pymongo import UpdateOne
+
+DAY = "day"
+BOOK = "book"
+
+
+def stats_id(user_id, kind: str, key) -> str:
+    if isinstance(key, datetime):
+        key = key.date().isoformat()
+    return f"{user_id}:{kind}:{key}"
+
+
+def session_updates(user_id, sessions: list[tuple]) -> list[UpdateOne]:
+    """Rollup increments for (book_id, reading_date, pages, new_session) tuples.
+
+    Sessions are merged per day and per book first, so a batch costs one
+    update per touched document. Negative pages / sessions undo a session;
+    the book's first/last dates are only widened here (see refresh_book_dates).
+    """
+    days = defaultdict(lambda: [0, 0])
+    books = defaultdict(lambda: [0, 0, None, None])
+    for book_id, reading_date, pages, sessions_delta in sessions:
+        day = days[reading_date]
+        day[0] += pages
+        day[1] += sessions_delta
+        book = books[book_id]
+        book[0] += pages
+        book[1] += sessions_delta
+        if pages > 0:
+            book[2] = min(filter(None, (book[2], reading_date)))
+            book[3] = max(filter(None, (book[3], reading_date)))
+
+    updates = [
+        UpdateOne(
+            {"_id": stats_id(user_id, DAY, reading_date)},
+            {
+                "$inc": {"pages": pages, "sessions": count},
+                "$setOnInsert": {"user_id": user_id, "kind": DAY, "date": reading_date},
+            },
+            upsert=True,
+        )
+        for reading_date, (pages, count) in days.items()
+    ]
+    for book_id, (pages, count, first, last) in books.items():
+        update = {
+            "$inc": {"pages": pages, "sessions": count},
+            "$setOnInsert": {"user_id": user_id, "kind": BOOK, "book_id": book_id},
+        }
+        if first is not None:
+            update["$min"] = {"first_date": first}
+            update["$max"] = {"last_date": last}
+        updates.append(
+            UpdateOne({"_id": stats_id(user_id, BOOK, book_id)}, update, upsert=True)
+        )
+    return updates
+
+
+async def add_sessions(stats_col, user_id, sessions: list[tuple]) -> None:
+    """Count logged reading: (book_id, reading_date, pages, is_new_session) tuples."""
+    if sessions:
+        await stats_col.bulk_write(
+            session_updates(
+                user_id, [(b, d, p, 1 if new else 0) for b, d, p, new in sessions]
+            ),
+            ordered=False,
+        )
+
+
+async def move_session(
+    stats_col,
+    reading_logs_col,
+    user_id,
+    book_id: str,
+    old: tuple[datetime, int],
+    new: tuple[datetime, int] | None,
+) -> None:
+    """A log changed from `old` (date, pages) to `new`, or was removed (None)."""
+    old_date, old_pages = old
+    sessions = [(book_id, old_date, -old_pages, -1)]
+    if new is not None:
+        sessions.append((book_id, new[0], new[1], 1))
+    await stats_col.bulk_write(session_updates(user_id, sessions), ordered=False)
+    await stats_col.delete_many(
+        {
+            "_id": {
+                "$in": [
+                    stats_id(user_id, DAY, old_date),
+                    stats_id(user_id, BOOK, book_id),
+                ]
+            },
+            "sessions": {"$lte": 0},
+        }
+    )
+    await refresh_book_dates(stats_col, reading_logs_col, user_id, book_id)
+
+
+async def refresh_book_dates(stats_col, reading_logs_col, user_id, book_id) -> None:
+    """Re-read a book's first/last session dates (they can shrink on edit/removal)."""
+    query = {"user_id": user_id, "book_id": book_id}
+    first = await reading_logs_col.find_one(
+        query, {"reading_date": 1}, sort=[("reading_date", 1)]
+    )
+    if first is None:
+        return
+    last = await reading_logs_col.find_one(
+        query, {"reading_date": 1}, sort=[("reading_date", -1)]
+    )
+    await stats_col.update_one(
+        {"_id": stats_id(user_id, BOOK, book_id)},
+        {
+            "$set": {
+                "first_date": first["reading_date"],
+                "last_date": last["reading_date"],
+            }
+        },
+    )
+
+
+async def rebuild_stats(
+    stats_col, reading_logs_col, user_id=None, batch_size: int = 500
+) -> dict:
+    """Recompute the rollups from raw logs, for one user or everyone.
+
+    Meant for backfills and repairs; sessions logged while it runs may be
+    counted twice or missed, so run it again if writes were in flight.
+    """
+    match = {"user_id": user_id} if user_id is not None else {}
+    await stats_col.delete_many(match)
+    report = {DAY: 0, BOOK: 0}
+    pipelines = {
+        DAY: {
+            "_id": {"user_id": "$user_id", "key": "$reading_date"},
+            "pages": {"$sum": "$pages_read"},
+            "sessions": {"$sum": 1},
+        },
+        BOOK: {
+            "_id": {"user_id": "$user_id", "key": "$book_id"},
+            "pages": {"$sum": "$pages_read"},
+            "sessions": {"$sum": 1},
+            "first_date": {"$min": "$reading_date"},
+            "last_date": {"$max": "$reading_date"},
+        },
+    }
+    for kind, group in pipelines.items():
+        batch = []
+        cursor = reading_logs_col.aggregate(
+            [{"$match": match}, {"$group": group}], allowDiskUse=True
+        )
+        async for row in cursor:
+            uid, key = row["_id"]["user_id"], row["_id"]["key"]
+            fields = {k: v for k, v in row.items() if k != "_id"}
+            fields.update(
+                {
+                    "user_id": uid,
+                    "kind": kind,
+                    "date" if kind == DAY else "book_id": key,
+                }
+            )
+            batch.append(
+                UpdateOne(
+                    {"_id": stats_id(uid, kind, key)}, {"$set": fields}, upsert=True
+                )
+            )
+            if len(batch) >= batch_size:
+                await stats_col.bulk_write(batch, ordered=False)
+                report[kind] += len(batch)
+                batch = []
+        if batch:
+            await stats_col.bulk_write(batch, ordered=False)
+            report[kind] += len(batch)
+    return {"days": report[DAY], "books": report[BOOK]}
+
+
+def _streaks(days: list[date], today: date) -> tuple[int, int]:
+    current = longest = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    # The current streak is still alive if the last reading was today or yesterday
+    if previous and today - previous <= timedelta(days=1):
+        current = run
+    return current, longest
+
+
+async def user_stats(stats_col, user_id, today: date) -> dict:
+    """Statistics from the rollups: reads one document per reading day and per book."""
+    days = (
+        await stats_col.find(
+            {"user_id": user_id, "kind": DAY, "sessions": {"$gt": 0}},
+            {"date": 1, "pages": 1, "sessions": 1},
+        )
+        .sort("date", 1)
+        .to_list(None)
+    )
+    books = await stats_col.find({"user_id": user_id, "kind": BOOK}).to_list(None)
+
+    total_pages = sum(d["pages"] for d in days)
+    total_sessions = sum(d["sessions"] for d in days)
+    weekly, monthly = defaultdict(int), defaultdict(int)
+    recent = {7: 0, 30: 0}
+    for d in days:
+        day = d["date"].date()
+        year, week, _ = day.isocalendar()
+        weekly[f"{year}-W{week:02d}"] += d["pages"]
+        monthly[day.strftime("%Y-%m")] += d["pages"]
+        for span in recent:
+            if (today - day).days < span:
+                recent[span] += d["pages"]
+    current, longest = _streaks([d["date"].date() for d in days], today)
+
+    return {
+        "total_pages": total_pages,
+        "total_sessions": total_sessions,
+        "active_days": len(days),
+        "pages_today": (
+            days[-1]["pages"] if days and days[-1]["date"].date() == today else 0
+        ),
+        "pages_last_7_days": recent[7],
+        "pages_last_30_days": recent[30],
+        "pages_per_active_day": round(total_pages / len(days), 1) if days else 0.0,
+        "average_session_pages": (
+            round(total_pages / total_sessions, 1) if total_sessions else 0.0
+        ),
+        "streak": {"current": current, "longest": longest},
+        "weekly": [{"week": k, "pages": v} for k, v in weekly.items()],
+        "monthly": [{"month": k, "pages": v} for k, v in monthly.items()],
+        "books": [_book_pace(b) for b in books if b.get("sessions", 0) > 0],
+    }
+
+
+def _book_pace(book: dict) -> dict:
+    span = (book["last_date"] - book["first_date"]).days + 1
+    return {
+        "book_id": book["book_id"],
+        "pages": book["pages"],
+        "sessions": book["sessions"],
+        "first_date": book["first_date"],
+        "last_date": book["last_date"],
+        "pages_per_session": round(book["pages"] / book["sessions"], 1),
+        "pages_per_day": round(book["pages"] / span, 1),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from bson import ObjectId
+
+    from ..database.connection import (
+        get_reading_logs_collection,
+        get_reading_stats_collection,
+    )
+
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "rebuild":
+        sys.exit("usage: python -m app.services.stats_service rebuild [USER_ID]")
+    user = ObjectId(sys.argv[2]) if len(sys.argv) == 3 else None
+    print(
+        asyncio.run(
+            rebuild_stats(
+                get_reading_stats_collection(), get_reading_logs_collection(), user
+            )
+        )
+    )
@@ -0,0 +1,265 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from ..logger import get_logger
+from ..settings import settings
+
+logger = get_logger(__name__)
+
+
+class UpstreamError(Exception):
+    """The upstream API could not be used (circuit open or deadline exceeded)."""
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class UpstreamTimeoutError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_seconds`; then a single trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """A call was abandoned by its caller; it says nothing about upstream health."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Upstream circuit opened")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and (
+            time.monotonic() - self.opened_at < self.reset_seconds
+        )
+
+
+class LatencyTracker:
+    """Sliding window of recent call durations."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Whether an error says something about upstream health (trips the breaker)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, (httpx.HTTPError, UpstreamTimeoutError))
+
+
+class ResilientUpstream:
+    """Wraps upstream calls with a deadline, a circuit breaker and optional hedging.
+
+    Hedging starts a second identical attempt when the first one has not
+    answered within the observed p95 latency; the first successful attempt
+    wins and the other is cancelled. The hedge is an extra upstream request,
+    so it first takes quota through the caller's `acquire` and is skipped
+    when none is granted within another hedge delay.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: float,
+        breaker: CircuitBreaker,
+        hedge_enabled: bool = False,
+        hedge_default_delay: float = 1.0,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.hedge_enabled = hedge_enabled
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+
+    def hedge_delay(self) -> float:
+        if len(self.latency) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, self.latency.percentile(95))
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        acquire: Callable[[float], Awaitable[None]] | None = None,
+    ) -> Any:
+        """Run `fn` (whose quota the caller already holds) under the deadline.
+
+        `acquire(timeout)` takes quota for a hedged attempt.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("Upstream circuit is open")
+
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            if self.hedge_enabled:
+                result = await self._hedged(fn, acquire)
+            else:
+                result = await self._attempt(fn)
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        except Exception as e:
+            if _is_failure(e):
+                self.failures += 1
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.latency.record(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await asyncio.wait_for(fn(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise UpstreamTimeoutError(
+                f"Upstream did not answer within {self.timeout_seconds}s"
+            )
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], acquire=None) -> Any:
+        attempts = [asyncio.create_task(self._attempt(fn))]
+        try:
+            delay = self.hedge_delay()
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and await self._hedge_quota(attempts[0], acquire, delay):
+                self.hedges += 1
+                attempts.append(asyncio.create_task(self._attempt(fn)))
+
+            pending = set(attempts)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not attempts[0]:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def _hedge_quota(self, first: asyncio.Task, acquire, timeout: float) -> bool:
+        """Whether the hedge got quota while `first` was still running."""
+        if acquire is None:
+            return True
+        quota = asyncio.create_task(acquire(timeout))
+        try:
+            await asyncio.wait([first, quota], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not quota.done():
+                quota.cancel()
+        if first.done():
+            return False
+        if quota.exception() is not None:
+            self.hedges_skipped += 1
+            return False
+        return True
+
+    def stats(self) -> dict:
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "hedges_skipped": self.hedges_skipped,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+google_books_upstream = ResilientUpstream(
+    timeout_seconds=settings.UPSTREAM_TIMEOUT_SECONDS,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds=settings.UPSTREAM_BREAKER_RESET_SECONDS,
+    ),
+    hedge_enabled=settings.UPSTREAM_HEDGE_ENABLED,
+    hedge_default_delay=settings.UPSTREAM_HEDGE_DEFAULT_DELAY_SECONDS,
+)
+
+
+def get_google_books_upstream() -> ResilientUpstream:
+    return google_books_upstream
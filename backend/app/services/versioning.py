@@ -0,0 +1,70 @@
+import hashlib
+
+from bson import ObjectId
+from fastapi import Request, Response
+from pymongo import UpdateOne
+
+
+async def get_user_version(versions_col, user_id: str | ObjectId) -> int:
+    doc = await versions_col.find_one({"_id": ObjectId(user_id)})
+    return doc["v"] if doc else 0
+
+
+async def bump_user_version(versions_col, user_id: str | ObjectId) -> None:
+    """Invalidate every ETag issued for this user's library and logs.
+
+    Call after the write has been applied, never before: a read racing the
+    write then carries the old version and is simply revalidated next time.
+    """
+    await versions_col.update_one(
+        {"_id": ObjectId(user_id)}, {"$inc": {"v": 1}}, upsert=True
+    )
+
+
+async def bump_user_versions(versions_col, user_ids: list) -> None:
+    if not user_ids:
+        return
+    await versions_col.bulk_write(
+        [
+            UpdateOne({"_id": ObjectId(uid)}, {"$inc": {"v": 1}}, upsert=True)
+            for uid in user_ids
+        ],
+        ordered=False,
+    )
+
+
+def make_etag(scope: str, user_id: str, version: int, **params) -> str:
+    """Strong ETag for one (endpoint, user, data version, query parameters) response."""
+    parts = [scope, str(user_id), str(version)]
+    parts += [f"{k}={params[k]}" for k in sorted(params)]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    version: int,
+    user_id: str,
+    scope: str,
+    **params,
+) -> Response | None:
+    """Conditional GET for per-user data at `version` (see `get_user_version`).
+
+    Returns a ready 304 when If-None-Match still matches, so the endpoint can
+    skip its payload query; otherwise sets the ETag on `response` and returns
+    None.
+    """
+    etag = make_etag(scope, user_id, version, **params)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -3,6 +3,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi.security import OAuth2PasswordBearer
 
+from .database.monitoring import CommandTimingListener
+
 
 class Settings(BaseSettings):
     # configure env file and encoding using pydantic-settings
@@ -14,13 +16,34 @@ class Settings(BaseSettings):
     MONGO_HOST: str = "mongo:27017"
     MONGO_AUTH_DB: str = "admin"
     MONGO_URL: str | None = None
+    # Count and time Mongo commands per request (Server-Timing header, request log)
+    MONGO_COMMAND_METRICS_ENABLED: bool = True
+    # Log commands slower than this (0 disables)
+    MONGO_SLOW_COMMAND_MS: int = 100
 
     # JWT
     JWT_SECRET: str = Field("change_this_secret", env="JWT_SECRET")
     JWT_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # A rotated refresh token presented again this soon is a concurrent refresh
+    # (two tabs), not reuse: it gets another successor instead of a revocation
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
     # Cookie security for refresh token
     COOKIE_SECURE: bool = False
+    # Trust the verified `sub`/`username` claims instead of loading the user on
+    # every request; only the cached token version is checked for revocation
+    AUTH_TRUST_JWT_CLAIMS: bool = False
+    # How long a worker may use a cached user record / revocation state (0 disables)
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    AUTH_REVOCATION_CACHE_TTL_SECONDS: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    # Verified tokens remembered until they expire
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    # bcrypt runs on this many threads; further logins wait, up to MAX_QUEUE
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # Accounts allowed to use operational endpoints (comma-separated or JSON array)
+    ADMIN_USERNAMES: str | list[str] = ""
 
     # CORS
     # Accept either a comma-separated string or a JSON array in the env var
@@ -28,6 +51,76 @@ class Settings(BaseSettings):
 
     # Google Books API
     GOOGLE_BOOKS_API_KEY: str | None = Field(None, env="GOOGLE_BOOKS_API_KEY")
+    # Point at tools/google_books_stub.py for offline testing and load tests
+    GOOGLE_BOOKS_API_URL: str = "https://www.googleapis.com/books/v1/volumes"
+
+    # Outbound HTTP client (shared connection pool for upstream APIs)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    # Requires the optional `h2` package (pip install "httpx[http2]")
+    HTTP2_ENABLED: bool = False
+
+    # Search result cache (in-process LRU + shared Mongo TTL collection)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_TTL_SECONDS: int = 3600
+    SEARCH_CACHE_MAX_ENTRIES: int = 1000
+    SEARCH_CACHE_MONGO_ENABLED: bool = True
+    # How long past its TTL a page may still be served when Google Books is unavailable
+    SEARCH_CACHE_STALE_SECONDS: int = 86400
+    # Persist search results into the books catalog without blocking the response
+    SEARCH_CATALOG_WRITE_BACKGROUND: bool = False
+
+    # Local catalog search answered before falling through to Google Books
+    SEARCH_LOCAL_ENABLED: bool = True
+    SEARCH_LOCAL_MIN_RESULTS: int = 10
+    SEARCH_LOCAL_MAX_CANDIDATES: int = 200
+
+    # Resilience for Google Books calls
+    UPSTREAM_TIMEOUT_SECONDS: float = 8.0
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD: int = 5
+    UPSTREAM_BREAKER_RESET_SECONDS: float = 30.0
+    # Hedging sends a second request after the observed p95 latency (costs quota)
+    UPSTREAM_HEDGE_ENABLED: bool = False
+    UPSTREAM_HEDGE_DEFAULT_DELAY_SECONDS: float = 1.0
+
+    # Outbound Google Books quota: token bucket shared by all upstream calls
+    # (0 disables). With RATE_SHARED the bucket lives in Mongo for all workers.
+    GOOGLE_BOOKS_RATE_PER_SECOND: float = 10.0
+    GOOGLE_BOOKS_RATE_BURST: int = 20
+    GOOGLE_BOOKS_RATE_SHARED: bool = False
+    GOOGLE_BOOKS_RATE_INTERACTIVE_DEADLINE_SECONDS: float = 5.0
+    GOOGLE_BOOKS_RATE_BACKGROUND_DEADLINE_SECONDS: float = 30.0
+
+    # Speculative prefetch of the next search page into the cache
+    SEARCH_PREFETCH_ENABLED: bool = False
+    SEARCH_PREFETCH_MAX_CONCURRENCY: int = 4
+    # Skip/cancel prefetches while more searches than this are being served
+    SEARCH_PREFETCH_MAX_ACTIVE_SEARCHES: int = 20
+
+    # Write a reading session's progress and log in one transaction
+    # (requires a replica set)
+    READING_LOG_TRANSACTIONS: bool = False
+    # Bulk import of reading sessions (POST /books/user/log/import)
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+    # Row errors listed in the import report (all are counted)
+    IMPORT_MAX_ERRORS: int = 100
+    # Documents fetched per cursor batch by GET /users/me/export
+    EXPORT_BATCH_SIZE: int = 500
+    # Days of recent reading used to project finish dates (GET /books/user/stats/calendar)
+    CALENDAR_PACE_WINDOW_DAYS: int = 30
+
+    # Per-user cache of serialized library / log responses
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    # Budget for the cached bodies held by each worker
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    # Share entries between workers through the `response_cache` collection
+    RESPONSE_CACHE_MONGO_ENABLED: bool = False
 
     # (no Config class needed with pydantic-settings)
 
@@ -35,8 +128,8 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
-# Parse ALLOWED_ORIGINS into a list[str]
-def _parse_allowed_origins(val: str | list[str] | None) -> list[str]:
+# Parse ALLOWED_ORIGINS / ADMIN_USERNAMES into a list[str]
+def _parse_list(val: str | list[str] | None) -> list[str]:
     if val is None:
         return []
     if isinstance(val, list):
@@ -47,7 +140,8 @@ def _parse_allowed_origins(val: str | list[str] | None) -> list[str]:
     return []
 
 
-ALLOWED_ORIGINS = _parse_allowed_origins(settings.ALLOWED_ORIGINS)
+ALLOWED_ORIGINS = _parse_list(settings.ALLOWED_ORIGINS)
+ADMIN_USERNAMES = set(_parse_list(settings.ADMIN_USERNAMES))
 
 # build mongo url
 if settings.MONGO_USER and settings.MONGO_PASS:
@@ -56,7 +150,14 @@ else:
     MONGO_URL = settings.MONGO_URL or f"mongodb://{settings.MONGO_HOST}"
 
 
-_client = AsyncIOMotorClient(MONGO_URL)
+command_listener = CommandTimingListener(slow_ms=settings.MONGO_SLOW_COMMAND_MS)
+
+_client = AsyncIOMotorClient(
+    MONGO_URL,
+    event_listeners=(
+        [command_listener] if settings.MONGO_COMMAND_METRICS_ENABLED else []
+    ),
+)
 
 
 def get_client() -> AsyncIOMotorClient:
@@ -0,0 +1,115 @@
+"""Latency of GET /books/user/library against library size.
+
+Compares the original per-book `find_one` loop (N+1 round-trips) with the
+single query over user_books (embedded book summaries) now used by the
+endpoint. Needs a reachable
+MongoDB (MONGO_URL / MONGO_HOST as for the app); data is written to a
+separate database that is dropped afterwards.
+
+    python -m benchmarks.library_summary --sizes 10 100 500 2000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.services.library_service import book_summary, library_summary_pipeline
+from app.settings import MONGO_URL
+
+
+async def n_plus_one(books_col, user_books_col, user_id):
+    """The pre-aggregation implementation, kept here for comparison."""
+    user_books = await user_books_col.find({"user_id": user_id}).to_list(None)
+    books = []
+    for user_book in user_books:
+        book = await books_col.find_one(
+            {"google_id": user_book["book_id"]},
+            {"title": 1, "authors": 1, "thumbnail": 1, "page_count": 1},
+        )
+        if book:
+            total_pages = book.get("page_count", 0) or 0
+            current_page = user_book.get("current_page", 0) or 0
+            books.append(
+                {
+                    "_id": str(user_book["_id"]),
+                    "book_id": user_book["book_id"],
+                    "title": book.get("title", "Unknown Title"),
+                    "thumbnail": book.get("thumbnail"),
+                    "total_pages": total_pages,
+                    "current_page": current_page,
+                    "progress_percentage": round(
+                        (current_page / total_pages * 100) if total_pages else 0, 1
+                    ),
+                    "last_read_date": user_book.get("last_read_date"),
+                }
+            )
+    return books
+
+
+async def single_query(books_col, user_books_col, user_id):
+    return await user_books_col.aggregate(library_summary_pipeline(user_id)).to_list(
+        None
+    )
+
+
+async def seed(db, user_id, size):
+    await db.books.drop()
+    await db.user_books.drop()
+    await db.books.create_index("google_id", unique=True)
+    await db.user_books.create_index(
+        [("user_id", 1), ("last_read_date", -1), ("_id", -1)]
+    )
+    await db.books.insert_many(
+        [
+            {"google_id": f"bench-{i}", "title": f"Book {i}", "page_count": 300}
+            for i in range(size)
+        ]
+    )
+    await db.user_books.insert_many(
+        [
+            {
+                "user_id": user_id,
+                "book_id": f"bench-{i}",
+                "current_page": i % 300,
+                "book": book_summary({"title": f"Book {i}", "page_count": 300}),
+            }
+            for i in range(size)
+        ]
+    )
+
+
+async def timed(fn, books_col, user_books_col, user_id, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn(books_col, user_books_col, user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(sizes, repeat, db_name):
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[db_name]
+    user_id = ObjectId()
+    print(f"{'books':>8} {'N+1 p50 ms':>12} {'1 query p50 ms':>15} {'speedup':>8}")
+    try:
+        for size in sizes:
+            await seed(db, user_id, size)
+            legacy = await timed(n_plus_one, db.books, db.user_books, user_id, repeat)
+            single = await timed(single_query, db.books, db.user_books, user_id, repeat)
+            print(f"{size:>8} {legacy:>12.1f} {single:>15.1f} {legacy / single:>7.1f}x")
+    finally:
+        await client.drop_database(db_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--db", default="trackerdb_bench")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat, args.db))
@@ -0,0 +1,129 @@
+"""Latency of cheap requests while a burst of logins is being processed.
+
+`loop` mode needs nothing but this checkout: it measures how late a 10 ms
+timer fires on the event loop (which is what every other request on the
+worker waits for) while `--logins` bcrypt verifications run either inline, as
+`login` used to, or on the hashing pool.
+
+    python -m benchmarks.login_storm loop --logins 50
+
+`http` mode drives a running server: it registers a throwaway user, fires the
+logins concurrently and probes `GET /` during and before the storm.
+
+    python -m benchmarks.login_storm http --url http://localhost:8000 --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.services.auth_service import get_password_hash, verify_password
+from app.services.hashing import HashingPool
+
+
+def summarize(samples_ms: list[float]) -> str:
+    ordered = sorted(samples_ms)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return (
+        f"p50 {statistics.median(ordered):7.1f} ms  p95 {p95:7.1f} ms  "
+        f"max {ordered[-1]:7.1f} ms  (n={len(ordered)})"
+    )
+
+
+async def probe_loop(stop: asyncio.Event, interval: float = 0.01) -> list[float]:
+    """Lateness of an `interval` timer, sampled until `stop` is set."""
+    lateness = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lateness.append((time.perf_counter() - started - interval) * 1000)
+    return lateness
+
+
+async def loop_mode(logins: int, workers: int):
+    hashed = get_password_hash("benchmark-password")
+
+    async def storm(login):
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_loop(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        return await probe, elapsed
+
+    async def inline_login():
+        # The previous behaviour: bcrypt directly inside the async handler
+        verify_password("benchmark-password", hashed)
+        await asyncio.sleep(0)
+
+    pool = HashingPool(max_workers=workers, max_queue=logins)
+
+    async def pooled_login():
+        await pool.verify("benchmark-password", hashed)
+
+    try:
+        for name, login in (("inline", inline_login), ("pool", pooled_login)):
+            lateness, elapsed = await storm(login)
+            print(f"{name:>7}: {logins} logins in {elapsed:5.2f}s, timer lateness")
+            print(f"         {summarize(lateness)}")
+        print(f"  stats: {pool.stats()}")
+    finally:
+        pool.shutdown()
+
+
+async def http_mode(url: str, logins: int, probes: int):
+    import httpx
+
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    password = "benchmark-password"
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        response = await client.post(
+            "/users/register", json={"username": username, "password": password}
+        )
+        response.raise_for_status()
+
+        async def probe_requests(count):
+            samples = []
+            for _ in range(count):
+                started = time.perf_counter()
+                await client.get("/")
+                samples.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.01)
+            return samples
+
+        print(f"  idle: GET /  {summarize(await probe_requests(probes))}")
+
+        async def login():
+            return await client.post(
+                "/auth/login", data={"username": username, "password": password}
+            )
+
+        started = time.perf_counter()
+        storm = asyncio.gather(*(login() for _ in range(logins)))
+        during = await probe_requests(probes)
+        results = await storm
+        elapsed = time.perf_counter() - started
+        codes = statistics.multimode(r.status_code for r in results)
+        print(f" storm: GET /  {summarize(during)}")
+        print(f"        {logins} logins in {elapsed:5.2f}s, most common status {codes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="mode", required=True)
+    loop = sub.add_parser("loop", help="in-process event loop lag")
+    loop.add_argument("--logins", type=int, default=50)
+    loop.add_argument("--workers", type=int, default=4)
+    http = sub.add_parser("http", help="against a running server")
+    http.add_argument("--url", default="http://localhost:8000")
+    http.add_argument("--logins", type=int, default=50)
+    http.add_argument("--probes", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.mode == "loop":
+        asyncio.run(loop_mode(args.logins, args.workers))
+    else:
+        asyncio.run(http_mode(args.url, args.logins, args.probes))
@@ -0,0 +1,256 @@
+"""In-memory stand-ins for the Motor collections used by the routes.
+
+They implement just the query and update operators the application uses, so
+route tests can run without a MongoDB server.
+"""
+
+import copy
+import re
+
+from bson import ObjectId
+
+OPERATORS = {
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$in": lambda a, b: a in b,
+    "$ne": lambda a, b: a != b,
+    "$exists": lambda a, b: (a is not None) == b,
+    "$nin": lambda a, b: a not in b,
+    # Array fields match when any element does (multikey semantics)
+    "$all": lambda a, b: isinstance(a, list) and all(x in a for x in b),
+    "$regex": lambda a, b: any(
+        isinstance(x, str) and re.search(b, x)
+        for x in (a if isinstance(a, list) else [a])
+    ),
+}
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for field, expected in query.items():
+        if field == "$and":
+            if not all(matches(doc, q) for q in expected):
+                return False
+            continue
+        if field == "$or":
+            if not any(matches(doc, q) for q in expected):
+                return False
+            continue
+        value = doc.get(field)
+        if (
+            isinstance(expected, dict)
+            and expected
+            and next(iter(expected)) in OPERATORS
+        ):
+            if not all(OPERATORS[op](value, arg) for op, arg in expected.items()):
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def evaluate(doc: dict, expression):
+    """Evaluate the aggregation expressions used in pipeline updates."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1:
+        op, args = next(iter(expression.items()))
+        if op in ("$max", "$min"):
+            values = [evaluate(doc, a) for a in args]
+            values = [v for v in values if v is not None]
+            if not values:
+                return None
+            return max(values) if op == "$max" else min(values)
+    return expression
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction=1):
+        keys = field if isinstance(field, list) else [(field, direction)]
+        for name, order in reversed(keys):
+            self.docs.sort(key=lambda d: d.get(name), reverse=order == -1)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs if length is None else self.docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeResult:
+    def __init__(self, inserted_id=None, count=0, upserted_id=None):
+        self.inserted_id = inserted_id
+        self.upserted_id = upserted_id
+        self.modified_count = self.deleted_count = count
+        self.upserted_ids = {}
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+        self.reads = 0
+        self.calls = 0
+
+    def find(self, query, projection=None):
+        self.reads += 1
+        self.calls += 1
+        found = [copy.deepcopy(d) for d in self.docs if matches(d, query)]
+        if projection and any(projection.values()):
+            keep = {k.split(".")[0] for k, v in projection.items() if v}
+            if projection.get("_id", 1):
+                keep.add("_id")
+            found = [{k: v for k, v in d.items() if k in keep} for d in found]
+        return FakeCursor(found)
+
+    async def find_one(self, query, projection=None, sort=None):
+        self.calls += 1
+        found = [d for d in self.docs if matches(d, query)]
+        if sort:
+            field, direction = sort[0]
+            found.sort(key=lambda d: d.get(field), reverse=direction == -1)
+        return copy.deepcopy(found[0]) if found else None
+
+    async def insert_one(self, doc):
+        self.calls += 1
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+        return FakeResult(inserted_id=doc["_id"])
+
+    def _upsert(self, query, update, upsert):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                self._apply(doc, update, inserting=False)
+                return before, doc
+        if not upsert:
+            return None, None
+        doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+        doc.setdefault("_id", ObjectId())
+        self._apply(doc, update, inserting=True)
+        self.docs.append(doc)
+        return None, doc
+
+    async def update_one(self, query, update, upsert=False, session=None):
+        self.calls += 1
+        before, after = self._upsert(query, update, upsert)
+        if after is None:
+            return FakeResult()
+        if before is None:
+            return FakeResult(upserted_id=after["_id"])
+        return FakeResult(count=1)
+
+    async def find_one_and_update(
+        self,
+        query,
+        update,
+        projection=None,
+        upsert=False,
+        return_document=False,
+        session=None,
+    ):
+        self.calls += 1
+        before, after = self._upsert(query, update, upsert)
+        return copy.deepcopy(after if return_document else before)
+
+    async def update_many(self, query, update):
+        self.calls += 1
+        hits = [d for d in self.docs if matches(d, query)]
+        for doc in hits:
+            self._apply(doc, update, inserting=False)
+        return FakeResult(count=len(hits))
+
+    async def bulk_write(self, requests, ordered=True):
+        self.calls += 1
+        result = FakeResult()
+        for index, request in enumerate(requests):
+            before, after = self._upsert(
+                request._filter, request._doc, bool(request._upsert)
+            )
+            if before is None and after is not None:
+                result.upserted_ids[index] = after["_id"]
+        return result
+
+    async def delete_one(self, query):
+        self.calls += 1
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return FakeResult(count=1)
+        return FakeResult()
+
+    async def delete_many(self, query):
+        self.calls += 1
+        hits = [d for d in self.docs if matches(d, query)]
+        for doc in hits:
+            self.docs.remove(doc)
+        return FakeResult(count=len(hits))
+
+    async def count_documents(self, query):
+        self.calls += 1
+        return sum(1 for d in self.docs if matches(d, query))
+
+    async def distinct(self, field, query):
+        self.calls += 1
+        return list({d[field] for d in self.docs if matches(d, query)})
+
+    @staticmethod
+    def _apply(doc, update, inserting):
+        if isinstance(update, list):
+            for stage in update:
+                computed = {k: evaluate(doc, v) for k, v in stage["$set"].items()}
+                doc.update(computed)
+            return
+        sets = dict(update.get("$set", {}))
+        if inserting:
+            sets.update(update.get("$setOnInsert", {}))
+        for field, value in sets.items():
+            if "." in field:
+                parent, child = field.split(".", 1)
+                doc.setdefault(parent, {})[child] = value
+            else:
+                doc[field] = value
+        for field, value in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + value
+        for field, value in update.get("$max", {}).items():
+            doc[field] = value if doc.get(field) is None else max(doc[field], value)
+        for field, value in update.get("$min", {}).items():
+            doc[field] = value if doc.get(field) is None else min(doc[field], value)
+
+
+class FakeUserBooks(FakeCollection):
+    def aggregate(self, pipeline):
+        """Only the user match matters for these tests; shape rows like the pipeline."""
+        self.reads += 1
+        self.calls += 1
+        user_id = pipeline[0]["$match"]["user_id"]
+        rows = []
+        for d in self.docs:
+            if d["user_id"] == user_id:
+                total = d["book"]["page_count"]
+                rows.append(
+                    {
+                        "_id": str(d["_id"]),
+                        "book_id": d["book_id"],
+                        "title": d["book"]["title"],
+                        "total_pages": total,
+                        "current_page": d["current_page"],
+                        "status": d["status"],
+                    }
+                )
+        return FakeCursor(rows)
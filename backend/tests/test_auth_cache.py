@@ -0,0 +1,103 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from jose import JWTError
+
+from app.database import connection
+from app.services.auth_cache import AuthCache
+from app.services.auth_service import create_access_token, create_refresh_token
+from app.settings import settings
+
+
+class FakeUsers:
+    def __init__(self, *docs):
+        self.docs = {d["_id"]: d for d in docs}
+        self.reads = 0
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+
+@pytest.fixture
+def users(monkeypatch):
+    users = FakeUsers({"_id": ObjectId(), "username": "ana", "password": "x"})
+    cache = AuthCache(user_ttl=60, version_ttl=60, max_users=10, max_tokens=10)
+    monkeypatch.setattr(connection, "get_users_collection", lambda: users)
+    monkeypatch.setattr(connection, "auth_cache", cache)
+    return users
+
+
+def token_for(users, **claims):
+    user = next(iter(users.docs.values()))
+    return create_access_token(
+        {"sub": str(user["_id"]), "username": user["username"], **claims}
+    )
+
+
+def test_decode_is_memoized_until_expiry():
+    cache = AuthCache(user_ttl=60, version_ttl=60, max_users=10, max_tokens=10)
+    token = create_access_token({"sub": "u"})
+    assert cache.decode(token) == cache.decode(token)
+    assert (cache.token_hits, cache.token_misses) == (1, 1)
+
+    expired = create_access_token({"sub": "u"}, timedelta(seconds=-1))
+    with pytest.raises(JWTError):
+        cache.decode(expired)
+
+
+def test_user_is_loaded_once(users):
+    token = token_for(users)
+
+    async def scenario():
+        first = await connection.get_current_user(token)
+        second = await connection.get_current_user(token)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert first["username"] == "ana"
+    assert users.reads == 1
+
+
+def test_trusted_claims_only_check_token_version(users, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_JWT_CLAIMS", True)
+    token = token_for(users)
+
+    async def scenario():
+        return [await connection.get_current_user(token) for _ in range(3)]
+
+    results = asyncio.run(scenario())
+    uid = str(next(iter(users.docs)))
+    assert results[0] == {"id": uid, "username": "ana"}
+    assert users.reads == 1
+
+
+@pytest.mark.parametrize("trust", [False, True])
+def test_token_from_before_logout_is_rejected(users, monkeypatch, trust):
+    monkeypatch.setattr(settings, "AUTH_TRUST_JWT_CLAIMS", trust)
+    token = token_for(users, tv=0)
+    next(iter(users.docs.values()))["token_version"] = 1
+    connection.auth_cache.forget(str(next(iter(users.docs))))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(connection.get_current_user(token))
+    assert exc.value.status_code == 401
+
+    fresh = token_for(users, tv=1)
+    assert asyncio.run(connection.get_current_user(fresh))["username"] == "ana"
+
+
+def test_refresh_token_is_not_an_access_token(users):
+    user = next(iter(users.docs.values()))
+    refresh = create_refresh_token(
+        {"sub": str(user["_id"]), "username": "ana", "tv": 0}
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(connection.get_current_user(refresh))
+    assert exc.value.status_code == 401
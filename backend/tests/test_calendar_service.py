@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.calendar_service import (
+    CALENDAR_DAYS,
+    reading_calendar,
+    user_calendar,
+)
+from fakes import FakeCollection
+
+TODAY = date(2025, 6, 30)
+USER_ID = ObjectId()
+
+
+def log(book_id, days_ago, pages):
+    day = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time())
+    return {"book_id": book_id, "reading_date": day, "pages_read": pages}
+
+
+def test_empty_calendar():
+    calendar = reading_calendar([], [], TODAY, 30)
+
+    assert calendar["pages"] == [0] * CALENDAR_DAYS
+    assert calendar["rolling_7"] == [0.0] * CALENDAR_DAYS
+    assert calendar["start"] == (TODAY - timedelta(days=364)).isoformat()
+    assert calendar["books"] == []
+
+
+def test_days_are_bucketed_and_averaged():
+    logs = [log("b1", 0, 14), log("b2", 0, 7), log("b1", 6, 21), log("b1", 400, 99)]
+
+    calendar = reading_calendar(logs, [], TODAY, 30)
+
+    assert calendar["pages"][-1] == 21
+    assert calendar["pages"][-7] == 21
+    assert calendar["total_pages"] == 42  # the session older than a year is ignored
+    assert calendar["rolling_7"][-1] == 6.0
+    assert calendar["rolling_7"][-8] == 0.0
+    assert calendar["rolling_30"][-1] == 1.4
+
+
+def test_finish_date_follows_recent_pace():
+    logs = [log("b1", d, 20) for d in range(10)] + [log("b2", 100, 50)]
+    library = [
+        {"book_id": "b1", "current_page": 200, "book": {"page_count": 300}},
+        {"book_id": "b2", "current_page": 50, "book": {"page_count": 300}},
+    ]
+
+    books = reading_calendar(logs, library, TODAY, pace_window=10)["books"]
+
+    assert books[0]["pages_per_day"] == 20.0
+    assert books[0]["projected_finish"] == (TODAY + timedelta(days=5)).isoformat()
+    # Nothing read within the pace window: no forecast
+    assert books[1]["pages_per_day"] == 0.0
+    assert books[1]["projected_finish"] is None
+
+
+def test_loads_only_the_last_year_and_unfinished_books():
+    logs = FakeCollection(
+        [dict(log("b1", d, 10), user_id=USER_ID) for d in (0, 1, 500)]
+        + [dict(log("b1", 0, 10), user_id=ObjectId())]
+    )
+    user_books = FakeCollection(
+        [
+            {
+                "user_id": USER_ID,
+                "book_id": "b1",
+                "status": "reading",
+                "current_page": 20,
+                "book": {"title": "Dune", "page_count": 100},
+            },
+            {"user_id": USER_ID, "book_id": "b0", "status": "completed"},
+        ]
+    )
+
+    calendar = asyncio.run(user_calendar(user_books, logs, USER_ID, TODAY, 2))
+
+    assert calendar["total_pages"] == 20
+    assert [b["book_id"] for b in calendar["books"]] == ["b1"]
+    assert calendar["books"][0]["title"] == "Dune"
+    assert calendar["books"][0]["projected_finish"] == "2025-07-08"
@@ -0,0 +1,103 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.import_service import import_reading_logs
+from fakes import FakeCollection
+
+USER_ID = ObjectId()
+
+
+@pytest.fixture
+def collections():
+    books = FakeCollection(
+        [
+            {
+                "google_id": f"b{i}",
+                "title": f"Book {i}",
+                "authors": ["Ann", "Bo"],
+                "page_count": 100,
+            }
+            for i in range(3)
+        ]
+    )
+    user_books = FakeCollection(
+        [
+            {
+                "user_id": USER_ID,
+                "book_id": f"b{i}",
+                "status": "reading",
+                "current_page": 10 * i,
+                "start_date": None,
+            }
+            for i in range(3)
+        ]
+        + [{"user_id": ObjectId(), "book_id": "b0", "current_page": 99}]
+    )
+    logs = FakeCollection(
+        [
+            {
+                "_id": ObjectId(),
+                "user_id": USER_ID,
+                "book_id": f"b{i % 3}",
+                "reading_date": datetime(2025, 1, 1 + i),
+                "pages_read": 5,
+                "current_page": 5 * (i + 1),
+                "notes": 'a, "quoted" note' if i == 0 else "",
+            }
+            for i in range(5)
+        ]
+    )
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(USER_ID)},
+            connection.get_books_collection: lambda: books,
+            connection.get_user_books_collection: lambda: user_books,
+            connection.get_reading_logs_collection: lambda: logs,
+        }
+    )
+    yield books, user_books, logs
+    app.dependency_overrides.clear()
+
+
+def test_ndjson_export(collections):
+    response = TestClient(app).get("/users/me/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+
+    books = [r for r in records if r["type"] == "book"]
+    logs = [r for r in records if r["type"] == "log"]
+    assert [b["book_id"] for b in books] == ["b0", "b1", "b2"]
+    assert books[1]["title"] == "Book 1" and books[1]["current_page"] == 10
+    assert len(logs) == 5
+    assert logs[0]["reading_date"] == "2025-01-01T00:00:00"
+    assert "user_id" not in logs[0] and "_id" not in logs[0]
+
+
+def test_csv_export_can_be_imported_again(collections):
+    _, user_books, _ = collections
+    response = TestClient(app).get("/users/me/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 8
+    assert rows[0]["authors"] == "Ann; Bo"
+
+    target = FakeCollection()
+
+    async def chunks():
+        yield response.content
+
+    report = asyncio.run(
+        import_reading_logs(chunks(), "csv", user_books, target, USER_ID)
+    )
+    assert (report.rows, report.imported, report.failed) == (5, 5, 0)
+    assert {d["notes"] for d in target.docs} == {'a, "quoted" note', ""}
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.google_books import fetch_volumes, parse_search_page
+from app.settings import settings
+from tools.google_books_stub import create_stub_app, synthetic_volume
+
+STUB_URL = "http://stub/books/v1/volumes"
+
+
+@pytest.fixture
+def stub_url(monkeypatch):
+    monkeypatch.setattr(settings, "GOOGLE_BOOKS_API_URL", STUB_URL)
+    return STUB_URL
+
+
+def _search(app, query, page=1, page_size=10):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await fetch_volumes(client, query, page, page_size)
+
+    return asyncio.run(run())
+
+
+def test_recorded_fixture_is_served(stub_url):
+    app = create_stub_app(latency_ms=0)
+    page = parse_search_page(_search(app, "The   Hobbit"))
+    assert page["totalItems"] == 3
+    assert page["books"][0]["isbn"] == "9780007458424"
+    assert page["books"][0]["thumbnail"].startswith("https:")
+
+
+def test_synthetic_results_are_deterministic_and_paginated(stub_url):
+    app = create_stub_app(fixtures_dir=None, latency_ms=0, total_items=25)
+    first = _search(app, "dune", page=1)
+    again = _search(app, "dune", page=1)
+    last = _search(app, "dune", page=3)
+    assert first == again
+    assert first["totalItems"] == 25
+    assert len(first["items"]) == 10 and len(last["items"]) == 5
+
+
+def test_error_rate_returns_server_errors(stub_url):
+    app = create_stub_app(fixtures_dir=None, latency_ms=0, error_rate=1.0)
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        _search(app, "dune")
+    assert exc.value.response.status_code == 503
+
+
+def test_description_lengths_follow_a_distribution():
+    lengths = [
+        len(synthetic_volume("q", i, 600, 0.8)["volumeInfo"]["description"])
+        for i in range(200)
+    ]
+    assert len(set(lengths)) > 50
+    assert 300 < sorted(lengths)[100] < 900
+    fixed = {
+        len(synthetic_volume("q", i, 600)["volumeInfo"]["description"])
+        for i in range(5)
+    }
+    assert len(fixed) == 1
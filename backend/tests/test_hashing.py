@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.hashing import HashingBusy, HashingPool
+
+
+def test_hash_and_verify_round_trip():
+    pool = HashingPool(max_workers=2, max_queue=4)
+
+    async def scenario():
+        hashed = await pool.hash("s3cret")
+        return await pool.verify("s3cret", hashed), await pool.verify("nope", hashed)
+
+    try:
+        assert asyncio.run(scenario()) == (True, False)
+        assert pool.stats()["completed"] == 3
+    finally:
+        pool.shutdown()
+
+
+def test_event_loop_keeps_running_while_hashing():
+    pool = HashingPool(max_workers=2, max_queue=10)
+
+    async def scenario():
+        jobs = [asyncio.create_task(pool.run(time.sleep, 0.2)) for _ in range(4)]
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lag = time.perf_counter() - started
+        assert pool.stats()["running"] == 2
+        assert pool.stats()["queued"] == 2
+        await asyncio.gather(*jobs)
+        return lag
+
+    try:
+        assert asyncio.run(scenario()) < 0.1
+        assert pool.stats()["queued"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_full_queue_is_refused():
+    pool = HashingPool(max_workers=1, max_queue=2)
+
+    async def scenario():
+        jobs = [asyncio.create_task(pool.run(time.sleep, 0.1)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        with pytest.raises(HashingBusy):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*jobs)
+
+    try:
+        asyncio.run(scenario())
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_cancelled_jobs_release_their_queue_slots():
+    pool = HashingPool(max_workers=1, max_queue=10)
+
+    async def scenario():
+        jobs = [asyncio.create_task(pool.run(time.sleep, 0.1)) for _ in range(4)]
+        await asyncio.sleep(0.02)
+        pool.shutdown()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert pool.stats()["queued"] == 0
+    assert pool.stats()["running"] == 0
@@ -0,0 +1,205 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.import_service import (
+    ImportFormatError,
+    import_reading_logs,
+    iter_lines,
+    iter_records,
+)
+from app.services.response_cache import UserResponseCache, get_response_cache
+from app.settings import settings
+from fakes import FakeCollection
+
+USER_ID = ObjectId()
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def collect(agen):
+    return [item async for item in agen]
+
+
+def test_lines_survive_arbitrary_chunk_boundaries():
+    data = "título,b\r\nsecond line\nlast".encode("utf-8")
+    for size in (1, 2, 5, 100):
+        lines = asyncio.run(collect(iter_lines(chunked(data, size), 1024)))
+        assert lines == ["título,b", "second line", "last"]
+
+
+def test_overlong_line_is_rejected():
+    with pytest.raises(ImportFormatError):
+        asyncio.run(collect(iter_lines(chunked(b"x" * 100, 10), 50)))
+
+
+@pytest.mark.parametrize("line", [b"x" * 100, "é".encode() * 30])
+def test_overlong_line_in_one_chunk_is_rejected(line):
+    # A complete line inside one chunk; the limit counts bytes, not characters
+    with pytest.raises(ImportFormatError):
+        asyncio.run(collect(iter_lines(chunked(line + b"\nok\n", 1000), 50)))
+
+
+def test_csv_quoted_newlines_and_blank_cells():
+    async def lines():
+        for line in [
+            "book_id,notes,reading_date",
+            'b1,"two',
+            'lines",',
+            "b2,,2025-01-01",
+        ]:
+            yield line
+
+    records = asyncio.run(collect(iter_records(lines(), "csv")))
+    assert records == [
+        (1, {"book_id": "b1", "notes": "two\nlines"}, None),
+        (2, {"book_id": "b2", "reading_date": "2025-01-01"}, None),
+    ]
+
+
+def test_csv_unterminated_quote_is_reported_or_capped():
+    async def lines(*items):
+        for line in items:
+            yield line
+
+    records = asyncio.run(
+        collect(iter_records(lines("book_id,notes", "b1,ok", 'b2,"oops'), "csv"))
+    )
+    assert records == [
+        (1, {"book_id": "b1", "notes": "ok"}, None),
+        (2, None, "Unterminated quoted field"),
+    ]
+
+    runaway = lines("book_id,notes", 'b1,"oops', *["x" * 10] * 10)
+    with pytest.raises(ImportFormatError):
+        asyncio.run(collect(iter_records(runaway, "csv", max_record_bytes=50)))
+
+
+def library():
+    return FakeCollection(
+        [
+            {"user_id": USER_ID, "book_id": b, "current_page": 0, "start_date": None}
+            for b in ("b1", "b2")
+        ]
+    )
+
+
+def test_batches_and_one_progress_update_per_book():
+    user_books, logs = library(), FakeCollection()
+    body = "\n".join(
+        f'{{"book_id": "b{1 + i % 2}", "pages_read": 10, "current_page": {10 * (i + 1)},'
+        f' "reading_date": "2025-01-0{1 + i // 2}"}}'
+        for i in range(6)
+    ).encode()
+
+    report = asyncio.run(
+        import_reading_logs(
+            chunked(body, 7), "ndjson", user_books, logs, USER_ID, batch_size=4
+        )
+    )
+
+    assert (report.rows, report.imported, report.failed) == (6, 6, 0)
+    assert logs.calls == 2  # two bulk writes of at most 4 rows
+    assert user_books.calls == 2  # library lookup + one bulk progress update
+    b1 = next(d for d in user_books.docs if d["book_id"] == "b1")
+    assert b1["current_page"] == 50
+    assert b1["start_date"] == datetime(2025, 1, 1)
+    assert b1["last_read_date"] == datetime(2025, 1, 3)
+
+
+@pytest.fixture
+def client():
+    logs = FakeCollection()
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(USER_ID)},
+            connection.get_user_books_collection: library,
+            connection.get_reading_logs_collection: lambda: logs,
+            connection.get_reading_stats_collection: lambda: FakeCollection(),
+            connection.get_user_versions_collection: lambda: FakeCollection(),
+            get_response_cache: lambda: UserResponseCache(1 << 16, 60),
+        }
+    )
+    yield TestClient(app), logs
+    app.dependency_overrides.clear()
+
+
+def test_csv_import_reports_bad_rows(client):
+    client, logs = client
+    body = (
+        "book_id,pages_read,current_page,reading_date,notes\n"
+        "b1,20,20,2025-02-01,first\n"
+        "b1,5,25,2025-02-01,\n"
+        "b1,-3,10,2025-02-02,\n"
+        "zz,5,5,2025-02-02,\n"
+        "b2,5,5,yesterday,\n"
+    )
+    response = client.post(
+        "/books/user/log/import",
+        content=body.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 3)
+    assert [e["row"] for e in report["errors"]] == [3, 4, 5]
+    assert "pages_read" in report["errors"][0]["error"]
+    assert len(logs.docs) == 1
+    assert logs.docs[0]["pages_read"] == 25 and logs.docs[0]["notes"] == "first"
+
+
+def test_missing_csv_header_is_a_bad_request(client):
+    client, _ = client
+    response = client.post("/books/user/log/import?format=csv", content=b"")
+    assert response.status_code == 400
+
+
+def test_failed_import_keeps_progress_and_returns_partial_report(client, monkeypatch):
+    client, logs = client
+    user_books = library()
+    app.dependency_overrides[connection.get_user_books_collection] = lambda: user_books
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "IMPORT_MAX_LINE_BYTES", 60)
+    body = (
+        "book_id,pages_read,current_page,reading_date,notes\n"
+        "b1,20,20,2025-02-01,\n"
+        'b1,5,25,2025-02-02,"' + "never closed\n" * 10
+    )
+    response = client.post("/books/user/log/import?format=csv", content=body.encode())
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["imported"] == 1 and "longer than" in detail["error"]
+    assert len(logs.docs) == 1
+    b1 = next(d for d in user_books.docs if d["book_id"] == "b1")
+    assert b1["current_page"] == 20
+
+
+def test_failed_progress_update_does_not_mask_the_import_error(monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_LINE_BYTES", 90)
+    user_books, logs = library(), FakeCollection()
+
+    async def unavailable(requests, ordered=True):
+        raise RuntimeError("user_books unavailable")
+
+    monkeypatch.setattr(user_books, "bulk_write", unavailable)
+    body = (
+        b'{"book_id": "b1", "pages_read": 5, "current_page": 5,'
+        b' "reading_date": "2025-01-01"}\n'
+    )
+    body += b"x" * 100
+
+    with pytest.raises(ImportFormatError):
+        asyncio.run(
+            import_reading_logs(
+                chunked(body, 7), "ndjson", user_books, logs, USER_ID, batch_size=1
+            )
+        )
+    assert len(logs.docs) == 1
@@ -0,0 +1,71 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database.connection import get_books_collection, get_current_user
+from app.main import app
+from app.services.local_search import _score, search_local, search_terms_for, tokenize
+from app.settings import settings
+from fakes import FakeCollection
+
+
+def _catalog(titles):
+    books = [{"google_id": f"g{i}", "title": t} for i, t in enumerate(titles)]
+    for book in books:
+        book["search_terms"] = search_terms_for(book)
+    return FakeCollection(books)
+
+
+def test_search_terms_cover_title_authors_and_isbn():
+    book = {
+        "title": "Harry Potter and the Philosopher's Stone",
+        "authors": ["J. K. Rowling"],
+        "isbn": "978-0-7475-3269-9",
+    }
+    terms = search_terms_for(book)
+    assert "harry" in terms and "rowling" in terms
+    assert "9780747532699" in terms
+    assert len(terms) == len(set(terms))
+
+
+def test_exact_title_matches_rank_above_prefix_and_author_matches():
+    tokens = tokenize("harry potter")
+    exact = {"title": "Harry Potter", "search_terms": ["harry", "potter"]}
+    prefix = {"title": "Harry Pottery", "search_terms": ["harry", "pottery"]}
+    author = {"title": "Memoirs", "search_terms": ["memoirs", "harry", "potter"]}
+    scores = [_score(b, tokens, "harry potter") for b in (exact, prefix, author)]
+    assert scores[0] > scores[1] > scores[2]
+
+
+def test_whole_term_matches_survive_the_candidate_cap(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_LOCAL_MAX_CANDIDATES", 3)
+    books_col = _catalog(["Dunes of Mars"] * 5 + ["Dune", "Dune Messiah"])
+    result = asyncio.run(search_local(books_col, "dune", 1, 10))
+    assert result["truncated"] and result["totalItems"] == 3
+    assert [b["title"] for b in result["books"]][:2] == ["Dune", "Dune Messiah"]
+
+    result = asyncio.run(search_local(books_col, "dune messiah", 1, 10))
+    assert not result["truncated"]
+    assert [b["title"] for b in result["books"]] == ["Dune Messiah"]
+
+
+def test_auto_only_answers_locally_on_the_first_page(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_LOCAL_MIN_RESULTS", 1)
+    monkeypatch.setattr(settings, "GOOGLE_BOOKS_API_KEY", "")
+    books_col = _catalog([f"Dune {i}" for i in range(15)])
+    app.dependency_overrides.update(
+        {
+            get_current_user: lambda: {"id": "u1", "username": "ana"},
+            get_books_collection: lambda: books_col,
+        }
+    )
+    try:
+        client = TestClient(app)
+        first = client.get("/books/search?query=dune&page=1").json()
+        assert first["source"] == "local" and first["nextPage"] == 2
+        # Without source=local page 2 goes to Google Books (unconfigured here)
+        assert client.get("/books/search?query=dune&page=2").status_code == 500
+        second = client.get("/books/search?query=dune&page=2&source=local").json()
+        assert second["source"] == "local" and len(second["books"]) == 5
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,292 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
+
+from app.database import connection, migrations
+from app.database.migrations import (
+    Index,
+    Migration,
+    MigrationConflict,
+    MIGRATIONS as ALL_MIGRATIONS,
+    _plan_stages,
+    move_misfiled_accounts,
+    remove_duplicate_library_entries,
+    upgrade,
+)
+from app.main import app
+from app.services.response_cache import UserResponseCache, get_response_cache
+from fakes import FakeCollection, FakeCursor, matches
+
+
+class IndexedCollection(FakeCollection):
+    def __init__(self, docs=()):
+        super().__init__(docs)
+        self.indexes = {"_id_": {"key": [("_id", 1)]}}
+        self.created = 0
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_index(self, keys, **options):
+        self.created += 1
+        if options.get("unique"):
+            values = [tuple(d.get(k) for k, _ in keys) for d in self.docs]
+            if len(values) != len(set(values)):
+                raise DuplicateKeyError("E11000 duplicate key error")
+        name = "_".join(f"{k}_{d}" for k, d in keys)
+        self.indexes[name] = {"key": keys, **options}
+        return name
+
+    async def update_one(self, query, update, upsert=False, session=None):
+        # An upsert whose filter misses an existing _id violates the _id index
+        if upsert and not any(matches(d, query) for d in self.docs):
+            if any(d["_id"] == query.get("_id") for d in self.docs):
+                raise DuplicateKeyError("E11000 duplicate key error")
+        return await super().update_one(query, update, upsert, session)
+
+    def aggregate(self, pipeline, **kwargs):
+        """$match, $sort and $group with the accumulators the migrations use."""
+        rows = [dict(d) for d in self.docs]
+        for stage in pipeline:
+            op, spec = next(iter(stage.items()))
+            if op == "$match":
+                rows = [r for r in rows if matches(r, spec)]
+            elif op == "$sort":
+                for field, direction in reversed(list(spec.items())):
+                    rows.sort(key=lambda r: r.get(field), reverse=direction == -1)
+            else:
+                rows = group_rows(rows, spec)
+        return FakeCursor(rows)
+
+
+def group_rows(rows, spec):
+    groups = {}
+    for row in rows:
+        if isinstance(spec["_id"], dict):
+            key = {k: row.get(v[1:]) for k, v in spec["_id"].items()}
+        else:
+            key = row.get(spec["_id"][1:])
+        group = groups.setdefault(repr(key), {"_id": key})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            ((op, arg),) = accumulator.items()
+            value = 1 if arg == 1 else row.get(arg[1:])
+            if op == "$push":
+                group.setdefault(field, []).append(value)
+            elif field not in group:
+                group[field] = value
+            elif op == "$sum":
+                group[field] += value
+            else:
+                group[field] = (min if op == "$min" else max)(group[field], value)
+    return list(groups.values())
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = IndexedCollection()
+        return self[name]
+
+
+async def mark(db):
+    db["log"].docs.append({"step": "ran"})
+    return {"ok": 1}
+
+
+MIGRATIONS = [
+    Migration(1, "google ids", indexes=[Index("books", "google_id", unique=True)]),
+    Migration(2, "mark", run=mark),
+]
+
+
+def test_upgrade_applies_pending_migrations_once():
+    db = FakeDatabase()
+
+    applied = asyncio.run(upgrade(db, MIGRATIONS))
+    again = asyncio.run(upgrade(db, MIGRATIONS))
+
+    assert [m["_id"] for m in applied] == [1, 2]
+    assert again == []
+    assert db["books"].created == 1
+    assert db["books"].indexes["google_id_1"]["unique"] is True
+    assert len(db["log"].docs) == 1
+    assert db["schema_migrations"].docs[1]["result"] == {"ok": 1}
+
+
+def test_existing_identical_index_is_adopted():
+    db = FakeDatabase()
+    db["books"].indexes["google_id_1"] = {"key": [("google_id", 1.0)], "unique": True}
+
+    assert len(asyncio.run(upgrade(db, MIGRATIONS))) == 2
+
+
+def test_conflicting_index_stops_before_any_change():
+    db = FakeDatabase()
+    db["books"].indexes["google_id_1"] = {"key": [("google_id", 1)]}
+
+    with pytest.raises(MigrationConflict, match="unique"):
+        asyncio.run(upgrade(db, MIGRATIONS))
+    assert db["schema_migrations"].docs == []
+    assert db["log"].docs == []
+
+
+def test_edited_migration_is_a_conflict():
+    db = FakeDatabase()
+    asyncio.run(upgrade(db, MIGRATIONS))
+    edited = [
+        Migration(1, "google ids", indexes=[Index("books", "google_id")]),
+        MIGRATIONS[1],
+    ]
+
+    with pytest.raises(MigrationConflict, match="Migration 1"):
+        asyncio.run(upgrade(db, edited))
+
+
+def test_workers_wait_for_the_migration_lock(monkeypatch):
+    monkeypatch.setattr(migrations, "LOCK_POLL_SECONDS", 0.01)
+    db = FakeDatabase()
+    expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+    db["schema_migrations"].docs.append(
+        {"_id": "lock", "owner": "other", "expires_at": expires}
+    )
+
+    async def run():
+        waiting = asyncio.create_task(upgrade(db, MIGRATIONS))
+        await asyncio.sleep(0.05)
+        assert not waiting.done() and db["log"].docs == []
+        await migrations.release_lock(db, "other")
+        return await waiting
+
+    assert [m["_id"] for m in asyncio.run(run())] == [1, 2]
+    assert [d["_id"] for d in db["schema_migrations"].docs] == [1, 2]
+
+
+def test_expired_lock_is_taken_over():
+    db = FakeDatabase()
+    expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db["schema_migrations"].docs.append(
+        {"_id": "lock", "owner": "crashed", "expires_at": expired}
+    )
+
+    assert len(asyncio.run(upgrade(db, MIGRATIONS))) == 2
+
+
+def test_failed_migration_stops_startup(monkeypatch):
+    async def broken(db=None, migrations=None):
+        raise DuplicateKeyError("E11000 duplicate key error")
+
+    monkeypatch.setattr(migrations, "upgrade", broken)
+    with pytest.raises(DuplicateKeyError):
+        asyncio.run(migrations.ensure_schema())
+
+
+def test_duplicate_library_entries_keep_the_most_progress():
+    user_id, older, newer, ahead = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    db = FakeDatabase()
+    db["user_books"].docs = [
+        {"_id": older, "user_id": user_id, "book_id": "b1", "current_page": 10},
+        {"_id": newer, "user_id": user_id, "book_id": "b1", "current_page": 10},
+        {"_id": ahead, "user_id": user_id, "book_id": "b1", "current_page": 40},
+        {"_id": ObjectId(), "user_id": user_id, "book_id": "b2", "current_page": 0},
+    ]
+
+    assert asyncio.run(remove_duplicate_library_entries(db)) == {"removed": 2}
+    assert ahead in [d["_id"] for d in db["user_books"].docs]
+    assert len(db["user_books"].docs) == 2
+
+
+def test_upgrade_removes_duplicates_left_by_the_baseline():
+    user_id, older = ObjectId(), ObjectId()
+    day = datetime(2025, 1, 1)
+    db = FakeDatabase()
+    db["books"].docs = [
+        {"_id": older, "google_id": "b1", "title": "Dune"},
+        {"_id": ObjectId(), "google_id": "b1", "title": "Dune"},
+    ]
+    db["user_books"].docs = [
+        {"_id": ObjectId(), "user_id": user_id, "book_id": "b1", "current_page": 30}
+    ]
+    db["user_reading_logs"].docs = [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "book_id": "b1",
+            "reading_date": day,
+            "pages_read": pages,
+            "current_page": pages,
+            "notes": notes,
+        }
+        for pages, notes in ((10, "morning"), (20, ""), (30, "evening"))
+    ]
+
+    applied = asyncio.run(upgrade(db))
+
+    assert len(applied) == len(ALL_MIGRATIONS)
+    assert applied[0]["prepared"] == {
+        "books": {"removed": 1},
+        "logs": {"merged": 2, "stats_rebuilt": 1},
+    }
+    assert [b["_id"] for b in db["books"].docs] == [older]
+    (log,) = db["user_reading_logs"].docs
+    assert (log["pages_read"], log["current_page"]) == (60, 30)
+    assert log["notes"] == "morning\nevening"
+    day_stats = next(d for d in db["reading_stats"].docs if d["kind"] == "day")
+    assert (day_stats["pages"], day_stats["sessions"]) == (60, 1)
+
+
+def test_add_losing_the_unique_library_index_race_is_a_conflict():
+    class RacedUserBooks(FakeCollection):
+        async def insert_one(self, doc):
+            # The library check passed, then a concurrent add won the index
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(ObjectId())},
+            connection.get_books_collection: lambda: FakeCollection(),
+            connection.get_user_books_collection: lambda: RacedUserBooks(),
+            connection.get_user_versions_collection: lambda: FakeCollection(),
+            get_response_cache: lambda: UserResponseCache(1 << 16, 60),
+        }
+    )
+    try:
+        response = TestClient(app).post(
+            "/books/user/library/add", json={"id": "b2", "title": "Emma"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Book already in user's library"
+
+
+def test_misfiled_accounts_move_to_users():
+    account_id = ObjectId()
+    db = FakeDatabase()
+    db["user_books"].docs = [
+        {"_id": account_id, "username": "ana", "password": "hash"},
+        {"_id": ObjectId(), "user_id": account_id, "book_id": "b1"},
+    ]
+
+    assert asyncio.run(move_misfiled_accounts(db)) == {"moved": 1}
+    assert db["users"].docs == [
+        {"_id": account_id, "username": "ana", "password": "hash"}
+    ]
+    assert [d["book_id"] for d in db["user_books"].docs] == ["b1"]
+
+
+def test_plan_stages_finds_nested_index_scans():
+    stages, indexes = [], []
+    plan = {
+        "stage": "FETCH",
+        "inputStage": {"stage": "IXSCAN", "indexName": "user_id_1_book_id_1"},
+    }
+
+    _plan_stages(plan, stages, indexes)
+
+    assert stages == ["FETCH", "IXSCAN"]
+    assert indexes == ["user_id_1_book_id_1"]
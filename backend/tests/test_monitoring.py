@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.database.monitoring import (
+    CommandTimingListener,
+    current_stats,
+    end_request,
+    start_request,
+)
+from app.main import app
+
+
+def command(name, collection, micros, request_id=1):
+    return SimpleNamespace(
+        command_name=name,
+        command={name: collection},
+        database_name="trackerdb",
+        duration_micros=micros,
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+
+
+def run(listener, name, collection, micros, request_id=1, failed=False):
+    event = command(name, collection, micros, request_id)
+    listener.started(event)
+    (listener.failed if failed else listener.succeeded)(event)
+
+
+def test_commands_are_attributed_to_the_current_request():
+    listener = CommandTimingListener()
+    run(listener, "find", "books", 500)  # outside any request: ignored
+
+    stats, token = start_request("GET /books/user/library")
+    try:
+        run(listener, "find", "user_books", 1500)
+        run(listener, "update", "user_books", 2500, failed=True)
+    finally:
+        end_request(token)
+
+    assert (stats.commands, stats.failed) == (2, 1)
+    assert round(stats.seconds, 4) == 0.004
+    assert stats.server_timing() == 'db;dur=4.0;desc="2 commands"'
+    assert current_stats() is None
+
+
+def test_commands_on_executor_threads_are_counted():
+    listener = CommandTimingListener()
+
+    async def request():
+        stats, token = start_request("GET /")
+        # Motor runs pymongo on executor threads with a copy of the context
+        await asyncio.gather(
+            *(asyncio.to_thread(run, listener, "find", "books", 100) for _ in range(5))
+        )
+        end_request(token)
+        return stats
+
+    assert asyncio.run(request()).commands == 5
+
+
+def test_slow_commands_are_logged(caplog):
+    listener = CommandTimingListener(slow_ms=50)
+    stats, token = start_request("POST /books/user/log/add")
+    with caplog.at_level(logging.WARNING, logger="app.database.monitoring"):
+        run(listener, "find", "books", 10_000, request_id=1)
+        run(listener, "aggregate", "user_reading_logs", 80_000, request_id=2)
+    end_request(token)
+
+    assert len(caplog.records) == 1
+    record = caplog.records[0]
+    assert record.db_collection == "trackerdb.user_reading_logs"
+    assert record.db_ms == 80.0
+    assert record.request == "POST /books/user/log/add"
+    assert listener._targets == {}
+
+
+def test_responses_carry_server_timing():
+    response = TestClient(app).get("/")
+
+    assert 'db;dur=0.0;desc="0 commands"' in response.headers["server-timing"]
+    assert "app;dur=" in response.headers["server-timing"]
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.pagination import decode_cursor, encode_cursor, keyset_after
+
+
+def test_cursor_round_trips_dates_and_object_ids():
+    position = {"d": datetime(2025, 1, 2, 3, 4, 5), "i": str(ObjectId())}
+    token = encode_cursor(position)
+    assert "=" not in token
+    assert decode_cursor(token) == position
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "bnVsbA", ""])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_keyset_after_null_date_only_pages_within_nulls():
+    last_id = ObjectId()
+    assert keyset_after("last_read_date", None, last_id) == {
+        "last_read_date": None,
+        "_id": {"$lt": last_id},
+    }
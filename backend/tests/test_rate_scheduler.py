@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services.rate_scheduler import (
+    LocalTokenBucket,
+    Priority,
+    RateLimitTimeout,
+    RateScheduler,
+    RateSchedulerError,
+)
+
+DEADLINES = {Priority.INTERACTIVE: 1.0, Priority.BACKGROUND: 1.0}
+
+
+def test_interactive_requests_are_served_before_background():
+    scheduler = RateScheduler(LocalTokenBucket(50, burst=1), DEADLINES)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    async def scenario():
+        await scheduler.acquire()  # drain the burst so the next callers queue
+        background = [
+            asyncio.create_task(call(f"bg{i}", Priority.BACKGROUND)) for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("ui", Priority.INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+
+    asyncio.run(scenario())
+    assert order[0] == "ui"
+    assert scheduler.stats()["granted"] == {"interactive": 2, "background": 2}
+
+
+def test_waiter_times_out_at_its_deadline():
+    scheduler = RateScheduler(LocalTokenBucket(0.1, burst=1), DEADLINES)
+
+    async def scenario():
+        await scheduler.acquire()
+        with pytest.raises(RateLimitTimeout):
+            await scheduler.acquire(timeout=0.05)
+
+    asyncio.run(scenario())
+    assert scheduler.stats()["timeouts"]["interactive"] == 1
+
+
+class BrokenBucket:
+    async def try_take(self):
+        raise RuntimeError("bucket unavailable")
+
+
+def test_dispatcher_failure_fails_waiters_instead_of_granting():
+    scheduler = RateScheduler(BrokenBucket(), DEADLINES)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(scheduler.acquire() for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RateSchedulerError) for r in results)
+    assert scheduler.stats()["granted"]["interactive"] == 0
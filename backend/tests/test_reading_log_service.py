@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.reading_log_service import ProgressConflict, record_reading
+from app.services.response_cache import UserResponseCache, get_response_cache
+from fakes import FakeCollection
+
+USER_ID = ObjectId()
+
+
+def library_with_book(current_page=0):
+    return FakeCollection(
+        [
+            {
+                "user_id": USER_ID,
+                "book_id": "b1",
+                "current_page": current_page,
+                "start_date": None,
+            }
+        ]
+    )
+
+
+def log(user_books, logs, day, pages, page, notes=None):
+    return asyncio.run(
+        record_reading(
+            user_books,
+            logs,
+            USER_ID,
+            "b1",
+            datetime(2025, 3, day),
+            pages_read=pages,
+            current_page=page,
+            notes=notes,
+        )
+    )
+
+
+def test_one_round_trip_per_collection():
+    user_books, logs = library_with_book(), FakeCollection()
+    saved = log(user_books, logs, 10, 20, 20, "good start")
+    assert (user_books.calls, logs.calls) == (1, 1)
+    assert saved["pages_read"] == 20 and saved["notes"] == "good start"
+    assert user_books.docs[0]["start_date"] == datetime(2025, 3, 10)
+
+
+def test_same_day_sessions_accumulate():
+    user_books, logs = library_with_book(), FakeCollection()
+    log(user_books, logs, 10, 20, 20, "first")
+    saved = log(user_books, logs, 10, 15, 35)
+    assert len(logs.docs) == 1
+    assert (saved["pages_read"], saved["current_page"]) == (35, 35)
+    assert saved["notes"] == "first"
+
+
+def test_start_date_is_the_earliest_session():
+    user_books, logs = library_with_book(), FakeCollection()
+    log(user_books, logs, 10, 20, 20)
+    log(user_books, logs, 12, 10, 30)
+    assert user_books.docs[0]["start_date"] == datetime(2025, 3, 10)
+    log(user_books, logs, 5, 1, 31)
+    assert user_books.docs[0]["start_date"] == datetime(2025, 3, 5)
+    assert user_books.docs[0]["current_page"] == 31
+
+
+def test_going_backwards_writes_nothing():
+    user_books, logs = library_with_book(current_page=50), FakeCollection()
+    with pytest.raises(ProgressConflict):
+        log(user_books, logs, 10, 5, 40)
+    assert logs.docs == []
+    assert user_books.docs[0]["current_page"] == 50
+
+
+@pytest.fixture
+def client():
+    user_books = library_with_book(current_page=50)
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(USER_ID)},
+            connection.get_user_books_collection: lambda: user_books,
+            connection.get_reading_logs_collection: lambda: FakeCollection(),
+            connection.get_reading_stats_collection: lambda: FakeCollection(),
+            connection.get_user_versions_collection: lambda: FakeCollection(),
+            get_response_cache: lambda: UserResponseCache(1 << 16, 60),
+        }
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize(
+    "book_id, page, status", [("b1", 60, 200), ("b1", 40, 400), ("nope", 60, 404)]
+)
+def test_route_status_codes(client, book_id, page, status):
+    response = client.post(
+        "/books/user/log/add",
+        json={"book_id": book_id, "pages_read": 5, "current_page": page},
+    )
+    assert response.status_code == status
+
+
+@pytest.fixture
+def history():
+    logs = FakeCollection(
+        [
+            {
+                "_id": ObjectId(),
+                "user_id": USER_ID,
+                "book_id": "b1",
+                "reading_date": datetime(2025, 1, day),
+                "pages_read": day,
+                "current_page": day * 10,
+                "notes": "",
+            }
+            for day in range(1, 11)
+        ]
+    )
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(USER_ID)},
+            connection.get_reading_logs_collection: lambda: logs,
+            connection.get_user_versions_collection: lambda: FakeCollection(),
+            get_response_cache: lambda: UserResponseCache(1 << 16, 60),
+        }
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_log_history_pages_through_a_date_range(history):
+    seen, cursor = [], None
+    while True:
+        params = {"book_id": "b1", "from": "2025-01-02", "to": "2025-01-08", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = history.get("/books/user/logs", params=params).json()
+        seen += [log["pages_read"] for log in page["logs"]]
+        cursor = page["nextCursor"]
+        if not cursor:
+            break
+
+    assert seen == [8, 7, 6, 5, 4, 3, 2]
+
+
+def test_log_history_chart_fields(history):
+    page = history.get(
+        "/books/user/logs", params={"book_id": "b1", "fields": "chart", "limit": 2}
+    ).json()
+
+    assert page["logs"] == [
+        {"reading_date": "2025-01-10T00:00:00", "pages_read": 10},
+        {"reading_date": "2025-01-09T00:00:00", "pages_read": 9},
+    ]
+
+
+def test_log_history_without_limit_returns_everything(history):
+    page = history.get("/books/user/logs", params={"book_id": "b1"}).json()
+
+    assert len(page["logs"]) == 10
+    assert page["nextCursor"] is None
+    assert (
+        history.get(
+            "/books/user/logs", params={"book_id": "b1", "cursor": "garbage"}
+        ).status_code
+        == 400
+    )
@@ -0,0 +1,127 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services import refresh_tokens
+from app.services.refresh_tokens import (
+    RefreshTokenError,
+    RefreshTokenReused,
+    token_digest,
+)
+
+
+def matches(doc, query):
+    for field, expected in query.items():
+        value = doc.get(field)
+        if isinstance(expected, dict) and "$gt" in expected:
+            if not value > expected["$gt"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class FakeResult:
+    def __init__(self, count):
+        self.modified_count = count
+
+
+class FakeTokens:
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc else None
+
+    async def find_one_and_update(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is None or not matches(doc, query):
+            return None
+        before = dict(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def update_many(self, query, update):
+        hits = [d for d in self.docs.values() if matches(d, query)]
+        for doc in hits:
+            doc.update(update["$set"])
+        return FakeResult(len(hits))
+
+
+CLAIMS = {"sub": str(ObjectId()), "username": "ana", "tv": 0}
+
+
+def test_tokens_are_stored_by_digest_only():
+    tokens = FakeTokens()
+    token = asyncio.run(refresh_tokens.issue(tokens, CLAIMS))
+    assert list(tokens.docs) == [token_digest(token)]
+    assert token not in str(tokens.docs)
+
+
+def test_rotation_replaces_the_token_within_its_family():
+    async def scenario():
+        tokens = FakeTokens()
+        first = await refresh_tokens.issue(tokens, CLAIMS)
+        second = await refresh_tokens.rotate(tokens, first, CLAIMS)
+        third = await refresh_tokens.rotate(tokens, second, CLAIMS)
+        families = {d["family_id"] for d in tokens.docs.values()}
+        return first, second, third, families
+
+    first, second, third, families = asyncio.run(scenario())
+    assert len({first, second, third}) == 3
+    assert len(families) == 1
+
+
+def test_reuse_revokes_the_whole_family_only():
+    async def scenario():
+        tokens = FakeTokens()
+        stolen = await refresh_tokens.issue(tokens, CLAIMS)
+        other_session = await refresh_tokens.issue(tokens, CLAIMS)
+        successor = await refresh_tokens.rotate(tokens, stolen, CLAIMS)
+        # Replayed after the grace window
+        tokens.docs[token_digest(stolen)]["used_at"] -= timedelta(minutes=1)
+
+        with pytest.raises(RefreshTokenReused):
+            await refresh_tokens.rotate(tokens, stolen, CLAIMS)
+        with pytest.raises(RefreshTokenError):
+            await refresh_tokens.rotate(tokens, successor, CLAIMS)
+        # A second device's session is unaffected
+        await refresh_tokens.rotate(tokens, other_session, CLAIMS)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_refreshes_both_succeed():
+    async def scenario():
+        tokens = FakeTokens()
+        token = await refresh_tokens.issue(tokens, CLAIMS)
+        # Two tabs present the same token at the same moment
+        first, second = await asyncio.gather(
+            refresh_tokens.rotate(tokens, token, CLAIMS),
+            refresh_tokens.rotate(tokens, token, CLAIMS),
+        )
+        await refresh_tokens.rotate(tokens, first, CLAIMS)
+        await refresh_tokens.rotate(tokens, second, CLAIMS)
+        return tokens
+
+    tokens = asyncio.run(scenario())
+    assert not any(d["revoked"] for d in tokens.docs.values())
+
+
+def test_logout_revokes_one_session():
+    async def scenario():
+        tokens = FakeTokens()
+        phone = await refresh_tokens.issue(tokens, CLAIMS)
+        laptop = await refresh_tokens.issue(tokens, CLAIMS)
+        await refresh_tokens.revoke_token_family(tokens, phone)
+        with pytest.raises(RefreshTokenError):
+            await refresh_tokens.rotate(tokens, phone, CLAIMS)
+        await refresh_tokens.rotate(tokens, laptop, CLAIMS)
+
+    asyncio.run(scenario())
@@ -0,0 +1,221 @@
+"""The per-user response cache must never serve data older than the last write.
+
+Each write endpoint is exercised against in-memory fake collections after the
+library and log responses have been cached, and the next read must reflect it.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.response_cache import UserResponseCache, get_response_cache
+from fakes import FakeCollection, FakeUserBooks
+
+USER_ID = str(ObjectId())
+OTHER_ID = str(ObjectId())
+
+
+@pytest.fixture
+def env():
+    book = {"google_id": "b1", "title": "Dune", "authors": [], "page_count": 400}
+    books = FakeCollection([book])
+    user_books = FakeUserBooks(
+        [
+            {
+                "_id": ObjectId(),
+                "user_id": ObjectId(uid),
+                "book_id": "b1",
+                "current_page": 10,
+                "status": "reading",
+                "start_date": None,
+                "last_read_date": None,
+                "book": {"title": "Dune", "page_count": 400},
+            }
+            for uid in (USER_ID, OTHER_ID)
+        ]
+    )
+    logs = FakeCollection(
+        [
+            {
+                "_id": ObjectId(),
+                "user_id": ObjectId(USER_ID),
+                "book_id": "b1",
+                "reading_date": datetime(2025, 1, 1),
+                "pages_read": 10,
+                "current_page": 10,
+                "notes": "",
+            }
+        ]
+    )
+    versions = FakeCollection()
+    cache = UserResponseCache(max_bytes=1 << 20, ttl_seconds=300)
+    current = {"id": USER_ID}
+
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: current,
+            connection.get_books_collection: lambda: books,
+            connection.get_user_books_collection: lambda: user_books,
+            connection.get_reading_logs_collection: lambda: logs,
+            connection.get_reading_stats_collection: lambda: FakeCollection(),
+            connection.get_user_versions_collection: lambda: versions,
+            get_response_cache: lambda: cache,
+        }
+    )
+    yield {
+        "client": TestClient(app),
+        "user_books": user_books,
+        "logs": logs,
+        "cache": cache,
+        "current": current,
+    }
+    app.dependency_overrides.clear()
+
+
+def library(client):
+    return client.get("/books/user/library").json()["books"]
+
+
+def log_entries(client):
+    return client.get("/books/user/logs", params={"book_id": "b1"}).json()["logs"]
+
+
+def warm(env):
+    """Cache both responses and check that a repeat read skips the database."""
+    client = env["client"]
+    library(client), log_entries(client)
+    reads = env["user_books"].reads, env["logs"].reads
+    library(client), log_entries(client)
+    assert (env["user_books"].reads, env["logs"].reads) == reads
+
+
+def test_repeat_reads_are_served_from_cache(env):
+    warm(env)
+    first = env["client"].get("/books/user/library")
+    assert first.headers["etag"]
+    assert first.headers["content-type"] == "application/json"
+    second = env["client"].get(
+        "/books/user/library", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert second.status_code == 304
+    stats = env["client"].get("/books/user/cache/stats").json()
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 2
+
+
+def test_add_log_is_visible(env):
+    warm(env)
+    response = env["client"].post(
+        "/books/user/log/add",
+        json={
+            "book_id": "b1",
+            "pages_read": 20,
+            "current_page": 30,
+            "reading_date": "2025-01-02",
+        },
+    )
+    assert response.status_code == 200
+    assert library(env["client"])[0]["current_page"] == 30
+    assert len(log_entries(env["client"])) == 2
+
+
+def test_modify_log_is_visible(env):
+    warm(env)
+    response = env["client"].post(
+        "/books/user/log/modify",
+        json={
+            "book_id": "b1",
+            "original_date": "2025-01-01T00:00:00Z",
+            "reading_date": "2025-01-01",
+            "pages_read": 15,
+            "current_page": 15,
+            "notes": "edited",
+        },
+    )
+    assert response.status_code == 200
+    assert library(env["client"])[0]["current_page"] == 15
+    assert log_entries(env["client"])[0]["notes"] == "edited"
+
+
+def test_remove_log_is_visible(env):
+    warm(env)
+    log_id = str(env["logs"].docs[0]["_id"])
+    response = env["client"].post("/books/user/log/remove", json={"log_id": log_id})
+    assert response.status_code == 200
+    assert library(env["client"])[0]["current_page"] == 0
+    assert log_entries(env["client"]) == []
+
+
+def test_add_book_is_visible(env):
+    warm(env)
+    response = env["client"].post(
+        "/books/user/library/add",
+        json={"id": "b2", "title": "Emma", "page_count": 300},
+    )
+    assert response.status_code == 200
+    assert {b["book_id"] for b in library(env["client"])} == {"b1", "b2"}
+
+
+def test_remove_book_is_visible(env):
+    warm(env)
+    response = env["client"].post("/books/user/library/remove", json={"book_id": "b1"})
+    assert response.status_code == 200
+    assert library(env["client"]) == []
+
+
+def test_mark_complete_is_visible(env):
+    warm(env)
+    response = env["client"].post(
+        "/books/user/library/book/modifyComplete", json={"book_id": "b1"}
+    )
+    assert response.status_code == 200
+    assert library(env["client"])[0]["current_page"] == 400
+
+
+def test_page_count_change_reaches_every_holder(env):
+    warm(env)
+    env["current"]["id"] = OTHER_ID
+    assert library(env["client"])[0]["total_pages"] == 400
+
+    env["current"]["id"] = USER_ID
+    response = env["client"].post(
+        "/books/user/library/book/modify",
+        json={"book_google_id": "b1", "total_pages": 500},
+    )
+    assert response.status_code == 200
+    assert library(env["client"])[0]["total_pages"] == 500
+    env["current"]["id"] = OTHER_ID
+    assert library(env["client"])[0]["total_pages"] == 500
+
+
+def test_lru_is_bounded_by_bytes():
+    async def scenario():
+        cache = UserResponseCache(max_bytes=100, ttl_seconds=60)
+        for i in range(5):
+            await cache.set(USER_ID, "logs", 0, {"book_id": str(i)}, b"x" * 40)
+        assert cache.bytes <= 100
+        assert cache.stats()["evictions"] == 3
+        assert await cache.get(USER_ID, "logs", 0, {"book_id": "0"}) is None
+        assert await cache.get(USER_ID, "logs", 0, {"book_id": "4"}) == b"x" * 40
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_is_scoped_to_user_and_book():
+    async def scenario():
+        cache = UserResponseCache(max_bytes=1000, ttl_seconds=60)
+        await cache.set(USER_ID, "logs", 0, {"book_id": "a"}, b"a")
+        await cache.set(USER_ID, "logs", 0, {"book_id": "b"}, b"b")
+        await cache.set(OTHER_ID, "logs", 0, {"book_id": "a"}, b"c")
+
+        await cache.invalidate(USER_ID, "logs", book_id="a")
+        assert await cache.get(USER_ID, "logs", 0, {"book_id": "a"}) is None
+        assert await cache.get(USER_ID, "logs", 0, {"book_id": "b"}) == b"b"
+        assert await cache.get(OTHER_ID, "logs", 0, {"book_id": "a"}) == b"c"
+
+    asyncio.run(scenario())
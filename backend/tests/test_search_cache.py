@@ -0,0 +1,62 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.search_cache import SearchCache, get_search_cache, make_search_key
+from app.services.ttl_cache import TTLCache
+
+
+def test_search_key_is_normalized():
+    assert make_search_key("  Harry   POTTER ", 2, 10) == "harry potter|2|10"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1, ttl_seconds=0)
+    assert cache.get("a") is None
+
+
+def test_memory_tier_hits_misses_and_purge():
+    cache = SearchCache(max_entries=10, ttl_seconds=60, mongo_enabled=False)
+    key = make_search_key("dune", 1, 10)
+
+    async def scenario():
+        assert await cache.get(key) is None
+        await cache.set(key, {"totalItems": 1, "books": []})
+        assert await cache.get(key) == {"totalItems": 1, "books": []}
+        assert await cache.purge("DUNE") == 1
+        assert await cache.get(key) is None
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_only_admins_can_purge(monkeypatch):
+    cache = SearchCache(max_entries=10, ttl_seconds=60, mongo_enabled=False)
+    monkeypatch.setattr(connection, "ADMIN_USERNAMES", {"ops"})
+    user = {"id": "u1", "username": "ana"}
+    app.dependency_overrides.update(
+        {connection.get_current_user: lambda: user, get_search_cache: lambda: cache}
+    )
+    try:
+        client = TestClient(app)
+        assert client.post("/books/search/cache/purge").status_code == 403
+        user["username"] = "ops"
+        assert client.post("/books/search/cache/purge").status_code == 200
+    finally:
+        app.dependency_overrides.clear()
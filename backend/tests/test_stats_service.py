@@ -0,0 +1,222 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.database import connection
+from app.main import app
+from app.services.response_cache import UserResponseCache, get_response_cache
+from app.services.stats_service import (
+    add_sessions,
+    move_session,
+    rebuild_stats,
+    user_stats,
+)
+from fakes import FakeCollection, FakeCursor, matches
+
+USER_ID = ObjectId()
+
+
+class FakeLogs(FakeCollection):
+    def aggregate(self, pipeline, allowDiskUse=False):
+        """$match + $group with the accumulators rebuild_stats uses."""
+        match, group = pipeline[0]["$match"], pipeline[1]["$group"]
+        rows = {}
+        for doc in self.docs:
+            if not matches(doc, match):
+                continue
+            key = {k: doc[v[1:]] for k, v in group["_id"].items()}
+            row = rows.setdefault(tuple(key.values()), {"_id": key})
+            for field, spec in group.items():
+                if field == "_id":
+                    continue
+                op, arg = next(iter(spec.items()))
+                value = 1 if arg == 1 else doc[arg[1:]]
+                if field not in row:
+                    row[field] = value
+                elif op == "$sum":
+                    row[field] += value
+                else:
+                    row[field] = (min if op == "$min" else max)(row[field], value)
+        return FakeCursor(list(rows.values()))
+
+
+def log(book_id, day, pages):
+    return {
+        "_id": ObjectId(),
+        "user_id": USER_ID,
+        "book_id": book_id,
+        "reading_date": datetime(2025, 1, day),
+        "pages_read": pages,
+    }
+
+
+def rollups(stats):
+    return {d["_id"].split(":", 1)[1]: d for d in stats.docs}
+
+
+def test_sessions_roll_up_per_day_and_book():
+    stats = FakeCollection()
+    asyncio.run(
+        add_sessions(
+            stats,
+            USER_ID,
+            [
+                ("b1", datetime(2025, 1, 1), 10, True),
+                ("b2", datetime(2025, 1, 1), 5, True),
+                ("b1", datetime(2025, 1, 3), 20, True),
+                ("b1", datetime(2025, 1, 3), 4, False),  # merged into the same log
+            ],
+        )
+    )
+
+    docs = rollups(stats)
+    assert stats.calls == 1
+    assert (docs["day:2025-01-01"]["pages"], docs["day:2025-01-01"]["sessions"]) == (
+        15,
+        2,
+    )
+    assert (docs["day:2025-01-03"]["pages"], docs["day:2025-01-03"]["sessions"]) == (
+        24,
+        1,
+    )
+    b1 = docs["book:b1"]
+    assert (b1["pages"], b1["sessions"]) == (34, 2)
+    assert (b1["first_date"], b1["last_date"]) == (
+        datetime(2025, 1, 1),
+        datetime(2025, 1, 3),
+    )
+
+
+def test_moving_and_removing_sessions_keeps_rollups_exact():
+    logs = FakeLogs([log("b1", 1, 10), log("b1", 3, 20)])
+    stats = FakeCollection()
+    asyncio.run(rebuild_stats(stats, logs))
+
+    # Move the Jan 3 session to Jan 5 with a corrected page count
+    moved = logs.docs[1]
+    moved.update(reading_date=datetime(2025, 1, 5), pages_read=25)
+    asyncio.run(
+        move_session(
+            stats,
+            logs,
+            USER_ID,
+            "b1",
+            old=(datetime(2025, 1, 3), 20),
+            new=(datetime(2025, 1, 5), 25),
+        )
+    )
+    docs = rollups(stats)
+    assert "day:2025-01-03" not in docs
+    assert docs["day:2025-01-05"]["pages"] == 25
+    assert docs["book:b1"]["last_date"] == datetime(2025, 1, 5)
+
+    # Remove the first session: the book's first date moves forward
+    logs.docs.remove(logs.docs[0])
+    asyncio.run(
+        move_session(
+            stats, logs, USER_ID, "b1", old=(datetime(2025, 1, 1), 10), new=None
+        )
+    )
+    docs = rollups(stats)
+    assert set(docs) == {"day:2025-01-05", "book:b1"}
+    assert (docs["book:b1"]["pages"], docs["book:b1"]["sessions"]) == (25, 1)
+    assert docs["book:b1"]["first_date"] == datetime(2025, 1, 5)
+
+
+def test_rebuild_matches_incremental_updates():
+    sessions = [("b1", 1, 10), ("b2", 1, 5), ("b1", 2, 7), ("b2", 9, 30)]
+    logs = FakeLogs([log(b, d, p) for b, d, p in sessions])
+    incremental, rebuilt = FakeCollection(), FakeCollection()
+    asyncio.run(
+        add_sessions(
+            incremental,
+            USER_ID,
+            [(b, datetime(2025, 1, d), p, True) for b, d, p in sessions],
+        )
+    )
+
+    report = asyncio.run(rebuild_stats(rebuilt, logs, USER_ID))
+
+    assert report == {"days": 3, "books": 2}
+    fields = ("pages", "sessions", "first_date", "last_date")
+    assert {
+        k: {f: d.get(f) for f in fields} for k, d in rollups(incremental).items()
+    } == {k: {f: d.get(f) for f in fields} for k, d in rollups(rebuilt).items()}
+
+
+def test_streaks_and_periods():
+    logs = FakeLogs([log("b1", d, 10) for d in (1, 2, 3, 10, 11)] + [log("b2", 11, 20)])
+    stats = FakeCollection()
+    asyncio.run(rebuild_stats(stats, logs))
+
+    result = asyncio.run(user_stats(stats, USER_ID, date(2025, 1, 12)))
+
+    assert result["streak"] == {"current": 2, "longest": 3}
+    assert (result["total_pages"], result["total_sessions"]) == (70, 6)
+    assert result["active_days"] == 5
+    assert result["pages_today"] == 0
+    assert result["pages_last_7_days"] == 40
+    assert result["average_session_pages"] == round(70 / 6, 1)
+    assert result["monthly"] == [{"month": "2025-01", "pages": 70}]
+    b1 = next(b for b in result["books"] if b["book_id"] == "b1")
+    assert (b1["pages_per_session"], b1["pages_per_day"]) == (10.0, 4.5)
+
+    # A day without reading breaks the current streak
+    result = asyncio.run(user_stats(stats, USER_ID, date(2025, 1, 13)))
+    assert result["streak"]["current"] == 0
+
+
+@pytest.fixture
+def client():
+    user_books = FakeCollection(
+        [{"user_id": USER_ID, "book_id": "b1", "current_page": 0, "start_date": None}]
+    )
+    logs, stats = FakeCollection(), FakeCollection()
+    app.dependency_overrides.update(
+        {
+            connection.get_current_user: lambda: {"id": str(USER_ID)},
+            connection.get_user_books_collection: lambda: user_books,
+            connection.get_reading_logs_collection: lambda: logs,
+            connection.get_reading_stats_collection: lambda: stats,
+            connection.get_user_versions_collection: lambda: FakeCollection(),
+            get_response_cache: lambda: UserResponseCache(1 << 16, 60),
+        }
+    )
+    yield TestClient(app), stats, logs
+    app.dependency_overrides.clear()
+
+
+def test_second_log_on_a_day_is_not_a_new_session(client):
+    client, stats, _ = client
+    today = date.today().isoformat()
+    for page in (10, 25):
+        response = client.post(
+            "/books/user/log/add",
+            json={
+                "book_id": "b1",
+                "pages_read": 10 if page == 10 else 15,
+                "current_page": page,
+                "reading_date": today,
+            },
+        )
+        assert response.status_code == 200
+
+    result = client.get("/books/user/stats").json()
+    assert (result["total_pages"], result["total_sessions"]) == (25, 1)
+    assert result["pages_today"] == 25
+    assert result["streak"]["current"] == 1
+
+
+def test_removing_another_users_log_is_not_found(client):
+    client, stats, logs = client
+    other = log("b1", 2, 30)
+    other["user_id"] = ObjectId()
+    logs.docs.append(other)
+
+    response = client.post("/books/user/log/remove", json={"log_id": str(other["_id"])})
+    assert response.status_code == 404
+    assert logs.docs == [other]
+    assert stats.docs == []
@@ -0,0 +1,117 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.rate_scheduler import LocalTokenBucket, Priority, RateScheduler
+from app.services.upstream import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientUpstream,
+    UpstreamTimeoutError,
+)
+
+
+def _server_error():
+    request = httpx.Request("GET", "https://example.test")
+    response = httpx.Response(503, request=request)
+    return httpx.HTTPStatusError("unavailable", request=request, response=response)
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    upstream = ResilientUpstream(1.0, CircuitBreaker(2, reset_seconds=60))
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        raise _server_error()
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await upstream.call(failing)
+        with pytest.raises(CircuitOpenError):
+            await upstream.call(failing)
+
+    asyncio.run(scenario())
+    assert calls == 2
+    assert upstream.stats()["circuit"] == "open"
+
+
+def test_half_open_trial_success_closes_breaker():
+    breaker = CircuitBreaker(1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_deadline_is_reported_as_timeout():
+    upstream = ResilientUpstream(0.01, CircuitBreaker(5, reset_seconds=60))
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(UpstreamTimeoutError):
+        asyncio.run(upstream.call(slow))
+    assert upstream.stats()["failures"] == 1
+
+
+def test_hedged_request_wins_when_first_attempt_stalls():
+    upstream = ResilientUpstream(
+        1.0,
+        CircuitBreaker(5, reset_seconds=60),
+        hedge_enabled=True,
+        hedge_default_delay=0.01,
+    )
+    attempts = 0
+
+    async def first_slow():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.5 if attempts == 1 else 0)
+        return attempts
+
+    assert asyncio.run(upstream.call(first_slow)) == 2
+    assert upstream.stats()["hedges_won"] == 1
+
+
+def test_hedge_takes_its_own_token_or_is_skipped():
+    def scheduler(burst):
+        bucket = LocalTokenBucket(rate_per_second=0.001, burst=burst)
+        return RateScheduler(bucket, {Priority.INTERACTIVE: 1.0})
+
+    async def search(rates):
+        upstream = ResilientUpstream(
+            1.0,
+            CircuitBreaker(5, reset_seconds=60),
+            hedge_enabled=True,
+            hedge_default_delay=0.01,
+        )
+        attempts = 0
+
+        async def first_slow():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.1 if attempts == 1 else 0)
+            return attempts
+
+        await rates.acquire()
+        result = await upstream.call(
+            first_slow, acquire=lambda timeout: rates.acquire(timeout=timeout)
+        )
+        return result, upstream.stats()
+
+    rates = scheduler(burst=2)
+    result, stats = asyncio.run(search(rates))
+    assert result == 2 and stats["hedges"] == 1
+    assert rates.granted["interactive"] == 2
+
+    # No token left for the hedge: the first attempt is awaited alone
+    rates = scheduler(burst=1)
+    result, stats = asyncio.run(search(rates))
+    assert result == 1 and (stats["hedges"], stats["hedges_skipped"]) == (0, 1)
+    assert rates.granted["interactive"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+
+from bson import ObjectId
+from fastapi import Response
+from starlette.requests import Request
+
+from app.services.versioning import (
+    bump_user_version,
+    check_not_modified,
+    etag_matches,
+    get_user_version,
+    make_etag,
+)
+
+
+class FakeVersions:
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"], "v": 0})
+        doc["v"] += update["$inc"]["v"]
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_depends_on_scope_version_and_params():
+    user = str(ObjectId())
+    etag = make_etag("logs", user, 3, book_id="a")
+    assert etag == make_etag("logs", user, 3, book_id="a")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != make_etag("logs", user, 4, book_id="a")
+    assert etag != make_etag("logs", user, 3, book_id="b")
+    assert etag != make_etag("book", user, 3, book_id="a")
+
+
+def test_if_none_match_parsing():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abcd"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_write_invalidates_etag():
+    async def scenario():
+        versions, user = FakeVersions(), str(ObjectId())
+
+        version = await get_user_version(versions, user)
+        first = Response()
+        assert check_not_modified(make_request(), first, version, user, "lib") is None
+        etag = first.headers["etag"]
+
+        cached = check_not_modified(
+            make_request(etag), Response(), version, user, "lib"
+        )
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+        await bump_user_version(versions, user)
+        version = await get_user_version(versions, user)
+        fresh = Response()
+        assert (
+            check_not_modified(make_request(etag), fresh, version, user, "lib") is None
+        )
+        assert fresh.headers["etag"] != etag
+
+    asyncio.run(scenario())
@@ -0,0 +1,239 @@
+"""Offline stand-in for the Google Books `volumes` endpoint.
+
+Serves recorded fixtures (JSON files in `tools/fixtures/google_books/`, one per
+normalized query) and falls back to deterministic synthetic volumes for any
+other query. Latency, error rate and payload size (log-normally distributed
+description lengths) are configurable so the search path can be load-tested
+without network access or API quota.
+
+As an ASGI app in tests:
+
+    app = create_stub_app(latency_ms=0)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+As a standalone process (then set GOOGLE_BOOKS_API_URL to
+http://localhost:8081/books/v1/volumes):
+
+    python -m tools.google_books_stub --port 8081 --latency-ms 120 --error-rate 0.02
+
+To record a real response as a fixture (needs GOOGLE_BOOKS_API_KEY;
+--fixtures-dir goes before the subcommand):
+
+    python -m tools.google_books_stub record "harry potter" --pages 2
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+from pathlib import Path
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "google_books"
+API_PATH = "/books/v1/volumes"
+
+_WORDS = (
+    "shadow river garden empire winter silent glass iron letters city "
+    "ocean memory night house stone light forest queen machine dream"
+).split()
+
+
+def fixture_name(query: str) -> str:
+    normalized = " ".join(query.lower().split())
+    return re.sub(r"[^a-z0-9]+", "_", normalized).strip("_") + ".json"
+
+
+def load_fixtures(fixtures_dir: Path) -> dict[str, dict]:
+    fixtures = {}
+    if fixtures_dir.is_dir():
+        for path in fixtures_dir.glob("*.json"):
+            fixtures[path.name] = json.loads(path.read_text(encoding="utf-8"))
+    return fixtures
+
+
+def synthetic_volume(
+    query: str, index: int, description_chars: int, description_sigma: float = 0.0
+) -> dict:
+    """A deterministic volume for (query, index), shaped like the real API.
+
+    The description length is log-normal with median `description_chars`
+    and shape `description_sigma` (0 gives every volume the same length).
+    """
+    seed = int(hashlib.sha256(f"{query}|{index}".encode()).hexdigest()[:12], 16)
+    rng = random.Random(seed)
+    description_chars = max(
+        0, int(rng.lognormvariate(0, description_sigma) * description_chars)
+    )
+    title_words = [query.title()] + rng.sample(_WORDS, 2)
+    isbn = "978" + "".join(str(rng.randint(0, 9)) for _ in range(10))
+    volume_id = hashlib.sha1(f"{query}|{index}".encode()).hexdigest()[:12]
+    description = " ".join(rng.choice(_WORDS) for _ in range(description_chars // 6))
+    return {
+        "kind": "books#volume",
+        "id": volume_id,
+        "volumeInfo": {
+            "title": " ".join(title_words),
+            "authors": [f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()}"],
+            "publisher": f"{rng.choice(_WORDS).title()} Press",
+            "publishedDate": str(rng.randint(1950, 2024)),
+            "description": description[:description_chars],
+            "industryIdentifiers": [{"type": "ISBN_13", "identifier": isbn}],
+            "pageCount": rng.randint(80, 1200),
+            "categories": [rng.choice(["Fiction", "History", "Science", "Fantasy"])],
+            "imageLinks": {
+                "thumbnail": f"http://books.example.test/{volume_id}/thumbnail.jpg"
+            },
+            "infoLink": f"http://books.example.test/{volume_id}",
+        },
+    }
+
+
+def create_stub_app(
+    fixtures_dir: Path | str | None = FIXTURES_DIR,
+    latency_ms: float = 80.0,
+    latency_sigma: float = 0.5,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    total_items: int = 200,
+    description_chars: int = 600,
+    description_sigma: float = 0.8,
+    seed: int | None = None,
+) -> FastAPI:
+    """Build the stub ASGI app.
+
+    Latency is log-normally distributed around `latency_ms` (median) with
+    shape `latency_sigma`; `error_rate` and `rate_limit_rate` are the
+    fractions of requests answered with 503 and 429. Synthetic volumes get
+    log-normally distributed description lengths (median `description_chars`,
+    shape `description_sigma`), so payload sizes vary like real results.
+    """
+    fixtures = load_fixtures(Path(fixtures_dir)) if fixtures_dir else {}
+    rng = random.Random(seed)
+    app = FastAPI(title="Google Books stub")
+    app.state.requests = 0
+
+    @app.get(API_PATH)
+    async def volumes(
+        q: str = Query(...),
+        startIndex: int = Query(0, ge=0),
+        maxResults: int = Query(10, ge=1, le=40),
+        key: str | None = None,
+    ):
+        app.state.requests += 1
+        if latency_ms > 0:
+            delay = rng.lognormvariate(0, latency_sigma) * latency_ms / 1000
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < error_rate:
+            return JSONResponse(
+                status_code=503, content={"error": {"code": 503, "message": "stub"}}
+            )
+        if roll < error_rate + rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"code": 429, "message": "Rate limit exceeded"}},
+            )
+
+        recorded = fixtures.get(fixture_name(q))
+        if recorded is not None:
+            items = recorded.get("items", [])
+            return {
+                "kind": "books#volumes",
+                "totalItems": recorded.get("totalItems", len(items)),
+                "items": items[startIndex : startIndex + maxResults],
+            }
+
+        end = min(startIndex + maxResults, total_items)
+        return {
+            "kind": "books#volumes",
+            "totalItems": total_items,
+            "items": [
+                synthetic_volume(q, i, description_chars, description_sigma)
+                for i in range(startIndex, end)
+            ],
+        }
+
+    return app
+
+
+def record(query: str, pages: int, page_size: int, fixtures_dir: Path) -> Path:
+    """Fetch `pages` real result pages for `query` and store them as a fixture."""
+    import httpx
+
+    from app.settings import settings
+
+    items, total = [], 0
+    with httpx.Client(timeout=10) as client:
+        for page in range(pages):
+            response = client.get(
+                "https://www.googleapis.com/books/v1/volumes",
+                params={
+                    "q": query,
+                    "key": settings.GOOGLE_BOOKS_API_KEY,
+                    "maxResults": page_size,
+                    "startIndex": page * page_size,
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+            total = data.get("totalItems", 0)
+            items.extend(data.get("items", []))
+
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    path = fixtures_dir / fixture_name(query)
+    path.write_text(
+        json.dumps({"totalItems": total, "items": items}, indent=2), encoding="utf-8"
+    )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command")
+
+    rec = sub.add_parser("record", help="record a real response as a fixture")
+    rec.add_argument("query")
+    rec.add_argument("--pages", type=int, default=1)
+    rec.add_argument("--page-size", type=int, default=40)
+
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fixtures-dir", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--total-items", type=int, default=200)
+    parser.add_argument("--description-chars", type=int, default=600)
+    parser.add_argument("--description-sigma", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        path = record(args.query, args.pages, args.page_size, args.fixtures_dir)
+        print(f"Recorded {path}")
+        return
+
+    import uvicorn
+
+    app = create_stub_app(
+        fixtures_dir=args.fixtures_dir,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        total_items=args.total_items,
+        description_chars=args.description_chars,
+        description_sigma=args.description_sigma,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,8 @@ export default function AddBookModal({ open, onClose }: AddBookModalProps) {
   const sentinelRef = useRef<HTMLDivElement | null>(null);
   const modalRef = useRef<HTMLDivElement | null>(null);
   const startedOutsideRef = useRef(false);
+  // Source page 1 was answered from; later pages must use the same one
+  const sourceRef = useRef<string | null>(null);
 
   // Pagination
   const [page, setPage] = useState(1);
@@ -120,13 +122,16 @@ export default function AddBookModal({ open, onClose }: AddBookModalProps) {
     try {
       if (p > 1) setLoadingMore(true);
       else setLoading(true);
+      const sourceParam =
+        p > 1 && sourceRef.current ? `&source=${sourceRef.current}` : "";
       const res = await authFetch(
         `${apiRoutes.books.search}?query=${encodeURIComponent(
           q
-        )}&page=${p}&page_size=${PAGE_SIZE}`
+        )}&page=${p}&page_size=${PAGE_SIZE}${sourceParam}`
       );
       if (!res.ok) throw new Error("Search failed");
       const json = await res.json();
+      if (p === 1) sourceRef.current = json.source ?? null;
       const books: BookHit[] = json.books || [];
       if (append) {
         setResults((prev) => [...prev, ...books]);